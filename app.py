@@ -13,6 +13,11 @@ from routers.storages.crud import db_create_storage, db_get_storage_by_name
 from routers.wheels.router import router as wheel_router
 from routers.orders.router import router as orders_router
 from routers.history.router import router as history_router
+from routers.occupancy.router import router as occupancy_router
+from routers.history.history_actions import history_writer
+from routers.jobs.router import router as jobs_router, api_jobs_consumers
+from routers.jobs.handlers import JOB_HANDLERS
+from routers.jobs.jobs_queue import JobsConsumerPool
 from routers.presets.router import router as presets_router
 from routers.storages.router import router as storages_router
 from routers.base_platform.router import router as platform_router
@@ -25,6 +30,7 @@ from routers.grid.crud import collect_wheelstack_cells, get_grid_by_name, create
 from routers.websockets.gridWebsocket import router as websocket_router
 from database.presets.presets import create_pmk_grid_preset, create_pmk_platform_preset
 from constants import CLN_STORAGES, PRES_PMK_GRID, PRES_PMK_PLATFORM, DB_PMK_NAME, CLN_PRESETS, CLN_BASE_PLATFORM, CLN_GRID
+from constants import JOBS_QUEUE_ENABLED, JOBS_API_CONSUMERS
 
 
 # TODO: We need to change records CREATION for some cases.
@@ -56,7 +62,16 @@ logger.add(
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await prepare_db()
+    if JOBS_QUEUE_ENABLED and JOBS_API_CONSUMERS:
+        api_jobs_consumers['pool'] = JobsConsumerPool(
+            JOB_HANDLERS, mongo_client.get_client(), JOBS_API_CONSUMERS
+        )
+        api_jobs_consumers['pool'].start()
     yield
+    if 'pool' in api_jobs_consumers:
+        await api_jobs_consumers.pop('pool').stop()
+    # Pending history records should be written before we lose connection.
+    await history_writer.flush()
     await close_db()
 
 # TODO: remove debug, after completion.
@@ -85,7 +100,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.add_middleware(
-    BrotliMiddleware, quality=3, minimum_size=1000
+    BrotliMiddleware, quality=3, minimum_size=1000,
+    # SSE should be sent as soon as event occurs, without buffering for compression.
+    excluded_handlers=[r'/orders/stream$'],
 )
 
 app.include_router(presets_router, prefix='/presets', tags=['Preset'])
@@ -97,7 +114,9 @@ app.include_router(wheelstack_router, prefix='/wheelstacks', tags=['WheelStack']
 app.include_router(orders_router, prefix='/orders', tags=['Orders'])
 app.include_router(storages_router, prefix='/storages', tags=['Storages'])
 app.include_router(history_router, prefix='/history', tags=['History'])
+app.include_router(occupancy_router, prefix='/occupancy', tags=['Occupancy'])
 app.include_router(websocket_router, prefix='/ws', tags=['ws'])
+app.include_router(jobs_router, prefix='/jobs', tags=['Jobs'])
 
 
 # Deprecated, changed to `lifespan`
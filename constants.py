@@ -23,6 +23,11 @@ ORDER_STATUS_COMPLETED: str = 'completed'
 ORDER_STATUS_CANCELED: str = 'canceled'
 ORDER_STATUS_PENDING: str = 'pending'
 
+# Order events, by collection where order is inserted.
+ORDER_EVENT_CREATED: str = 'created'
+ORDER_EVENT_COMPLETED: str = 'completed'
+ORDER_EVENT_CANCELED: str = 'canceled'
+
 # BASIC EXTRA MOVES
 BASIC_EXTRA_MOVES: set[str] = {
     ORDER_MOVE_TO_LABORATORY,
@@ -45,6 +50,11 @@ CLN_PRESETS: str = 'presets'
 CLN_BATCH_NUMBERS: str = 'batchNumbers'
 CLN_STORAGES: str = 'storages'
 CLN_PLACEMENT_HISTORY: str = 'placementHistory'
+CLN_PLACEMENT_CHANGES: str = 'placementChanges'
+CLN_JOBS_QUEUE: str = 'jobsQueue'
+CLN_PLACEMENT_LEASES: str = 'placementLeases'
+CLN_WHEEL_MOVEMENTS: str = 'wheelMovements'
+CLN_PLACEMENT_OCCUPANCY: str = 'placementOccupancy'
 # PRESETS
 PRES_PMK_GRID: str = 'pmkGrid'
 PRES_PMK_PLATFORM: str = 'pmkBasePlatform'
@@ -54,6 +64,174 @@ PLACEMENT_COLLECTIONS: dict[str, str] = {
     PT_BASE_PLATFORM: CLN_BASE_PLATFORM,
     PT_STORAGE: CLN_STORAGES,
 }
+# Placement types by collections
+PLACEMENT_TYPES: dict[str, str] = {
+    CLN_GRID: PT_GRID,
+    CLN_BASE_PLATFORM: PT_BASE_PLATFORM,
+    CLN_STORAGES: PT_STORAGE,
+}
+
+# Order events by collections
+ORDER_EVENTS_COLLECTIONS: dict[str, str] = {
+    CLN_ACTIVE_ORDERS: ORDER_EVENT_CREATED,
+    CLN_COMPLETED_ORDERS: ORDER_EVENT_COMPLETED,
+    CLN_CANCELED_ORDERS: ORDER_EVENT_CANCELED,
+}
+# Order collections by `status` of the orders stored in them
+ORDER_STATUS_COLLECTIONS: dict[str, str] = {
+    ORDER_STATUS_PENDING: CLN_ACTIVE_ORDERS,
+    ORDER_STATUS_COMPLETED: CLN_COMPLETED_ORDERS,
+    ORDER_STATUS_CANCELED: CLN_CANCELED_ORDERS,
+}
+# Default and max number of orders on the single page of `GET /orders`.
+ORDERS_PAGE_LIMIT_DEFAULT: int = int(getenv('ORDERS_PAGE_LIMIT_DEFAULT', 100))
+ORDERS_PAGE_LIMIT_MAX: int = int(getenv('ORDERS_PAGE_LIMIT_MAX', 1000))
+# Seconds without events before we send `keep-alive` comment into the orders stream.
+ORDERS_STREAM_HEARTBEAT: int = int(getenv('ORDERS_STREAM_HEARTBEAT', 15))
+
+# region ordersArchive
+# Completed|canceled orders are moved into monthly archive collections `<collection>Archive_<YYYY>_<MM>`,
+#  by the month of the field they're archived by.
+ORDERS_ARCHIVE_FIELDS: dict[str, str] = {
+    CLN_COMPLETED_ORDERS: 'completedAt',
+    CLN_CANCELED_ORDERS: 'canceledAt',
+}
+ORDERS_ARCHIVE_SUFFIX: str = 'Archive'
+# Orders are archived after this number of days since their completion|cancellation.
+ORDERS_ARCHIVE_AFTER_DAYS: int = max(1, int(getenv('ORDERS_ARCHIVE_AFTER_DAYS', 90)))
+# Max number of orders moved by a single insert|delete of the archiver.
+ORDERS_ARCHIVE_BATCH: int = int(getenv('ORDERS_ARCHIVE_BATCH', 500))
+# Seconds between archivations enqueued by the consumer process (`jobs_consumer.py`), 0 == only manual.
+ORDERS_ARCHIVE_INTERVAL: float = float(getenv('ORDERS_ARCHIVE_INTERVAL', 86400))
+# Archived orders are only searched by `_id`, and listed by `createdAt`.
+ORDERS_ARCHIVE_INDEXES: list[dict] = [
+    {'keys': {'createdAt': -1, '_id': -1}, 'options': {'name': 'createdAt_id_desc_index'}},
+]
+# endregion ordersArchive
+
+# region orderEngine
+ORDER_ACTION_COMPLETE: str = 'complete'
+ORDER_ACTION_CANCEL: str = 'cancel'
+# Complete|cancel orders declared in `ORDER_ENGINE_SPECS` with the order engine, others use their own functions.
+ORDER_ENGINE_ENABLED: bool = getenv('ORDER_ENGINE_ENABLED', 'true').lower() == 'true'
+# Max number of orders in a single bulk creation|completion|cancellation.
+ORDERS_BULK_LIMIT: int = int(getenv('ORDERS_BULK_LIMIT', 200))
+# Outcomes of the bulk orders, besides `completed`|`canceled`.
+ORDERS_BULK_CREATED: str = 'created'
+ORDERS_BULK_NOT_FOUND: str = 'notFound'
+ORDERS_BULK_FAILED: str = 'failed'
+# Bulk created orders claim their cells with conditional updates, without a transaction,
+#  if every affected `wheelstack` is placed in these cells.
+ORDERS_BULK_OPTIMISTIC: bool = getenv('ORDERS_BULK_OPTIMISTIC', 'true').lower() == 'true'
+# endregion orderEngine
+
+# region placementActors
+# `/orders/create/move` orders are queued to the actor of their source placement,
+#  and created in batches (one write of the placement per tick), instead of a transaction per order.
+ORDERS_ACTOR_ENABLED: bool = getenv('ORDERS_ACTOR_ENABLED', 'false').lower() == 'true'
+# Seconds actor collects queued orders before writing them.
+ORDERS_ACTOR_TICK: float = float(getenv('ORDERS_ACTOR_TICK', 0.02))
+# Actors of different workers take lease of the placement before every write, so only one of them writes at a time.
+# `false` only for a single worker.
+ORDERS_ACTOR_LEASE: bool = getenv('ORDERS_ACTOR_LEASE', 'true').lower() == 'true'
+# Seconds lease is kept without extending it, after that it's taken by other workers (actor's worker died).
+ORDERS_ACTOR_LEASE_SECONDS: float = float(getenv('ORDERS_ACTOR_LEASE_SECONDS', 5))
+# endregion placementActors
+
+# region placementChanges
+# Max number of journal records we store for a single placement.
+PLACEMENT_CHANGES_LIMIT: int = int(getenv('PLACEMENT_CHANGES_LIMIT', 2000))
+# Journal compaction is triggered on every Nth version of the placement.
+PLACEMENT_CHANGES_PRUNE_STEP: int = int(getenv('PLACEMENT_CHANGES_PRUNE_STEP', 200))
+# Max number of changes returned in one catch-up, bigger gaps == snapshot.
+PLACEMENT_CHANGES_MAX_BATCH: int = int(getenv('PLACEMENT_CHANGES_MAX_BATCH', 500))
+# endregion placementChanges
+
+# region gridSuggest
+# Seconds the in-process `grid` cells index is used without checking `placementChanges` journal.
+GRID_SUGGEST_REFRESH: float = float(getenv('GRID_SUGGEST_REFRESH', 1))
+# Default and max number of cells returned by a single `/grid/{id}/suggest`.
+GRID_SUGGEST_COUNT_DEFAULT: int = int(getenv('GRID_SUGGEST_COUNT_DEFAULT', 10))
+GRID_SUGGEST_COUNT_MAX: int = int(getenv('GRID_SUGGEST_COUNT_MAX', 200))
+# endregion gridSuggest
+
+# region placementHistory
+HISTORY_RECORD_KEYFRAME: str = 'keyframe'
+HISTORY_RECORD_DELTA: str = 'delta'
+# Every Nth history record of the placement is stored as a full snapshot (keyframe),
+#  others only store changes from the previous record (delta).
+HISTORY_KEYFRAME_INTERVAL: int = int(getenv('HISTORY_KEYFRAME_INTERVAL', 50))
+# Record fields which are stored as changes in `delta` records.
+HISTORY_RECORD_DATA_FIELDS: list[str] = [
+    'placementData',
+    'wheelstacksData',
+    'placementOrders',
+    'wheelsData',
+    'batchesData',
+]
+# Seconds to coalesce history records of the same placement, only the latest state is recorded.
+# 0 == every record is written right away.
+HISTORY_COALESCE_WINDOW: float = float(getenv('HISTORY_COALESCE_WINDOW', 2))
+# Tiered retention, by age of the record:
+#  younger than FULL days <- every record is kept,
+#  younger than HOURLY days <- last record of every hour is kept,
+#  older <- last record of every day is kept, records older than DAILY days are deleted (0 == kept forever).
+HISTORY_RETENTION_FULL_DAYS: int = max(1, int(getenv('HISTORY_RETENTION_FULL_DAYS', 7)))
+HISTORY_RETENTION_HOURLY_DAYS: int = int(getenv('HISTORY_RETENTION_HOURLY_DAYS', 30))
+HISTORY_RETENTION_DAILY_DAYS: int = int(getenv('HISTORY_RETENTION_DAILY_DAYS', 0))
+# Max number of records deleted by a single query of the compaction.
+HISTORY_COMPACTION_BATCH: int = int(getenv('HISTORY_COMPACTION_BATCH', 500))
+# Seconds between compactions enqueued by the consumer process (`jobs_consumer.py`), 0 == only manual.
+HISTORY_COMPACTION_INTERVAL: float = float(getenv('HISTORY_COMPACTION_INTERVAL', 3600))
+# Heavy fields of the full records, stored compressed.
+HISTORY_COMPRESSED_FIELDS: list[str] = [
+    'wheelstacksData',
+    'wheelsData',
+    'batchesData',
+]
+HISTORY_COMPRESSION_ZLIB: str = 'zlib'
+# `zlib` == new records are stored compressed, `none` == as is. Compressed records are always readable.
+HISTORY_COMPRESSION: str = getenv('HISTORY_COMPRESSION', HISTORY_COMPRESSION_ZLIB).lower()
+HISTORY_COMPRESSION_LEVEL: int = int(getenv('HISTORY_COMPRESSION_LEVEL', 6))
+# Pages of the `/history/all`.
+HISTORY_PAGE_LIMIT_DEFAULT: int = int(getenv('HISTORY_PAGE_LIMIT_DEFAULT', 100))
+HISTORY_PAGE_LIMIT_MAX: int = int(getenv('HISTORY_PAGE_LIMIT_MAX', 1000))
+# Max time of the exact records count, after it only estimate of the whole collection is returned.
+HISTORY_COUNT_MAX_TIME_MS: int = int(getenv('HISTORY_COUNT_MAX_TIME_MS', 500))
+# endregion placementHistory
+
+# region placementOccupancy
+# `true` == occupancy sample of the placement is recorded with every history record.
+OCCUPANCY_ENABLED: bool = getenv('OCCUPANCY_ENABLED', 'true').lower() == 'true'
+OCCUPANCY_UNITS: list[str] = ['minute', 'hour', 'day']
+# Max number of points returned by a single range request.
+OCCUPANCY_POINTS_MAX: int = int(getenv('OCCUPANCY_POINTS_MAX', 20000))
+# endregion placementOccupancy
+
+# region jobsQueue
+JOB_STATUS_PENDING: str = 'pending'
+JOB_STATUS_RUNNING: str = 'running'
+JOB_STATUS_DONE: str = 'done'
+JOB_STATUS_FAILED: str = 'failed'
+# Job types
+JOB_HISTORY_RECORD: str = 'historyRecord'
+JOB_HISTORY_COMPACTION: str = 'historyCompaction'
+JOB_ORDERS_ARCHIVE: str = 'ordersArchive'
+# `false` == deferred work is done inside of the request workers, without queue.
+JOBS_QUEUE_ENABLED: bool = getenv('JOBS_QUEUE_ENABLED', 'true').lower() == 'true'
+# Number of jobs processed at the same time by the consumer process (`jobs_consumer.py`).
+JOBS_CONSUMER_CONCURRENCY: int = int(getenv('JOBS_CONSUMER_CONCURRENCY', 4))
+# Number of consumers started inside every API worker, 0 == only dedicated consumer process is used.
+JOBS_API_CONSUMERS: int = int(getenv('JOBS_API_CONSUMERS', 0))
+# Seconds claimed job is leased to the consumer, lease is extended while job is running.
+JOBS_LEASE_SECONDS: int = int(getenv('JOBS_LEASE_SECONDS', 60))
+JOBS_MAX_ATTEMPTS: int = int(getenv('JOBS_MAX_ATTEMPTS', 5))
+# Retry delay == BASE * 2 ** (attempt - 1), but not more than MAX.
+JOBS_BACKOFF_BASE: float = float(getenv('JOBS_BACKOFF_BASE', 2))
+JOBS_BACKOFF_MAX: float = float(getenv('JOBS_BACKOFF_MAX', 300))
+# Seconds consumer waits before checking the queue again, when it's empty.
+JOBS_POLL_INTERVAL: float = float(getenv('JOBS_POLL_INTERVAL', 1))
+# endregion jobsQueue
 
 # PRESET TYPES
 PRES_TYPE_GRID: str = 'grid'
@@ -103,6 +281,9 @@ WS_MAX_WHEELS: int = 6
 # WHEELS LIMIT
 # WL_MIN_DIAM: int = 500
 # WL_MAX_DIAM: int = 100_000
+# Movements of the wheel returned by `/wheels/{id}/trace`.
+WHEEL_TRACE_LIMIT_DEFAULT: int = int(getenv('WHEEL_TRACE_LIMIT_DEFAULT', 500))
+WHEEL_TRACE_LIMIT_MAX: int = int(getenv('WHEEL_TRACE_LIMIT_MAX', 5000))
 
 # JWT INFO
 PUBLIC_KEY = None
@@ -156,6 +337,12 @@ WS_CODES: dict[int, int] = {
     status.HTTP_409_CONFLICT: status.WS_1008_POLICY_VIOLATION,  # Conflict -> Policy Violation
     status.HTTP_500_INTERNAL_SERVER_ERROR: status.WS_1011_INTERNAL_ERROR,  # Internal Server Error -> Internal Error
 }
+# region chunks
+# Chunked responses: client can negotiate `chunkSize` in the limits of MIN|MAX.
+WS_CHUNK_SIZE_DEFAULT: int = int(getenv('WS_CHUNK_SIZE_DEFAULT', 200))
+WS_CHUNK_SIZE_MIN: int = int(getenv('WS_CHUNK_SIZE_MIN', 10))
+WS_CHUNK_SIZE_MAX: int = int(getenv('WS_CHUNK_SIZE_MAX', 1000))
+# endregion chunks
 # region REDIS
 PARTIAL_UPDATE_CHANNEL: str = getenv('PARTIAL_UPDATE_CHANNEL', 'partialUpdate')
 # endregion REDIS
@@ -2,7 +2,7 @@ import json
 from loguru import logger
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo.errors import CollectionInvalid
+from pymongo.errors import CollectionInvalid, OperationFailure
 from constants import DB_PMK_NAME, FLD_BASIC_SCHEMAS
 
 
@@ -33,8 +33,14 @@ async def create_basic_collections(db: AsyncIOMotorClient,
             indexes: dict = {}
             if 'indexes' in schema:
                 indexes: dict = schema.pop('indexes')
+            # Extra options of the collection creation, like `timeseries`.
+            options: dict = schema.pop('options', {})
+            # Names of the indexes replaced by other indexes, they're dropped from existing collections.
+            dropped_indexes: list[str] = schema.pop('droppedIndexes', [])
             try:
-                await db[DB_PMK_NAME].create_collection(collection_name, validator={'$jsonSchema': schema})
+                await db[DB_PMK_NAME].create_collection(
+                    collection_name, validator={'$jsonSchema': schema}, **options
+                )
                 logger.info(f'Created collection {collection_name} in DB: {DB_PMK_NAME}')
             except CollectionInvalid as col_err:
                 logger.warning(f'Collection {collection_name} already exists: {col_err}')
@@ -49,3 +55,11 @@ async def create_basic_collections(db: AsyncIOMotorClient,
                     logger.info(f'Created index on {keys} in collection: {collection_name}')
                 except Exception as error:
                     logger.error(f'Error creating index on {keys} in collection: {collection_name}: {error}')
+            for index_name in dropped_indexes:
+                try:
+                    await db[DB_PMK_NAME][collection_name].drop_index(index_name)
+                    logger.info(f'Dropped index {index_name} in collection: {collection_name}')
+                except OperationFailure as error:
+                    # `IndexNotFound` <- already dropped, or never created.
+                    if 27 != error.code:
+                        logger.error(f'Error dropping index {index_name} in collection: {collection_name}: {error}')
@@ -0,0 +1,77 @@
+import os
+import bson
+import asyncio
+import argparse
+from loguru import logger
+from dotenv import load_dotenv
+from database.mongo_connection import mongo_client
+from routers.history.history_compression import history_compress_record
+from routers.history.crud import db_history_get_uncompressed_records, db_history_replace_records
+from constants import DB_PMK_NAME, CLN_PLACEMENT_HISTORY, HISTORY_COMPRESSION, HISTORY_COMPRESSION_ZLIB
+
+
+# Compresses heavy fields of the history records, created before compression was used.
+# Records are processed in batches ordered by `_id`, so migration can be stopped and started again at any time.
+# Safe to run while API is working, compressed and not compressed records are both readable.
+load_dotenv('.env')
+
+
+log_dir = 'logs/'
+os.makedirs(log_dir, exist_ok=True)
+
+logger.add(
+    os.path.join(log_dir, 'history_migration.log'),
+    rotation='50 MB',
+    retention='14 days',
+    compression='zip',
+    backtrace=True,
+    diagnose=True,
+)
+
+
+async def main(batch_size: int, dry_run: bool):
+    if HISTORY_COMPRESSION_ZLIB != HISTORY_COMPRESSION:
+        logger.error(f'History compression is disabled => `HISTORY_COMPRESSION` = {HISTORY_COMPRESSION}')
+        return
+    db = mongo_client.get_client()
+    last_record_id = None
+    migrated: int = 0
+    size_before: int = 0
+    size_after: int = 0
+    while True:
+        records: list[dict] = await db_history_get_uncompressed_records(
+            last_record_id, batch_size, db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY
+        )
+        if not records:
+            break
+        last_record_id = records[-1]['_id']
+        compressed_records: list[dict] = []
+        for record in records:
+            compressed_record: dict = history_compress_record(record)
+            if compressed_record is record:
+                continue
+            compressed_records.append(compressed_record)
+            size_before += len(bson.encode(record))
+            size_after += len(bson.encode(compressed_record))
+        if compressed_records and not dry_run:
+            await db_history_replace_records(
+                compressed_records, db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY
+            )
+        migrated += len(compressed_records)
+        logger.info(
+            f'Compressed {migrated} history records | Last `ObjectId` => {last_record_id}'
+            f' | Size: {size_before} => {size_after} bytes'
+        )
+    logger.info(
+        f'History compression finished | Records: {migrated} | Size: {size_before} => {size_after} bytes'
+        f' | Dry run: {dry_run}'
+    )
+    mongo_client.close_client()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compress heavy fields of the existing history records')
+    parser.add_argument('--batch', type=int, default=200, help='Number of records replaced by a single query')
+    parser.add_argument('--dry-run', action='store_true', help='Only report sizes, without replacing records')
+    args = parser.parse_args()
+    asyncio.run(main(args.batch, args.dry_run))
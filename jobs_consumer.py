@@ -0,0 +1,78 @@
+import os
+import signal
+import asyncio
+from loguru import logger
+from dotenv import load_dotenv
+from database.mongo_connection import mongo_client
+from routers.jobs.crud import db_enqueue_job
+from routers.jobs.handlers import JOB_HANDLERS
+from routers.jobs.jobs_queue import JobsConsumerPool
+from constants import (
+    DB_PMK_NAME,
+    CLN_JOBS_QUEUE,
+    JOBS_CONSUMER_CONCURRENCY,
+    JOB_HISTORY_COMPACTION,
+    HISTORY_COMPACTION_INTERVAL,
+    JOB_ORDERS_ARCHIVE,
+    ORDERS_ARCHIVE_INTERVAL,
+)
+
+
+# Dedicated consumer of the `jobsQueue`, concurrency is set by `JOBS_CONSUMER_CONCURRENCY`
+#  and doesn't depend on the number of API workers.
+# Can be started as many times as we need, jobs are leased, so every job is processed once.
+load_dotenv('.env')
+
+
+log_dir = 'logs/'
+os.makedirs(log_dir, exist_ok=True)
+
+logger.add(
+    os.path.join(log_dir, 'jobs.log'),
+    rotation='50 MB',
+    retention='14 days',
+    compression='zip',
+    backtrace=True,
+    diagnose=True,
+)
+
+
+async def schedule_job(job_type: str, interval: float, db, stop_event: asyncio.Event):
+    # Every consumer process enqueues it, but `dedupKey` leaves only one `pending` job of the type.
+    while not stop_event.is_set():
+        try:
+            await db_enqueue_job(
+                job_type, {}, db, DB_PMK_NAME, CLN_JOBS_QUEUE, job_type, interval
+            )
+        except Exception as error:
+            logger.error(f'Failed to enqueue scheduled job of type => {job_type} | ERROR: {error}')
+        try:
+            await asyncio.wait_for(stop_event.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def main():
+    pool = JobsConsumerPool(JOB_HANDLERS, mongo_client.get_client(), JOBS_CONSUMER_CONCURRENCY)
+    loop = asyncio.get_running_loop()
+    stop_event = asyncio.Event()
+    for stop_signal in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(stop_signal, stop_event.set)
+    pool.start()
+    scheduled_jobs: dict[str, float] = {
+        JOB_HISTORY_COMPACTION: HISTORY_COMPACTION_INTERVAL,
+        JOB_ORDERS_ARCHIVE: ORDERS_ARCHIVE_INTERVAL,
+    }
+    schedule_tasks = [
+        asyncio.create_task(schedule_job(job_type, interval, mongo_client.get_client(), stop_event))
+        for job_type, interval in scheduled_jobs.items() if 0 < interval
+    ]
+    await stop_event.wait()
+    await asyncio.gather(*schedule_tasks)
+    # Running jobs are finished, before we exit.
+    await pool.stop()
+    mongo_client.close_client()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
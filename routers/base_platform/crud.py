@@ -5,6 +5,7 @@ from pymongo.errors import PyMongoError, DuplicateKeyError
 from fastapi import status, HTTPException
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorClientSession
 from utility.utilities import get_db_collection, log_db_error_record, time_w_timezone, log_db_record
+from routers.placement_changes.crud import db_update_placement_with_change
 
 
 async def platform_make_json_friendly(platform_data):
@@ -284,7 +285,6 @@ async def place_wheelstack_in_platform(
         db_collection: str,
         session: AsyncIOMotorClientSession=None,
 ):
-    collection = await get_db_collection(db, db_name, db_collection)
     query = {
         '_id': placement_id,
         f'rows.{row}.columns.{column}.wheelStack': {
@@ -298,7 +298,9 @@ async def place_wheelstack_in_platform(
         }
     }
     try:
-        result = await collection.update_one(query, update, session=session)
+        result = await db_update_placement_with_change(
+            query, update, db, db_name, db_collection, session
+        )
         return result
     except PyMongoError as error:
         logger.error(f'Error while placing `cell_data` in {db_collection}: {error}')
@@ -316,8 +318,8 @@ async def block_platform_cell(
         db: AsyncIOMotorClient,
         db_name: str,
         db_collection: str,
+        session: AsyncIOMotorClientSession = None,
 ):
-    collection = await get_db_collection(db, db_name, db_collection)
     query = {
         '_id': placement_id,
         f'rows.{row}.columns.{column}.blocked': {
@@ -331,7 +333,9 @@ async def block_platform_cell(
         }
     }
     try:
-        result = await collection.update_one(query, update)
+        result = await db_update_placement_with_change(
+            query, update, db, db_name, db_collection, session
+        )
         return result
     except PyMongoError as error:
         logger.error(f'Error while blocking `cell_data` in {db_collection}: {error}')
@@ -348,8 +352,8 @@ async def unblock_platform_cell(
         db: AsyncIOMotorClient,
         db_name: str,
         db_collection: str,
+        session: AsyncIOMotorClientSession = None,
 ):
-    collection = await get_db_collection(db, db_name, db_collection)
     query = {
         '_id': placement_id,
         f'rows.{row}.columns.{column}.blocked': {
@@ -363,7 +367,9 @@ async def unblock_platform_cell(
         }
     }
     try:
-        result = await collection.update_one(query, update)
+        result = await db_update_placement_with_change(
+            query, update, db, db_name, db_collection, session
+        )
         return result
     except PyMongoError as error:
         logger.error(f'Error while unblocking `cell` {row}|{column} in {db_collection}: {error}')
@@ -383,7 +389,6 @@ async def clear_platform_cell(
         session: AsyncIOMotorClientSession = None,
         record_change: bool = True,
 ):
-    collection = await get_db_collection(db, db_name, db_collection)
     query = {
         '_id': placement_id,
         f'rows.{row}.columns.{column}': {
@@ -400,7 +405,9 @@ async def clear_platform_cell(
     if record_change:
         update['$set']['lastChange'] = await time_w_timezone()
     try:
-        result = await collection.update_one(query, update, session=session)
+        result = await db_update_placement_with_change(
+            query, update, db, db_name, db_collection, session
+        )
         return result
     except PyMongoError as error:
         logger.error(f'Error while clearing `cell` {row}|{column} in {db_collection}: {error}')
@@ -420,14 +427,20 @@ async def db_update_platform_cell_data(
         db_collection: str,
         session: AsyncIOMotorClientSession = None,
         record_change: bool = True,
+        expected: dict | None = None,
 ):
-    collection = await get_db_collection(db, db_name, db_collection)
+    """
+    `expected` <- { key: value } of the cell, update is only applied if cell still has them.
+    Unmatched cell == `matched_count` of the result is 0.
+    """
     query = {
         '_id': platform_id,
         f'rows.{row}.columns.{col}': {
             '$exists': True,
         }
     }
+    for key, value in (expected or {}).items():
+        query[f'rows.{row}.columns.{col}.{key}'] = value
     update = {
         '$set': {
             f'rows.{row}.columns.{col}.{key}': value for key, value in new_data.items()
@@ -439,7 +452,9 @@ async def db_update_platform_cell_data(
     if record_change:
         update['$set']['lastChange'] = await time_w_timezone()
     try:
-        result = await collection.update_one(query, update, session=session)
+        result = await db_update_placement_with_change(
+            query, update, db, db_name, db_collection, session
+        )
         return result
     except PyMongoError as error:
         logger.error(f'Error while updating `cell_data` in {db_collection}: {error}')
@@ -8,6 +8,7 @@ from pymongo.errors import PyMongoError, DuplicateKeyError
 from fastapi.exceptions import HTTPException
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorClientSession
 from utility.utilities import get_db_collection, time_w_timezone, log_db_record, get_object_id, log_db_error_record
+from routers.placement_changes.crud import db_update_placement_with_change
 
 
 async def grid_make_json_friendly(grid_data: dict) -> dict:
@@ -220,7 +221,6 @@ async def place_wheelstack_in_grid(
         db_collection: str,
         session: AsyncIOMotorClientSession = None,
 ):
-    collection = await get_db_collection(db, db_name, db_collection)
     query = {
         '_id': placement_id,
         f'rows.{row}.columns.{column}.wheelStack': {
@@ -234,7 +234,9 @@ async def place_wheelstack_in_grid(
         }
     }
     try:
-        result = await collection.update_one(query, update, session=session)
+        result = await db_update_placement_with_change(
+            query, update, db, db_name, db_collection, session
+        )
         return result
     except PyMongoError as error:
         logger.error(f'Error while placing `cell_data` in {db_collection}: {error}')
@@ -251,8 +253,8 @@ async def block_grid_cell(
         db: AsyncIOMotorClient,
         db_name: str,
         db_collection: str,
+        session: AsyncIOMotorClientSession = None,
 ):
-    collection = await get_db_collection(db, db_name, db_collection)
     query = {
         '_id': placement_id,
         f'rows.{row}.columns.{column}.blocked': {
@@ -266,7 +268,9 @@ async def block_grid_cell(
         }
     }
     try:
-        result = await collection.update_one(query, update)
+        result = await db_update_placement_with_change(
+            query, update, db, db_name, db_collection, session
+        )
         return result
     except PyMongoError as error:
         logger.error(f'Error while blocking `cell_data` in {db_collection}: {error}')
@@ -283,8 +287,8 @@ async def unblock_grid_cell(
         db: AsyncIOMotorClient,
         db_name: str,
         db_collection: str,
+        session: AsyncIOMotorClientSession = None,
 ):
-    collection = await get_db_collection(db, db_name, db_collection)
     query = {
         '_id': placement_id,
         f'rows.{row}.columns.{column}.blocked': {
@@ -298,7 +302,9 @@ async def unblock_grid_cell(
         }
     }
     try:
-        result = await collection.update_one(query, update)
+        result = await db_update_placement_with_change(
+            query, update, db, db_name, db_collection, session
+        )
         return result
     except PyMongoError as error:
         logger.error(f'Error while unblocking `cell` {row}|{column} in {db_collection}: {error}')
@@ -318,7 +324,6 @@ async def clear_grid_cell(
         session: AsyncIOMotorClientSession = None,
         record_change: bool = True,
 ):
-    collection = await get_db_collection(db, db_name, db_collection)
     query = {
         '_id': placement_id,
         f'rows.{row}.columns.{column}': {
@@ -335,7 +340,9 @@ async def clear_grid_cell(
     if record_change:
         update['$set']['lastChange'] = await time_w_timezone()
     try:
-        result = await collection.update_one(query, update, session=session)
+        result = await db_update_placement_with_change(
+            query, update, db, db_name, db_collection, session
+        )
         return result
     except PyMongoError as error:
         logger.error(f'Error while clearing `cell` {row}|{column} in {db_collection}: {error}')
@@ -390,14 +397,20 @@ async def db_update_grid_cell_data(
         db_collection: str,
         session: AsyncIOMotorClientSession = None,
         record_change: bool = True,
+        expected: dict | None = None,
 ):
-    collection = await get_db_collection(db, db_name, db_collection)
+    """
+    `expected` <- { key: value } of the cell, update is only applied if cell still has them.
+    Unmatched cell == `matched_count` of the result is 0.
+    """
     query = {
         '_id': grid_id,
         f'rows.{row}.columns.{col}': {
             '$exists': True,
         }
     }
+    for key, value in (expected or {}).items():
+        query[f'rows.{row}.columns.{col}.{key}'] = value
     update = {
         '$set': {
             f'rows.{row}.columns.{col}.{key}': value for key, value in new_data.items()
@@ -411,7 +424,9 @@ async def db_update_grid_cell_data(
     max_retries = 3
     for attempt in range(max_retries):
         try:
-            result = await collection.update_one(query, update, session=session)
+            result = await db_update_placement_with_change(
+                query, update, db, db_name, db_collection, session
+            )
             return result
         except PyMongoError as error:
             if error.has_error_label('TransientTransactionError'):
@@ -465,7 +480,6 @@ async def db_update_extra_cell_data(
         session: AsyncIOMotorClientSession = None,
         record_change: bool = True,
 ):
-    collection = await get_db_collection(db, db_name, db_collection)
     query = {
         '_id': grid_id,
         f'extra.{extra_element_name}': {
@@ -480,7 +494,9 @@ async def db_update_extra_cell_data(
     if record_change:
         update['$set']['lastChange'] = await time_w_timezone()
     try:
-        result = await collection.update_one(query, update, session=session)
+        result = await db_update_placement_with_change(
+            query, update, db, db_name, db_collection, session
+        )
         return result
     except PyMongoError as error:
         logger.error(f'Error while updating extra `cell_data` in {db_collection}: {error}')
@@ -500,7 +516,6 @@ async def db_append_extra_cell_order(
         session: AsyncIOMotorClientSession = None,
         record_change: bool = True,
 ):
-    collection = await get_db_collection(db, db_name, db_collection)
     query = {
         '_id': grid_id,
         f'extra.{extra_element_name}': {
@@ -515,7 +530,9 @@ async def db_append_extra_cell_order(
     if  record_change:
         update['$set']['lastChange'] = await time_w_timezone()
     try:
-        result = await collection.update_one(query, update, session=session)
+        result = await db_update_placement_with_change(
+            query, update, db, db_name, db_collection, session
+        )
         return result
     except PyMongoError as error:
         logger.error(f'Error while appending new order to the extra element = {extra_element_name}'
@@ -536,7 +553,6 @@ async def db_append_extra_cell_orders(
         session: AsyncIOMotorClientSession = None,
         record_change: bool = True,
 ):
-    collection = await get_db_collection(db, db_name, db_collection)
     query = {
         '_id': grid_id,
         f'extra.{extra_element_name}': {
@@ -551,7 +567,9 @@ async def db_append_extra_cell_orders(
     if record_change:
         update['$set']['lastChange'] = await time_w_timezone()
     try:
-        result = await collection.update_one(query, update, session=session)
+        result = await db_update_placement_with_change(
+            query, update, db, db_name, db_collection, session
+        )
         return result
     except PyMongoError as error:
         logger.error(f'Error while appending new orders to the extra element = {extra_element_name}'
@@ -571,7 +589,6 @@ async def db_update_grid_cells_data(
         session: AsyncIOMotorClientSession = None,
         record_change: bool = True,
 ):
-    collection = await get_db_collection(db, db_name, db_collection)
     query = {
         '_id': grid_id,
     }
@@ -585,7 +602,9 @@ async def db_update_grid_cells_data(
     if record_change:
         update['$set']['lastChange'] = await time_w_timezone()
     try:
-        result = await collection.update_one(query, update, session=session)
+        result = await db_update_placement_with_change(
+            query, update, db, db_name, db_collection, session
+        )
         return result
     except PyMongoError as error:
         logger.error(f'Error while updating multiple cells data in the grid {grid_id} = {error}')
@@ -605,7 +624,6 @@ async def db_delete_extra_cell_order(
         session: AsyncIOMotorClientSession = None,
         record_change: bool = True
 ):
-    collection = await get_db_collection(db, db_name, db_collection)
     query = {
         '_id': grid_id,
         f'extra.{extra_element_name}.orders.{str(order_object_id)}': {
@@ -622,7 +640,9 @@ async def db_delete_extra_cell_order(
             'lastChange': await time_w_timezone()
         }
     try:
-        result = await collection.update_one(query, update, session=session)
+        result = await db_update_placement_with_change(
+            query, update, db, db_name, db_collection, session
+        )
         return result
     except PyMongoError as error:
         logger.error(f'Error while updating extra `cell_data` in {db_collection}: {error}')
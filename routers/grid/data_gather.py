@@ -1,14 +1,15 @@
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 from motor.motor_asyncio import AsyncIOMotorClient
-from constants import DB_PMK_NAME, CLN_WHEELSTACKS
-from routers.wheelstacks.crud import db_find_wheelstack_by_object_id
+from bson import ObjectId
+from utility.batch_loader import DataLoaders
 
 
 async def placement_gather_wheelstacks(
-        placement_state: dict, db: AsyncIOMotorClient
+        placement_state: dict, db: AsyncIOMotorClient, loaders: DataLoaders | None = None
 ):
-    wheelstacks_data: dict = {}
+    loaders = loaders or DataLoaders(db)
+    wheelstacks_ids: list[ObjectId] = []
     rows = placement_state['rows']
     for row in rows:
         for col in rows[row]['columns']:
@@ -16,10 +17,13 @@ async def placement_gather_wheelstacks(
             wheelstack_id = cell_data['wheelStack']
             if wheelstack_id is None:
                 continue
-            wheelstack_data = await db_find_wheelstack_by_object_id(
-                wheelstack_id, db, DB_PMK_NAME, CLN_WHEELSTACKS
-            )
-            wheelstacks_data[str(wheelstack_data['_id'])] = wheelstack_data
+            wheelstacks_ids.append(wheelstack_id)
+    # Single `$in` query, instead of query per cell.
+    wheelstacks_result = await loaders.wheelstacks.load_many(wheelstacks_ids)
+    wheelstacks_data: dict = {
+        str(wheelstack_data['_id']): wheelstack_data
+        for wheelstack_data in wheelstacks_result if wheelstack_data is not None
+    }
     return wheelstacks_data
 
 
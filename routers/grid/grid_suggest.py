@@ -0,0 +1,250 @@
+import time
+import asyncio
+from bson import ObjectId
+from loguru import logger
+from collections import deque
+from motor.motor_asyncio import AsyncIOMotorClient
+from utility.batch_loader import DataLoaders
+from routers.wheelstacks.crud import db_get_placement_snapshot
+from routers.placement_changes.crud import db_get_placement_changes
+from constants import (
+    DB_PMK_NAME,
+    CLN_GRID,
+    PT_GRID,
+    GRID_SUGGEST_REFRESH,
+)
+
+
+# Every worker keeps its own index of the `grid` cells: which are free, and which `batchNumber` is placed in others.
+# Index is built from a single snapshot, and replays `placementChanges` journal after it,
+#  so we only read the whole `grid` again when the journal can't be replayed.
+# Suggestions are ranked once per `batchNumber` and `version`, and reused until the next change.
+
+Cell = tuple[str, str]
+
+
+class GridCellsIndex:
+    """
+    In-process index of the `grid` cells, kept up to date with `placementChanges` journal.
+    """
+
+    def __init__(self, grid_id: ObjectId):
+        self.grid_id: ObjectId = grid_id
+        # -1 == never loaded.
+        self.version: int = -1
+        self.checked_at: float = 0
+        self.lock = asyncio.Lock()
+        self.rows_order: list[str] = []
+        self.columns_order: dict[str, list[str]] = {}
+        self.positions: dict[Cell, tuple[int, int]] = {}
+        self.cells: dict[Cell, dict] = {}
+        self.free: set[Cell] = set()
+        self.wheelstack_batches: dict[ObjectId, str | None] = {}
+        self.batch_cells: dict[str, set[Cell]] = {}
+        # { batchNumber: ranked free cells } <- cleared on every change.
+        self.ranked: dict[str | None, list[dict]] = {}
+
+    def load(self, grid_data: dict, wheelstacks_data: dict) -> None:
+        self.version = grid_data.get('version', 0)
+        self.rows_order = list(grid_data['rowsOrder'])
+        self.columns_order = {}
+        self.positions = {}
+        self.cells = {}
+        self.free = set()
+        self.batch_cells = {}
+        self.ranked = {}
+        self.wheelstack_batches = {
+            ObjectId(wheelstack_id): wheelstack_data.get('batchNumber')
+            for wheelstack_id, wheelstack_data in wheelstacks_data.items()
+        }
+        for row_index, row in enumerate(self.rows_order):
+            row_data: dict = grid_data['rows'][row]
+            self.columns_order[row] = list(row_data['columnsOrder'])
+            for column_index, column in enumerate(self.columns_order[row]):
+                self.positions[(row, column)] = (row_index, column_index)
+                self.set_cell((row, column), row_data['columns'][column])
+
+    def set_cell(self, cell: Cell, cell_data: dict) -> None:
+        previous: dict | None = self.cells.get(cell)
+        if previous is not None and previous.get('wheelStack') is not None:
+            previous_batch: str | None = self.wheelstack_batches.get(previous['wheelStack'])
+            if previous_batch in self.batch_cells:
+                self.batch_cells[previous_batch].discard(cell)
+        cell_data = {
+            'wheelStack': cell_data.get('wheelStack'),
+            'blocked': cell_data.get('blocked', False),
+            'blockedBy': cell_data.get('blockedBy'),
+        }
+        self.cells[cell] = cell_data
+        if cell_data['wheelStack'] is None and not cell_data['blocked'] and cell_data['blockedBy'] is None:
+            self.free.add(cell)
+        else:
+            self.free.discard(cell)
+        if cell_data['wheelStack'] is not None:
+            batch_number: str | None = self.wheelstack_batches.get(cell_data['wheelStack'])
+            if batch_number is not None:
+                self.batch_cells.setdefault(batch_number, set()).add(cell)
+
+    def apply_changes(self, journal_records: list[dict]) -> set[ObjectId] | None:
+        """
+        Replays journaled changes of the cells.
+        Returns `wheelstack`s without known `batchNumber`, or `None` if changes can't be replayed.
+        """
+        unknown_wheelstacks: set[ObjectId] = set()
+        for record in journal_records:
+            for change in record['changes']:
+                path: list[str] = change['path'].split('.')
+                if 'rows' != path[0]:
+                    continue
+                # Whole rows are only changed with a new layout of the `grid`.
+                if 4 > len(path) or 'columns' != path[2] or 'set' != change['op']:
+                    return None
+                cell: Cell = (path[1], path[3])
+                if cell not in self.cells:
+                    return None
+                if 4 == len(path):
+                    cell_data: dict = change['value']
+                else:
+                    cell_data = dict(self.cells[cell])
+                    cell_data[path[4]] = change['value']
+                wheelstack_id: ObjectId | None = cell_data.get('wheelStack')
+                if wheelstack_id is not None and wheelstack_id not in self.wheelstack_batches:
+                    unknown_wheelstacks.add(wheelstack_id)
+                self.set_cell(cell, cell_data)
+            self.version = record['version']
+        self.ranked = {}
+        return unknown_wheelstacks
+
+    def set_batches(self, wheelstacks_batches: dict[ObjectId, str | None]) -> None:
+        self.wheelstack_batches.update(wheelstacks_batches)
+        for cell, cell_data in self.cells.items():
+            if cell_data['wheelStack'] in wheelstacks_batches:
+                self.set_cell(cell, cell_data)
+        self.ranked = {}
+
+    def neighbours(self, cell: Cell) -> list[Cell]:
+        row, column = cell
+        row_index, column_index = self.positions[cell]
+        row_columns: list[str] = self.columns_order[row]
+        cells: list[Cell] = []
+        if 0 < column_index:
+            cells.append((row, row_columns[column_index - 1]))
+        if column_index + 1 < len(row_columns):
+            cells.append((row, row_columns[column_index + 1]))
+        for near_row_index in (row_index - 1, row_index + 1):
+            if 0 <= near_row_index < len(self.rows_order):
+                near_cell: Cell = (self.rows_order[near_row_index], column)
+                if near_cell in self.positions:
+                    cells.append(near_cell)
+        return cells
+
+    def rank(self, batch_number: str | None) -> list[dict]:
+        """
+        Free cells ordered by number of adjacent cells with the same `batchNumber`,
+         distance to the closest cell of this `batchNumber`, and position in the `grid`.
+        """
+        batch_cells: set[Cell] = self.batch_cells.get(batch_number, set()) if batch_number else set()
+        distances: dict[Cell, int] = {cell: 0 for cell in batch_cells}
+        queue: deque[Cell] = deque(batch_cells)
+        while queue:
+            cell = queue.popleft()
+            for near_cell in self.neighbours(cell):
+                if near_cell not in distances:
+                    distances[near_cell] = distances[cell] + 1
+                    queue.append(near_cell)
+        ranked: list[dict] = []
+        for cell in self.free:
+            adjacent: int = sum(1 for near_cell in self.neighbours(cell) if near_cell in batch_cells)
+            ranked.append({
+                'row': cell[0],
+                'column': cell[1],
+                'adjacentSameBatch': adjacent,
+                'distance': distances.get(cell),
+            })
+        infinite: int = len(self.positions) + 1
+        ranked.sort(key=lambda cell_rank: (
+            -cell_rank['adjacentSameBatch'],
+            infinite if cell_rank['distance'] is None else cell_rank['distance'],
+            self.positions[(cell_rank['row'], cell_rank['column'])],
+        ))
+        return ranked
+
+    def suggest(self, batch_number: str | None, count: int) -> list[dict]:
+        if batch_number not in self.ranked:
+            self.ranked[batch_number] = self.rank(batch_number)
+        return self.ranked[batch_number][:count]
+
+    async def rebuild(self, db: AsyncIOMotorClient) -> bool:
+        grid_data: dict | None = await db_get_placement_snapshot(
+            self.grid_id, PT_GRID, db, DB_PMK_NAME, CLN_GRID, [], True, False, ['batchNumber']
+        )
+        if grid_data is None:
+            return False
+        self.load(grid_data, grid_data.get('wheelstacksData', {}))
+        return True
+
+    async def refresh(self, db: AsyncIOMotorClient) -> bool:
+        """
+        Brings index to the latest journaled `version` of the `grid`.
+        Returns `False` if `grid` not found.
+        """
+        if time.monotonic() - self.checked_at < GRID_SUGGEST_REFRESH:
+            return True
+        async with self.lock:
+            # Already refreshed by the concurrent request.
+            if time.monotonic() - self.checked_at < GRID_SUGGEST_REFRESH:
+                return True
+            if 0 > self.version:
+                found: bool = await self.rebuild(db)
+            else:
+                found = await self.catch_up(db)
+            if found:
+                self.checked_at = time.monotonic()
+            return found
+
+    async def catch_up(self, db: AsyncIOMotorClient) -> bool:
+        changes_data: dict | None = await db_get_placement_changes(
+            self.grid_id, self.version, db, DB_PMK_NAME, CLN_GRID
+        )
+        if changes_data is None:
+            return False
+        if changes_data['snapshotRequired']:
+            return await self.rebuild(db)
+        unknown_wheelstacks: set[ObjectId] | None = self.apply_changes(changes_data['changes'])
+        if unknown_wheelstacks is None:
+            logger.info(f'Changes of the `grid` => {self.grid_id} cant be replayed, rebuilding cells index')
+            return await self.rebuild(db)
+        if unknown_wheelstacks:
+            loaders = DataLoaders(db)
+            wheelstacks_data: list[dict | None] = await loaders.wheelstacks.load_many(list(unknown_wheelstacks))
+            self.set_batches({
+                wheelstack_id: wheelstack_data.get('batchNumber') if wheelstack_data else None
+                for wheelstack_id, wheelstack_data in zip(unknown_wheelstacks, wheelstacks_data)
+            })
+        return True
+
+
+grid_cells_indexes: dict[ObjectId, GridCellsIndex] = {}
+
+
+async def grid_suggest_cells(
+        grid_id: ObjectId,
+        batch_number: str | None,
+        count: int,
+        db: AsyncIOMotorClient,
+) -> dict | None:
+    """
+    Ranked free and unblocked cells of the `grid`, for placement of the `wheelstack` with `batch_number`.
+    Returns `None` if `grid` not found.
+    """
+    cells_index: GridCellsIndex = grid_cells_indexes.setdefault(grid_id, GridCellsIndex(grid_id))
+    if not await cells_index.refresh(db):
+        grid_cells_indexes.pop(grid_id, None)
+        return None
+    return {
+        'gridId': grid_id,
+        'version': cells_index.version,
+        'batchNumber': batch_number,
+        'freeCells': len(cells_index.free),
+        'cells': cells_index.suggest(batch_number, count),
+    }
@@ -6,13 +6,14 @@ from routers.presets.crud import get_preset_by_id
 from motor.motor_asyncio import AsyncIOMotorClient
 from database.mongo_connection import mongo_client
 from fastapi.responses import JSONResponse, Response
-from routers.wheels.crud import db_find_many_wheels_by_id
 from ..wheelstacks.crud import db_find_wheelstack_by_object_id
 from auth.jwt_validation import get_role_verification_dependency
 from routers.base_platform.crud import get_platform_by_name
-from routers.wheelstacks.crud import db_history_get_placement_wheelstacks
+from routers.wheelstacks.crud import db_get_placement_snapshot
+from routers.placement_changes.crud import db_get_placement_changes
 from fastapi import APIRouter, Depends, HTTPException, status, Path, Query, Body
-from .data_gather import placement_gather_wheelstacks, convert_and_store_threadpool
+from .data_gather import placement_gather_wheelstacks
+from .grid_suggest import grid_suggest_cells
 from utility.utilities import (
     get_object_id,
     convert_object_id_and_datetime_to_str,
@@ -40,11 +41,12 @@ from constants import (
     CLN_PRESETS,
     PRES_TYPE_GRID,
     CLN_WHEELSTACKS,
-    CLN_WHEELS,
     ADMIN_ACCESS_ROLES,
     BASIC_PAGE_VIEW_ROLES,
     CLN_BASE_PLATFORM,
     PT_GRID,
+    GRID_SUGGEST_COUNT_DEFAULT,
+    GRID_SUGGEST_COUNT_MAX,
 )
 
 router = APIRouter()
@@ -106,62 +108,96 @@ async def route_get_grid_by_object_id(
                                          description='Include all of the `wheelstack`s current data'),
         includeWheels: bool = Query(False,
                                     description='Include all of the `wheel`s current data'),
+        wheelstackFields: list[str] = Query(None,
+                                            description='Only return these fields of the `wheelstack`s'),
+        wheelFields: list[str] = Query(None,
+                                       description='Only return these fields of the `wheel`s'),
         db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
         token_data: dict = get_role_verification_dependency(BASIC_PAGE_VIEW_ROLES),
 ):
     grid_id: ObjectId = await get_object_id(grid_object_id)
-    grid_task = get_grid_by_object_id(grid_id, db, DB_PMK_NAME, CLN_GRID)
-    wheelstacks_task = []
-    wheelstacks_data = []
-    wheels_data = []
-
-    # Fetch wheelstacks if requested
-    if includeWheelstacks:
-        wheelstacks_task = db_history_get_placement_wheelstacks(
-            grid_id, PT_GRID, db, DB_PMK_NAME, CLN_WHEELSTACKS, [PT_GRID], True
+    # `grid`, `wheelstack`s and `wheel`s in a single round trip.
+    grid_res = await db_get_placement_snapshot(
+        grid_id, PT_GRID, db, DB_PMK_NAME, CLN_GRID, [],
+        includeWheelstacks, includeWheelstacks and includeWheels, wheelstackFields, wheelFields
+    )
+    if grid_res is None:
+        raise HTTPException(
+            detail=f'`grid` with `objectId` = {grid_object_id} not Found',
+            status_code=status.HTTP_404_NOT_FOUND,
         )
+    grid_res.setdefault('wheelstacksData', {})
+    cor_res = await async_convert_object_id_and_datetime_to_str(grid_res)
+    return JSONResponse(content=cor_res, status_code=status.HTTP_200_OK)
 
-    # Fetch grid and wheelstacks concurrently if needed
-    if wheelstacks_task:
-        grid_res, wheelstacks_data = await asyncio.gather(grid_task, wheelstacks_task)
-    else:
-        grid_res = await grid_task
 
-    # Check if grid was found
-    if grid_res is None:
+@router.get(
+    path='/{grid_object_id}/changes',
+    description='Get all changes of the `grid` made after provided `version`.'
+                ' If changes are no longer stored, `snapshot` with current `grid` state is returned instead',
+    response_class=JSONResponse,
+    name='Get Grid Changes',
+)
+async def route_get_grid_changes(
+        grid_object_id: str = Path(..., description='`objectId` of stored `grid`'),
+        since: int = Query(...,
+                           description='Last `version` of the `grid` known to the client'),
+        db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
+        token_data: dict = get_role_verification_dependency(BASIC_PAGE_VIEW_ROLES),
+):
+    grid_id: ObjectId = await get_object_id(grid_object_id)
+    changes_data = await db_get_placement_changes(
+        grid_id, since, db, DB_PMK_NAME, CLN_GRID
+    )
+    if changes_data is None:
         raise HTTPException(
             detail=f'`grid` with `objectId` = {grid_object_id} not Found',
             status_code=status.HTTP_404_NOT_FOUND,
         )
+    changes_data['snapshot'] = None
+    if changes_data['snapshotRequired']:
+        grid_res = await get_grid_by_object_id(grid_id, db, DB_PMK_NAME, CLN_GRID)
+        if grid_res is None:
+            raise HTTPException(
+                detail=f'`grid` with `objectId` = {grid_object_id} not Found',
+                status_code=status.HTTP_404_NOT_FOUND,
+            )
+        changes_data['version'] = grid_res.get('version', 0)
+        changes_data['snapshot'] = grid_res
+    cor_res = await async_convert_object_id_and_datetime_to_str(changes_data)
+    return JSONResponse(content=cor_res, status_code=status.HTTP_200_OK)
 
-    # Fetch wheels data if requested
-    grid_wheels: list[ObjectId] = []
-    conversion_tasks = []
-    wheels_conversion_task = None
-    if wheelstacks_data is not None:
-        wheelstacks_conversion_task = convert_and_store_threadpool(wheelstacks_data)
-        conversion_tasks.append(wheelstacks_conversion_task)
-
-    if includeWheels:
-        for wheelstack in wheelstacks_data:
-            grid_wheels.extend(wheelstack['wheels'])
-        if grid_wheels:
-            wheels_data: list[dict] = await db_find_many_wheels_by_id(
-                grid_wheels, db, DB_PMK_NAME, CLN_WHEELS
-            )    
-            wheels_conversion_task = convert_and_store_threadpool(wheels_data)
-            conversion_tasks.append(wheels_conversion_task)
-    
-    if conversion_tasks:
-        converted_results = await asyncio.gather(*conversion_tasks)
-        if wheelstacks_data is not None:
-            grid_res['wheelstacksData'] = converted_results[0]
-        if wheels_conversion_task:
-            wheels_res = converted_results[-1]
-            grid_res['wheelsData'] = wheels_res
 
-    cor_res = await async_convert_object_id_and_datetime_to_str(grid_res)
-    return JSONResponse(content=cor_res, status_code=status.HTTP_200_OK)
+@router.get(
+    path='/{grid_object_id}/suggest',
+    description='Get ranked free and unblocked cells of the `grid`, to place a `wheelstack` of the `batchNumber`.'
+                ' Cells adjacent to the same `batchNumber` go first, then the closest ones to it, then by `grid` order.'
+                ' Without `batchNumber` cells are only ordered by `grid` order',
+    response_class=JSONResponse,
+    name='Suggest Grid Cells',
+)
+async def route_get_grid_suggest(
+        grid_object_id: str = Path(..., description='`objectId` of stored `grid`'),
+        batchNumber: str = Query(None,
+                                 description='`batchNumber` of the `wheelstack` to place'),
+        count: int = Query(GRID_SUGGEST_COUNT_DEFAULT,
+                           ge=1,
+                           le=GRID_SUGGEST_COUNT_MAX,
+                           description='Max number of suggested cells'),
+        db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
+        token_data: dict = get_role_verification_dependency(BASIC_PAGE_VIEW_ROLES),
+):
+    grid_id: ObjectId = await get_object_id(grid_object_id)
+    suggest_data = await grid_suggest_cells(grid_id, batchNumber, count, db)
+    if suggest_data is None:
+        raise HTTPException(
+            detail=f'`grid` with `objectId` = {grid_object_id} not Found',
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+    return JSONResponse(
+        content=convert_object_id_and_datetime_to_str(suggest_data),
+        status_code=status.HTTP_200_OK,
+    )
 
 
 @router.get(
@@ -1,10 +1,17 @@
 from bson import ObjectId
 from loguru import logger
 from datetime import datetime
-from pymongo.errors import PyMongoError
+from pymongo import ReplaceOne
+from pymongo.errors import PyMongoError, ExecutionTimeout
 from fastapi import HTTPException, status
 from motor.motor_asyncio import AsyncIOMotorClient
 from utility.utilities import log_db_record, get_db_collection, log_db_error_record
+from constants import HISTORY_RECORD_DELTA, HISTORY_COUNT_MAX_TIME_MS
+from routers.history.history_compression import (
+    history_compress_record,
+    history_decompress_record,
+    history_decompress_records,
+)
 
 
 async def db_history_get_placement_data(
@@ -52,7 +59,7 @@ async def db_history_create_record(
         f'Attempt to create `historyRecord` for `placementId` => {placement_id} of type => {placement_type}' + db_info
     )
     try:
-        result = await collection.insert_one(placement_data)
+        result = await collection.insert_one(history_compress_record(placement_data))
         logger.info(
             f'Successfully created `historyRecord` for `placementId` => {placement_id}'
             f' of type {placement_type}' + db_info
@@ -70,42 +77,80 @@ async def db_history_create_record(
         )
 
 
+def history_records_query(
+        period_start: datetime | None,
+        period_end: datetime | None,
+        placement_id: ObjectId | None,
+        placement_type: str | None,
+) -> dict:
+    query: dict = {}
+    if period_start or period_end:
+        query['createdAt'] = {}
+        if period_start:
+            query['createdAt']['$gte'] = period_start
+        if period_end:
+            query['createdAt']['$lte'] = period_end
+    if placement_id:
+        query['placementData._id'] = placement_id
+    if placement_type:
+        query['placementType'] = placement_type
+    return query
+
+
 async def db_history_get_records(
         include_data: bool,
-        period_start: datetime,
-        period_end: datetime,
+        period_start: datetime | None,
+        period_end: datetime | None,
         db: AsyncIOMotorClient,
         db_name: str,
         db_collection: str,
         placement_id: ObjectId | None = None,
         placement_type: str | None = None,
+        after: tuple[datetime, ObjectId] | None = None,
+        limit: int = 0,
 ):
+    """
+    Gathers records ordered by (`createdAt`, `_id`).
+    `after` == (`createdAt`, `_id`) of the last record from the previous page, only records after it are returned.
+    `limit` == 0 => every record.
+    """
     collection = await get_db_collection(db, db_name, db_collection)
     db_info = await log_db_record(db_name, db_collection)
-    query = {
-        'createdAt': {
-            '$gte': period_start,
-            '$lte': period_end,
-        }
-    }
+    query = history_records_query(period_start, period_end, placement_id, placement_type)
     projection = {}
     log_str: str = f'Attempt to gather all `historyRecord`s in period: {period_start} => {period_end}'
     if placement_id:
         log_str += f'| For the `placementId` => {placement_id}'
-        query['placementData._id'] = placement_id
     if placement_type:
         log_str += f' of type => {placement_type}'
-        query['placementType'] = placement_type
+    if after:
+        log_str += f'| After => {after}'
+        after_created_at, after_id = after
+        query = {
+            '$and': [
+                query,
+                {'$or': [
+                    {'createdAt': {'$gt': after_created_at}},
+                    {'createdAt': after_created_at, '_id': {'$gt': after_id}},
+                ]},
+            ]
+        }
     if not include_data:
         projection = {
             '_id': 1,
             'createdAt': 1,
             'placementType': 1,
+            'placementData._id': 1,
+            'recordType': 1,
         }
-    log_str += f'| Record data included: {include_data}'
+    log_str += f'| Record data included: {include_data} | Limit: {limit}'
     logger.info(log_str + db_info)
     try:
-        result = await collection.find(query, projection).to_list(length=None)
+        result = history_decompress_records(
+            await collection.find(query, projection).sort(
+                [('createdAt', 1), ('_id', 1)]
+            ).limit(limit).to_list(length=None)
+        )
         log_str = f'Successfully gathered `historyRecord`s data if period: {period_start} => {period_end}'
         if placement_id:
             log_str += f'| For the `placementId` => {placement_id}'
@@ -129,6 +174,44 @@ async def db_history_get_records(
         )
 
 
+async def db_history_count_records(
+        period_start: datetime | None,
+        period_end: datetime | None,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+        placement_id: ObjectId | None = None,
+        placement_type: str | None = None,
+) -> tuple[int, bool]:
+    """
+    Returns (count, exact) of the records matching filters.
+    Without filters, count is taken from collection metadata.
+    If counting takes longer than `HISTORY_COUNT_MAX_TIME_MS`, count of the whole collection is returned.
+    """
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    query = history_records_query(period_start, period_end, placement_id, placement_type)
+    try:
+        if not query:
+            return await collection.estimated_document_count(), False
+        try:
+            return await collection.count_documents(query, maxTimeMS=HISTORY_COUNT_MAX_TIME_MS), True
+        except ExecutionTimeout:
+            logger.warning(
+                f'Counting `historyRecord`s exceeded {HISTORY_COUNT_MAX_TIME_MS}ms | Query: {query}' + db_info
+            )
+            return await collection.estimated_document_count(), False
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while counting `historyRecord`s | Query: {query}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while counting `historyRecord`s',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
 async def db_history_get_record(
         include_data: bool,
         record_id: ObjectId,
@@ -151,7 +234,7 @@ async def db_history_get_record(
     log_str: str = f'Attempt to gather `historyRecord` data => {record_id} | With data included = {include_data}'
     logger.info(log_str + db_info)
     try:
-        result = await collection.find_one(query, projection)
+        result = history_decompress_record(await collection.find_one(query, projection))
         logger.info(f'Successfully gathered `historyRecord` data => {record_id}')
         return result
     except PyMongoError as error:
@@ -162,3 +245,306 @@ async def db_history_get_record(
             detail='Error while gathering `historyRecord` data',
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
+
+
+async def db_history_get_chain_records(
+        keyframe_id: ObjectId,
+        chain_index: int | None,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+):
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    # `None` == whole chain.
+    query: dict = {
+        'keyframeId': keyframe_id,
+    }
+    if chain_index is not None:
+        query['chainIndex'] = {
+            '$lte': chain_index,
+        }
+    logger.info(
+        f'Attempt to gather `historyRecord`s chain of the `keyframeId` => {keyframe_id}'
+        f' up to `chainIndex` => {chain_index}' + db_info
+    )
+    try:
+        result = history_decompress_records(
+            await collection.find(query).sort('chainIndex', 1).to_list(length=None)
+        )
+        logger.info(
+            f'Successfully gathered `historyRecord`s chain of the `keyframeId` => {keyframe_id}'
+            f' up to `chainIndex` => {chain_index}' + db_info
+        )
+        return result
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while gathering `historyRecord`s chain of the `keyframeId` => {keyframe_id}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while gathering `historyRecord` data',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_history_get_record_at(
+        placement_id: ObjectId,
+        record_time: datetime,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+):
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    # Latest record created before|at `record_time`, covered by `placementId_createdAt_index`.
+    query = {
+        'placementData._id': placement_id,
+        'createdAt': {
+            '$lte': record_time,
+        },
+    }
+    logger.info(
+        f'Attempt to gather `historyRecord` of the `placementId` => {placement_id} at => {record_time}' + db_info
+    )
+    try:
+        result = history_decompress_record(
+            await collection.find_one(query, sort=[('createdAt', -1), ('_id', -1)])
+        )
+        logger.info(
+            f'Successfully gathered `historyRecord` of the `placementId` => {placement_id} at => {record_time}' + db_info
+        )
+        return result
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while gathering `historyRecord` of the `placementId` => {placement_id}'
+            f' at => {record_time}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while gathering `historyRecord` data',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_history_get_records_by_id(
+        record_ids: list[ObjectId],
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+):
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    query = {
+        '_id': {
+            '$in': record_ids,
+        },
+    }
+    try:
+        return history_decompress_records(
+            await collection.find(query).to_list(length=None)
+        )
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while gathering `historyRecord`s => {record_ids}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while gathering `historyRecord` data',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_history_get_placements_before(
+        period_end: datetime,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+) -> list[ObjectId]:
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    try:
+        return await collection.distinct(
+            'placementData._id', {'createdAt': {'$lt': period_end}}
+        )
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while gathering placements with `historyRecord`s before => {period_end}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while gathering `historyRecord` data',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_history_get_records_summary(
+        placement_id: ObjectId,
+        period_end: datetime,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+) -> list[dict]:
+    """
+    Gathers only basic data of the placement records created before `period_end`, with size of every record.
+    """
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    pipeline = [
+        {'$match': {
+            'placementData._id': placement_id,
+            'createdAt': {'$lt': period_end},
+        }},
+        {'$sort': {'createdAt': 1, '_id': 1}},
+        {'$project': {
+            '_id': 1,
+            'createdAt': 1,
+            'recordType': 1,
+            'keyframeId': 1,
+            'size': {'$bsonSize': '$$ROOT'},
+        }},
+    ]
+    try:
+        return await collection.aggregate(pipeline).to_list(length=None)
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while gathering `historyRecord`s summary of the `placementId` => {placement_id}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while gathering `historyRecord` data',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_history_chain_created_after(
+        keyframe_id: ObjectId,
+        period_start: datetime,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+) -> bool:
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    query = {
+        'keyframeId': keyframe_id,
+        'createdAt': {'$gte': period_start},
+    }
+    try:
+        return await collection.find_one(query, {'_id': 1}) is not None
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while checking `historyRecord`s chain of the `keyframeId` => {keyframe_id}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while gathering `historyRecord` data',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_history_replace_records(
+        records: list[dict],
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+):
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    operations = [
+        ReplaceOne({'_id': record['_id']}, history_compress_record(record)) for record in records
+    ]
+    try:
+        return await collection.bulk_write(operations, ordered=True)
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while replacing {len(records)} `historyRecord`s' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while updating `historyRecord`s',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_history_delete_records(
+        record_ids: list[ObjectId],
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+):
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    logger.info(
+        f'Attempt to delete {len(record_ids)} `historyRecord`s' + db_info
+    )
+    try:
+        return await collection.delete_many({'_id': {'$in': record_ids}})
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while deleting {len(record_ids)} `historyRecord`s' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while deleting `historyRecord`s',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_history_get_storage_stats(
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+) -> dict:
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    try:
+        result = await collection.aggregate([{'$collStats': {'storageStats': {}}}]).to_list(length=1)
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while gathering storage stats' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while gathering storage stats',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+    storage_stats: dict = result[0]['storageStats'] if result else {}
+    return {
+        'count': storage_stats.get('count', 0),
+        'size': storage_stats.get('size', 0),
+        'storageSize': storage_stats.get('storageSize', 0),
+        'freeStorageSize': storage_stats.get('freeStorageSize', 0),
+        'totalIndexSize': storage_stats.get('totalIndexSize', 0),
+    }
+
+
+async def db_history_get_uncompressed_records(
+        last_record_id: ObjectId | None,
+        batch_size: int,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+) -> list[dict]:
+    """
+    Gathers next `batch_size` full records, stored without compression, ordered by `_id`.
+    """
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    query: dict = {
+        'compressedData': {'$exists': False},
+        'recordType': {'$ne': HISTORY_RECORD_DELTA},
+    }
+    if last_record_id is not None:
+        query['_id'] = {'$gt': last_record_id}
+    try:
+        return await collection.find(query).sort('_id', 1).limit(batch_size).to_list(length=None)
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while gathering not compressed `historyRecord`s after => {last_record_id}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while gathering `historyRecord` data',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
@@ -1,89 +1,97 @@
+import asyncio
 from bson import ObjectId
 from loguru import logger
 from datetime import datetime
 from fastapi import HTTPException, status
 from utility.utilities import time_w_timezone
+from utility.batch_loader import DataLoaders
 from motor.motor_asyncio import AsyncIOMotorClient
-from routers.wheels.crud import db_find_wheel_by_object_id
-from routers.batch_numbers.crud import db_find_batch_number
 from routers.orders.crud import db_history_get_orders_by_placement
 from routers.history.crud import db_history_get_placement_data, db_history_create_record
-from routers.wheelstacks.crud import db_history_get_placement_wheelstacks, db_find_wheelstack_by_object_id
+from routers.history.history_deltas import (
+    history_build_record,
+    history_store_last_state,
+    history_drop_last_state,
+)
+from routers.jobs.crud import db_enqueue_job
+from routers.occupancy.occupancy import placement_occupancy
+from routers.occupancy.crud import db_insert_occupancy_sample
+from routers.history.history_writer import HistoryWriter
+from routers.wheelstacks.crud import db_history_get_placement_wheelstacks
 from constants import (
     PLACEMENT_COLLECTIONS,
     DB_PMK_NAME,
     CLN_WHEELSTACKS,
     CLN_ACTIVE_ORDERS,
     CLN_PLACEMENT_HISTORY,
-    CLN_WHEELS,
-    CLN_BATCH_NUMBERS,
+    HISTORY_COALESCE_WINDOW,
+    CLN_JOBS_QUEUE,
+    JOB_HISTORY_RECORD,
+    JOBS_QUEUE_ENABLED,
+    CLN_PLACEMENT_OCCUPANCY,
+    OCCUPANCY_ENABLED,
 )
 
 
-async def gather_wheels_data(wheelstacks_data: dict, db: AsyncIOMotorClient) -> dict:
+async def gather_wheels_data(wheelstacks_data: dict, loaders: DataLoaders) -> dict:
     # { wheel_object_id: { wheel_data } }
     wheels_data: dict[str, dict] = {}
+    wheels_records: dict[ObjectId, dict] = {}
     for wheelstack_id, record in wheelstacks_data.items():
         for wheel_id in record['wheels']:
-            if wheel_id in wheels_data:
-                continue
-            wheel_data: dict = await db_find_wheel_by_object_id(
-                wheel_id, db, DB_PMK_NAME, CLN_WHEELS,
+            wheels_records.setdefault(wheel_id, record)
+    wheels_ids: list[ObjectId] = list(wheels_records.keys())
+    # Single `$in` query for all of the `wheel`s.
+    wheels_result: list[dict | None] = await loaders.wheels.load_many(wheels_ids)
+    for wheel_id, wheel_data in zip(wheels_ids, wheels_result):
+        if wheel_data is None:
+            logger.warning(
+                f'Not existing wheel used in the wheelstack record with `ObjectId` => {wheels_records[wheel_id]['_id']}'
             )
-            if wheel_data is None:
-                logger.warning(
-                    f'Not existing wheel used in the wheelstack record with `ObjectId` => {record['_id']}'
-                )
-                continue
-            wheels_data[str(wheel_id)] = wheel_data
+            continue
+        wheels_data[str(wheel_id)] = wheel_data
     return wheels_data
 
 
-async def gather_batches_data(wheelstacks_data: dict, db: AsyncIOMotorClient) -> dict:
+async def gather_batches_data(wheelstacks_data: dict, loaders: DataLoaders) -> dict:
     # { batch_number: { batch_data } }
     batches_data: dict[str, dict] = {}
+    batches_records: dict[str, dict] = {}
     for wheelstack_id, record in wheelstacks_data.items():
-        batch_number: str = record['batchNumber']
-        if batch_number in batches_data:
-            continue
-        batch_data: dict = await db_find_batch_number(
-            batch_number, db, DB_PMK_NAME, CLN_BATCH_NUMBERS
-        )
+        batches_records.setdefault(record['batchNumber'], record)
+    batch_numbers: list[str] = list(batches_records.keys())
+    batches_result: list[dict | None] = await loaders.batches.load_many(batch_numbers)
+    for batch_number, batch_data in zip(batch_numbers, batches_result):
         if batch_data is None:
             logger.warning(
-                f'Not existing `batchNumber` in the wheelstack record with `ObjectId`=> {record['_id']}'
+                f'Not existing `batchNumber` in the wheelstack record with `ObjectId`=> {batches_records[batch_number]['_id']}'
             )
             continue
         batches_data[batch_number] = batch_data
     return batches_data
 
 
-async def add_order_wheelstacks(wheelstacks_data, orders_data, db: AsyncIOMotorClient) -> None:
+async def add_order_wheelstacks(wheelstacks_data, orders_data, loaders: DataLoaders) -> None:
+    missing_wheelstacks: list[ObjectId] = []
     for order in orders_data:
-        source_wheelstack_object_id: ObjectId = order['affectedWheelStacks']['source']
-        source_string_object_id: str = str(source_wheelstack_object_id)
-        if source_wheelstack_object_id and source_string_object_id not in wheelstacks_data:
-            source_wheelstack = await db_find_wheelstack_by_object_id(
-                source_wheelstack_object_id, db, DB_PMK_NAME, CLN_WHEELSTACKS
-            )
-            if source_wheelstack is None:
-                logger.warning(
-                    f'Corrupted `order` uses non existing `wheelstack` with `ObjectId` => {source_string_object_id}'
-                )
-            else:
-                wheelstacks_data[source_string_object_id] = source_wheelstack
-        dest_wheelstack_object_id: ObjectId = order['affectedWheelStacks']['destination']
-        dest_string_object_id: str = str(dest_wheelstack_object_id)
-        if dest_wheelstack_object_id and dest_string_object_id not in wheelstacks_data:
-            dest_wheelstack = await db_find_wheelstack_by_object_id(
-                dest_wheelstack_object_id, db, DB_PMK_NAME, CLN_WHEELSTACKS
+        for wheelstack_object_id in (
+                order['affectedWheelStacks']['source'], order['affectedWheelStacks']['destination']
+        ):
+            if not wheelstack_object_id or str(wheelstack_object_id) in wheelstacks_data:
+                continue
+            if wheelstack_object_id not in missing_wheelstacks:
+                missing_wheelstacks.append(wheelstack_object_id)
+    if not missing_wheelstacks:
+        return
+    wheelstacks_result: list[dict | None] = await loaders.wheelstacks.load_many(missing_wheelstacks)
+    for wheelstack_object_id, wheelstack_data in zip(missing_wheelstacks, wheelstacks_result):
+        string_object_id: str = str(wheelstack_object_id)
+        if wheelstack_data is None:
+            logger.warning(
+                f'Corrupted `order` uses non existing `wheelstack` with `ObjectId` => {string_object_id}'
             )
-            if dest_wheelstack is None:
-                logger.warning(
-                    f'Corrupted `order` uses non existing `wheelstack` with `ObjectId` => {dest_string_object_id}'
-                )
-            else:
-                wheelstacks_data[dest_string_object_id] = dest_wheelstack
+            continue
+        wheelstacks_data[string_object_id] = wheelstack_data
 
 
 async def gather_placement_history_data(
@@ -114,9 +122,12 @@ async def gather_placement_history_data(
     )
     # We can have order `basePlatform` -> `grid`.
     # `wheelstack` is not present in `grid` but it will, and we need this data.
-    await add_order_wheelstacks(wheelstacks_data, orders_data, db)
-    wheels_data = await gather_wheels_data(wheelstacks_data, db)
-    batches_data = await gather_batches_data(wheelstacks_data, db)
+    loaders = DataLoaders(db)
+    await add_order_wheelstacks(wheelstacks_data, orders_data, loaders)
+    wheels_data, batches_data = await asyncio.gather(
+        gather_wheels_data(wheelstacks_data, loaders),
+        gather_batches_data(wheelstacks_data, loaders),
+    )
     # Converting to dictionary for better usage.
     orders_data = {
         str(order['_id']): order for order in orders_data
@@ -133,7 +144,24 @@ async def gather_placement_history_data(
     return history_record_data
 
 
-async def background_history_record(
+async def create_history_record(
+        history_record_data: dict,
+        db: AsyncIOMotorClient,
+) -> ObjectId:
+    history_record: dict = history_build_record(history_record_data)
+    try:
+        await db_history_create_record(
+            history_record, db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY
+        )
+    except HTTPException:
+        # Next record should be a `keyframe`, we can't be sure what's stored.
+        history_drop_last_state(history_record_data['placementData']['_id'])
+        raise
+    history_store_last_state(history_record, history_record_data)
+    return history_record['_id']
+
+
+async def write_history_record(
         placement_id: ObjectId,
         placement_type: str,
         db: AsyncIOMotorClient,
@@ -145,10 +173,69 @@ async def background_history_record(
     placement_data = await gather_placement_history_data(
         placement_id, placement_type, db
     )
-    history_record = await db_history_create_record(
-        placement_data, db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY
-    )
+    history_record_id = await create_history_record(placement_data, db)
     logger.info(
         f'End of creating a history record for `placement`  => {placement_id}'
-        f' of type {placement_type} | History record `ObjectId` => {history_record.inserted_id}'
+        f' of type {placement_type} | History record `ObjectId` => {history_record_id}'
     )
+    if OCCUPANCY_ENABLED:
+        # History record is already stored, failed sample shouldn't retry the whole record.
+        try:
+            await db_insert_occupancy_sample(
+                placement_occupancy(placement_data), db, DB_PMK_NAME, CLN_PLACEMENT_OCCUPANCY
+            )
+        except HTTPException:
+            pass
+
+
+history_writer = HistoryWriter(write_history_record, HISTORY_COALESCE_WINDOW)
+
+
+async def history_record_job(payload: dict, db: AsyncIOMotorClient) -> None:
+    await write_history_record(payload['placementId'], payload['placementType'], db)
+
+
+async def background_history_record(
+        placement_id: ObjectId,
+        placement_type: str,
+        db: AsyncIOMotorClient,
+) -> None:
+    # Records of the same placement are coalesced, and written once per `HISTORY_COALESCE_WINDOW`.
+    if JOBS_QUEUE_ENABLED:
+        # `pending` job of the placement is delayed by window, so every request in it is coalesced.
+        # Called after the order is already written, failed record shouldn't fail the request.
+        try:
+            await db_enqueue_job(
+                JOB_HISTORY_RECORD,
+                {
+                    'placementId': placement_id,
+                    'placementType': placement_type,
+                },
+                db, DB_PMK_NAME, CLN_JOBS_QUEUE,
+                f'{JOB_HISTORY_RECORD}:{placement_id}', HISTORY_COALESCE_WINDOW
+            )
+        except HTTPException as error:
+            logger.error(
+                f'Failed to request history record for `placement` => {placement_id}'
+                f' of type {placement_type} | ERROR: {error.detail}'
+            )
+        return
+    await history_writer.schedule(placement_id, placement_type, db)
+
+
+async def background_history_records(
+        placements: set[tuple[ObjectId, str]],
+        db: AsyncIOMotorClient,
+) -> None:
+    """
+    Requests a single record for every (placement_id, placement_type) of `placements`.
+    """
+    for placement_id, placement_type in placements:
+        # Every placement is requested, even if some of them failed.
+        try:
+            await background_history_record(placement_id, placement_type, db)
+        except Exception as error:
+            logger.error(
+                f'Failed to request history record for `placement` => {placement_id}'
+                f' of type {placement_type} | ERROR: {error}'
+            )
@@ -0,0 +1,213 @@
+import bson
+from copy import deepcopy
+from bson import ObjectId
+from loguru import logger
+from datetime import datetime, timedelta
+from motor.motor_asyncio import AsyncIOMotorClient
+from utility.utilities import time_w_timezone
+from routers.history.crud import (
+    db_history_get_chain_records,
+    db_history_get_placements_before,
+    db_history_get_records_summary,
+    db_history_chain_created_after,
+    db_history_replace_records,
+    db_history_delete_records,
+    db_history_get_storage_stats,
+)
+from routers.history.history_deltas import (
+    history_apply_changes,
+    history_record_state,
+    history_state_changes,
+    history_record_from_state,
+    history_keyframe_record,
+    history_delta_record,
+)
+from constants import (
+    DB_PMK_NAME,
+    CLN_PLACEMENT_HISTORY,
+    HISTORY_RECORD_DELTA,
+    HISTORY_RETENTION_FULL_DAYS,
+    HISTORY_RETENTION_HOURLY_DAYS,
+    HISTORY_RETENTION_DAILY_DAYS,
+    HISTORY_COMPACTION_BATCH,
+)
+
+
+# Compaction only touches records older than `HISTORY_RETENTION_FULL_DAYS`.
+# Every record is placed in a bucket (hour|day) by its age, and only the last record of the bucket is kept.
+# Kept records of the chain can depend on the deleted ones, so before deletion
+#  they're rewritten as a new chain: first kept record is a `keyframe`, others are `delta`s from the previous kept record.
+# Chains with records younger than `HISTORY_RETENTION_FULL_DAYS` are still in use, and skipped until they're not.
+
+
+def history_retention_bucket(created_at: datetime, now: datetime) -> str | None:
+    """
+    Returns bucket of the record, only the last record of the bucket is kept.
+    `None` == record should be deleted.
+    """
+    age: timedelta = now - created_at
+    if 0 < HISTORY_RETENTION_DAILY_DAYS and age >= timedelta(days=HISTORY_RETENTION_DAILY_DAYS):
+        return None
+    if age >= timedelta(days=HISTORY_RETENTION_HOURLY_DAYS):
+        return f'day:{created_at.strftime('%Y-%m-%d')}'
+    return f'hour:{created_at.strftime('%Y-%m-%dT%H')}'
+
+
+def history_kept_records(records_summary: list[dict], now: datetime) -> set[ObjectId]:
+    # { bucket: record_id } <- records are sorted by `createdAt`, so the last one stays.
+    buckets: dict[str, ObjectId] = {}
+    for record in records_summary:
+        bucket: str | None = history_retention_bucket(record['createdAt'], now)
+        if bucket is not None:
+            buckets[bucket] = record['_id']
+    return set(buckets.values())
+
+
+def history_rechain_records(chain: list[dict], kept_records: set[ObjectId]) -> list[dict] | None:
+    """
+    Rewrites `kept_records` of the `chain` as a new chain, which doesn't depend on any other record.
+    Returns `None` if the chain is broken, and can't be reconstructed.
+    """
+    states: dict[ObjectId, dict] = {}
+    for record in sorted(chain, key=lambda chain_record: chain_record['chainIndex']):
+        if HISTORY_RECORD_DELTA != record.get('recordType'):
+            states[record['_id']] = history_record_state(record)
+            continue
+        base_state: dict | None = states.get(record['baseRecordId'])
+        if base_state is None:
+            logger.error(
+                f'Broken `placementHistory` chain, record with `ObjectId` => {record['baseRecordId']} not Found'
+            )
+            return None
+        states[record['_id']] = history_apply_changes(deepcopy(base_state), record['changes'])
+    kept: list[dict] = sorted(
+        [record for record in chain if record['_id'] in kept_records],
+        key=lambda chain_record: (chain_record['createdAt'], chain_record['_id'])
+    )
+    rewritten: list[dict] = []
+    for chain_index, record in enumerate(kept):
+        record_data: dict = history_record_from_state(record, states[record['_id']])
+        if 0 == chain_index:
+            rewritten.append(history_keyframe_record(record['_id'], record_data))
+            continue
+        previous: dict = kept[chain_index - 1]
+        rewritten.append(
+            history_delta_record(
+                record['_id'],
+                record_data,
+                kept[0]['_id'],
+                previous['_id'],
+                chain_index,
+                history_state_changes(states[previous['_id']], states[record['_id']]),
+            )
+        )
+    return rewritten
+
+
+async def compact_placement_history(
+        placement_id: ObjectId,
+        now: datetime,
+        db: AsyncIOMotorClient,
+) -> dict:
+    full_period_end: datetime = now - timedelta(days=HISTORY_RETENTION_FULL_DAYS)
+    records_summary: list[dict] = await db_history_get_records_summary(
+        placement_id, full_period_end, db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY
+    )
+    kept_records: set[ObjectId] = history_kept_records(records_summary, now)
+    # { keyframe_id: [records] } <- records without `keyframeId` are standalone snapshots.
+    chains: dict[ObjectId, list[dict]] = {}
+    for record in records_summary:
+        chains.setdefault(record.get('keyframeId') or record['_id'], []).append(record)
+    report: dict = {
+        'deletedRecords': 0,
+        'deletedBytes': 0,
+        'rewrittenRecords': 0,
+        'rewrittenBytes': 0,
+        'skippedChains': 0,
+    }
+    deleted_records: list[ObjectId] = []
+    for chain_id, chain_summary in chains.items():
+        chain_deleted: list[dict] = [
+            record for record in chain_summary if record['_id'] not in kept_records
+        ]
+        if not chain_deleted:
+            continue
+        if chain_summary[0].get('keyframeId') is not None:
+            if await db_history_chain_created_after(
+                    chain_id, full_period_end, db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY
+            ):
+                report['skippedChains'] += 1
+                continue
+            chain: list[dict] = await db_history_get_chain_records(
+                chain_id, None, db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY
+            )
+            rewritten: list[dict] | None = history_rechain_records(chain, kept_records)
+            if rewritten is None:
+                report['skippedChains'] += 1
+                continue
+            # Kept records are rewritten first, so they never point to the deleted ones.
+            if rewritten:
+                await db_history_replace_records(
+                    rewritten, db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY
+                )
+                report['rewrittenRecords'] += len(rewritten)
+                records_sizes: dict[ObjectId, int] = {
+                    record['_id']: record['size'] for record in chain_summary
+                }
+                report['rewrittenBytes'] += sum(
+                    len(bson.encode(record)) - records_sizes.get(record['_id'], 0) for record in rewritten
+                )
+        for record in chain_deleted:
+            deleted_records.append(record['_id'])
+            report['deletedBytes'] += record['size']
+    for batch_start in range(0, len(deleted_records), HISTORY_COMPACTION_BATCH):
+        result = await db_history_delete_records(
+            deleted_records[batch_start:batch_start + HISTORY_COMPACTION_BATCH],
+            db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY
+        )
+        report['deletedRecords'] += result.deleted_count
+    return report
+
+
+async def compact_history(db: AsyncIOMotorClient) -> dict:
+    """
+    Applies tiered retention to the records of every placement.
+    Returns number of deleted|rewritten records, their sizes, and storage stats before|after compaction.
+    `freeStorageSize` is the space we reclaimed, it's reused by MongoDB, but not returned to the OS.
+    """
+    started_at: datetime = await time_w_timezone()
+    # Stored dates are naive UTC.
+    now: datetime = started_at.replace(tzinfo=None)
+    full_period_end: datetime = now - timedelta(days=HISTORY_RETENTION_FULL_DAYS)
+    logger.info(f'Started compaction of `placementHistory` records created before => {full_period_end}')
+    storage_before: dict = await db_history_get_storage_stats(db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY)
+    placements: list[ObjectId] = await db_history_get_placements_before(
+        full_period_end, db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY
+    )
+    report: dict = {
+        'startedAt': started_at,
+        'placements': len(placements),
+        'deletedRecords': 0,
+        'deletedBytes': 0,
+        'rewrittenRecords': 0,
+        'rewrittenBytes': 0,
+        'skippedChains': 0,
+    }
+    for placement_id in placements:
+        placement_report: dict = await compact_placement_history(placement_id, now, db)
+        for key, value in placement_report.items():
+            report[key] += value
+    storage_after: dict = await db_history_get_storage_stats(db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY)
+    report['storageBefore'] = storage_before
+    report['storageAfter'] = storage_after
+    report['reclaimedBytes'] = storage_before['size'] - storage_after['size']
+    report['finishedAt'] = await time_w_timezone()
+    logger.info(
+        f'End of `placementHistory` compaction | Deleted records: {report['deletedRecords']}'
+        f' | Rewritten records: {report['rewrittenRecords']} | Reclaimed bytes: {report['reclaimedBytes']}'
+    )
+    return report
+
+
+async def history_compaction_job(payload: dict, db: AsyncIOMotorClient) -> dict:
+    return await compact_history(db)
@@ -0,0 +1,57 @@
+import bson
+import zlib
+from bson import Binary
+from constants import (
+    HISTORY_COMPRESSION,
+    HISTORY_COMPRESSION_LEVEL,
+    HISTORY_COMPRESSED_FIELDS,
+    HISTORY_COMPRESSION_ZLIB,
+)
+
+
+# Heavy fields of the record (`wheelstacksData`, `wheelsData`, `batchesData`) are only used when record is opened,
+#  so they're stored as a single compressed BSON document in `compressedData`.
+# Everything we query or index stays uncompressed, `wheelstacksData` is left empty because it's required by schema.
+# `delta` records don't have heavy fields, their `changes` are stored as is.
+
+
+def history_compress_record(history_record: dict) -> dict:
+    """
+    Returns a copy of the `history_record` with heavy fields compressed.
+    Records without heavy data, or already compressed ones are returned as is.
+    """
+    if HISTORY_COMPRESSION_ZLIB != HISTORY_COMPRESSION or 'compressedData' in history_record:
+        return history_record
+    heavy_data: dict = {
+        field: history_record[field] for field in HISTORY_COMPRESSED_FIELDS if history_record.get(field)
+    }
+    if not heavy_data:
+        return history_record
+    compressed_record: dict = {
+        key: value for key, value in history_record.items() if key not in HISTORY_COMPRESSED_FIELDS
+    }
+    compressed_record['wheelstacksData'] = {}
+    compressed_record['compression'] = HISTORY_COMPRESSION_ZLIB
+    compressed_record['compressedData'] = Binary(
+        zlib.compress(bson.encode(heavy_data), HISTORY_COMPRESSION_LEVEL)
+    )
+    return compressed_record
+
+
+def history_decompress_record(history_record: dict | None) -> dict | None:
+    """
+    Restores heavy fields of the compressed record, in place.
+    Not compressed records are returned as is.
+    """
+    if history_record is None or 'compressedData' not in history_record:
+        return history_record
+    compressed_data: bytes = history_record.pop('compressedData')
+    history_record.pop('compression', None)
+    history_record.update(bson.decode(zlib.decompress(compressed_data)))
+    return history_record
+
+
+def history_decompress_records(history_records: list[dict]) -> list[dict]:
+    for history_record in history_records:
+        history_decompress_record(history_record)
+    return history_records
@@ -0,0 +1,337 @@
+from copy import deepcopy
+from bson import ObjectId
+from loguru import logger
+from datetime import timedelta
+from motor.motor_asyncio import AsyncIOMotorClient
+from routers.history.crud import db_history_get_chain_records, db_history_get_records_by_id
+from constants import (
+    HISTORY_RECORD_KEYFRAME,
+    HISTORY_RECORD_DELTA,
+    HISTORY_KEYFRAME_INTERVAL,
+    HISTORY_RECORD_DATA_FIELDS,
+    HISTORY_RETENTION_FULL_DAYS,
+)
+
+
+# Every history record is either:
+#  - `keyframe` <- full snapshot of the placement, `keyframeId` == its own `_id`, `chainIndex` == 0
+#  - `delta` <- only `changes` from the `baseRecordId` record, which belongs to the same `keyframeId`.
+# `delta` records still store `placementData._id`, so all the queries by placement are working.
+# Records created before deltas were introduced don't have `recordType` and treated as `keyframe`s.
+
+# Last recorded state of the placement in this process.
+# { placement_id: { 'recordId', 'keyframeId', 'chainIndex', 'createdAt', 'data' } }
+# Every worker has its own cache, so workers can create deltas based on different records.
+# Which is fine, because every delta is built against exact data of its `baseRecordId`.
+history_last_states: dict[str, dict] = {}
+# Cached state older than this is never used as a base, compaction can rewrite|delete it.
+HISTORY_LAST_STATE_MAX_AGE: timedelta = timedelta(days=HISTORY_RETENTION_FULL_DAYS) / 2
+# Rounds of searching records, which were moved into other chains by compaction while we were reading.
+HISTORY_RECONSTRUCT_ROUNDS: int = 3
+
+
+def history_diff(old_data: dict, new_data: dict, path: list[str] | None = None) -> list[dict]:
+    """
+    Creates a list of `set`|`unset` changes, which converts `old_data` into `new_data`.
+    Only nested dictionaries are compared by keys, anything else (lists, values) is replaced as a whole.
+    Paths are stored as lists of keys, because our keys (row|column names) can contain anything.
+    """
+    path = path or []
+    changes: list[dict] = []
+    for key in old_data:
+        if key not in new_data:
+            changes.append({'op': 'unset', 'path': [*path, key]})
+    for key, new_value in new_data.items():
+        if key not in old_data:
+            changes.append({'op': 'set', 'path': [*path, key], 'value': new_value})
+            continue
+        old_value = old_data[key]
+        if isinstance(old_value, dict) and isinstance(new_value, dict):
+            changes.extend(history_diff(old_value, new_value, [*path, key]))
+        elif old_value != new_value:
+            changes.append({'op': 'set', 'path': [*path, key], 'value': new_value})
+    return changes
+
+
+def history_apply_changes(record_data: dict, changes: list[dict]) -> dict:
+    for change in changes:
+        *parents, last_key = change['path']
+        target: dict = record_data
+        for key in parents:
+            target = target.setdefault(key, {})
+        if 'unset' == change['op']:
+            target.pop(last_key, None)
+        else:
+            target[last_key] = deepcopy(change['value'])
+    return record_data
+
+
+def history_record_state(history_record_data: dict) -> dict:
+    return {
+        field: history_record_data.get(field, {}) for field in HISTORY_RECORD_DATA_FIELDS
+    }
+
+
+def history_state_changes(old_state: dict, new_state: dict) -> list[dict]:
+    changes: list[dict] = []
+    for field in HISTORY_RECORD_DATA_FIELDS:
+        changes.extend(
+            history_diff(old_state[field], new_state[field], [field])
+        )
+    return changes
+
+
+def history_keyframe_record(record_id: ObjectId, history_record_data: dict) -> dict:
+    return {
+        **history_record_data,
+        '_id': record_id,
+        'recordType': HISTORY_RECORD_KEYFRAME,
+        'keyframeId': record_id,
+        'baseRecordId': None,
+        'chainIndex': 0,
+    }
+
+
+def history_delta_record(
+        record_id: ObjectId,
+        history_record_data: dict,
+        keyframe_id: ObjectId,
+        base_record_id: ObjectId,
+        chain_index: int,
+        changes: list[dict],
+) -> dict:
+    return {
+        '_id': record_id,
+        'createdAt': history_record_data['createdAt'],
+        'placementType': history_record_data['placementType'],
+        'placementData': {
+            '_id': history_record_data['placementData']['_id'],
+        },
+        'wheelstacksData': {},
+        'placementOrders': {},
+        'recordType': HISTORY_RECORD_DELTA,
+        'keyframeId': keyframe_id,
+        'baseRecordId': base_record_id,
+        'chainIndex': chain_index,
+        'changes': changes,
+    }
+
+
+def history_build_record(history_record_data: dict) -> dict:
+    """
+    Converts gathered history data into the record we should store.
+    First record of the placement in this process, and every `HISTORY_KEYFRAME_INTERVAL` record is a `keyframe`.
+    """
+    placement_id: str = str(history_record_data['placementData']['_id'])
+    record_id: ObjectId = ObjectId()
+    last_state: dict | None = history_last_states.get(placement_id)
+    if (last_state is None
+            or last_state['chainIndex'] + 1 >= HISTORY_KEYFRAME_INTERVAL
+            or history_record_data['createdAt'] - last_state['createdAt'] > HISTORY_LAST_STATE_MAX_AGE):
+        return history_keyframe_record(record_id, history_record_data)
+    return history_delta_record(
+        record_id,
+        history_record_data,
+        last_state['keyframeId'],
+        last_state['recordId'],
+        last_state['chainIndex'] + 1,
+        history_state_changes(last_state['data'], history_record_state(history_record_data)),
+    )
+
+
+def history_store_last_state(history_record: dict, history_record_data: dict) -> None:
+    placement_id: str = str(history_record_data['placementData']['_id'])
+    history_last_states[placement_id] = {
+        'recordId': history_record['_id'],
+        'keyframeId': history_record['keyframeId'],
+        'chainIndex': history_record['chainIndex'],
+        'createdAt': history_record_data['createdAt'],
+        'data': history_record_state(history_record_data),
+    }
+
+
+def history_drop_last_state(placement_id: ObjectId) -> None:
+    history_last_states.pop(str(placement_id), None)
+
+
+def history_record_from_state(record: dict, state: dict) -> dict:
+    full_record: dict = {
+        key: value for key, value in record.items() if key != 'changes'
+    }
+    full_record.update(state)
+    return full_record
+
+
+async def history_reconstruct_records(
+        records: list[dict],
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+) -> list[dict]:
+    """
+    Replaces every `delta` record in `records` with its full data.
+    Records of the same `keyframeId` are reconstructed with a single query of their chain.
+    """
+    chains_ends: dict[ObjectId, int] = {}
+    for record in records:
+        if HISTORY_RECORD_DELTA != record.get('recordType'):
+            continue
+        keyframe_id: ObjectId = record['keyframeId']
+        chains_ends[keyframe_id] = max(chains_ends.get(keyframe_id, 0), record['chainIndex'])
+    if not chains_ends:
+        return records
+    chain_records: dict[ObjectId, dict] = {}
+
+    async def load_chains(chains: dict[ObjectId, int]) -> None:
+        for chain_keyframe_id, chain_end in chains.items():
+            keyframe_chain: list[dict] = await db_history_get_chain_records(
+                chain_keyframe_id, chain_end, db, db_name, db_collection
+            )
+            for chain_record in keyframe_chain:
+                chain_records[chain_record['_id']] = chain_record
+
+    def find_missing(target_id: ObjectId) -> ObjectId | None:
+        current_id: ObjectId | None = target_id
+        while current_id is not None:
+            chain_record = chain_records.get(current_id)
+            if chain_record is None:
+                return current_id
+            if HISTORY_RECORD_DELTA != chain_record.get('recordType'):
+                return None
+            current_id = chain_record['baseRecordId']
+        return None
+
+    await load_chains(chains_ends)
+    # Compaction rewrites kept records into new chains, and records we got earlier can point to the old ones.
+    # Current versions of missing records are found by `_id`, and their new chains are loaded.
+    for _ in range(HISTORY_RECONSTRUCT_ROUNDS):
+        missing_records: set[ObjectId] = set()
+        for record in records:
+            if HISTORY_RECORD_DELTA != record.get('recordType'):
+                continue
+            missing_id = find_missing(record['_id'])
+            if missing_id is not None:
+                missing_records.add(missing_id)
+        if not missing_records:
+            break
+        found_records: list[dict] = await db_history_get_records_by_id(
+            list(missing_records), db, db_name, db_collection
+        )
+        if not found_records:
+            break
+        new_chains: dict[ObjectId, int] = {}
+        for found_record in found_records:
+            chain_records[found_record['_id']] = found_record
+            if HISTORY_RECORD_DELTA != found_record.get('recordType'):
+                continue
+            keyframe_id = found_record['keyframeId']
+            new_chains[keyframe_id] = max(new_chains.get(keyframe_id, 0), found_record['chainIndex'])
+        await load_chains(new_chains)
+    # { record_id: reconstructed data }
+    states: dict[ObjectId, dict] = {}
+
+    def get_state(target_id: ObjectId) -> dict | None:
+        # Walking back to the closest known state, and applying changes forward from it.
+        walk: list[dict] = []
+        current_id: ObjectId | None = target_id
+        while current_id is not None and current_id not in states:
+            chain_record = chain_records.get(current_id)
+            if chain_record is None:
+                logger.error(
+                    f'Broken `placementHistory` chain, record with `ObjectId` => {current_id} not Found'
+                )
+                return None
+            walk.append(chain_record)
+            if HISTORY_RECORD_DELTA != chain_record.get('recordType'):
+                break
+            current_id = chain_record['baseRecordId']
+        walk.reverse()
+        state: dict | None = None
+        if walk and HISTORY_RECORD_DELTA != walk[0].get('recordType'):
+            state = history_record_state(walk[0])
+            states[walk[0]['_id']] = state
+            walk = walk[1:]
+        elif current_id is not None:
+            state = states[current_id]
+        for chain_record in walk:
+            state = history_apply_changes(deepcopy(state), chain_record['changes'])
+            states[chain_record['_id']] = state
+        return state
+
+    reconstructed: list[dict] = []
+    for record in records:
+        if HISTORY_RECORD_DELTA != record.get('recordType'):
+            reconstructed.append(record)
+            continue
+        record_state = get_state(record['_id'])
+        if record_state is None:
+            reconstructed.append(record)
+            continue
+        reconstructed.append(history_record_from_state(record, deepcopy(record_state)))
+    return reconstructed
+
+
+def history_changed_entries(before: dict, after: dict) -> dict:
+    return {
+        'added': {
+            key: value for key, value in after.items() if key not in before
+        },
+        'removed': {
+            key: value for key, value in before.items() if key not in after
+        },
+        'changed': {
+            key: {
+                'before': before[key],
+                'after': value,
+            }
+            for key, value in after.items() if key in before and before[key] != value
+        },
+    }
+
+
+def history_changed_cells(before_placement: dict, after_placement: dict) -> list[dict]:
+    changed_cells: list[dict] = []
+    before_rows: dict = before_placement.get('rows', {})
+    after_rows: dict = after_placement.get('rows', {})
+    for row in {*before_rows, *after_rows}:
+        before_columns: dict = before_rows.get(row, {}).get('columns', {})
+        after_columns: dict = after_rows.get(row, {}).get('columns', {})
+        for column in {*before_columns, *after_columns}:
+            before_cell = before_columns.get(column)
+            after_cell = after_columns.get(column)
+            if before_cell == after_cell:
+                continue
+            changed_cells.append({
+                'row': row,
+                'column': column,
+                'before': before_cell,
+                'after': after_cell,
+            })
+    changed_cells.sort(key=lambda cell: (cell['row'], cell['column']))
+    return changed_cells
+
+
+def history_records_diff(before_record: dict | None, after_record: dict) -> dict:
+    """
+    Compares 2 full records of the same placement.
+    Returns only changed cells (`rows` + `extra` of the `grid`, `elements` of the `storage`),
+     `wheelstack`s and `order`s. Missing `before_record` == everything is new.
+    """
+    before_record = before_record or {}
+    before_placement: dict = before_record.get('placementData', {})
+    after_placement: dict = after_record['placementData']
+    return {
+        'cells': history_changed_cells(before_placement, after_placement),
+        'extra': history_changed_entries(
+            before_placement.get('extra', {}), after_placement.get('extra', {})
+        ),
+        'elements': history_changed_entries(
+            before_placement.get('elements', {}), after_placement.get('elements', {})
+        ),
+        'wheelstacks': history_changed_entries(
+            before_record.get('wheelstacksData', {}), after_record['wheelstacksData']
+        ),
+        'orders': history_changed_entries(
+            before_record.get('placementOrders', {}), after_record['placementOrders']
+        ),
+    }
@@ -0,0 +1,102 @@
+import asyncio
+from bson import ObjectId
+from loguru import logger
+from typing import Awaitable, Callable
+from motor.motor_asyncio import AsyncIOMotorClient
+
+
+class HistoryWriter:
+    """
+    Coalesces history records of the same placement.
+    First request for the placement starts a `window`, every other request in this `window` is coalesced,
+     and a single record is written at the end of it, with the latest placement state (it's gathered at write time).
+    So we never write more than one record per `window` for a single placement.
+    With `window` <= 0 every record is written right away.
+    State is per process, so every worker has its own pending records and metrics.
+    """
+
+    def __init__(
+            self,
+            write_record: Callable[[ObjectId, str, AsyncIOMotorClient], Awaitable[None]],
+            window: float,
+    ):
+        self.write_record = write_record
+        self.window: float = window
+        # { placement_id: (placement_type, db) }
+        self._pending: dict[ObjectId, tuple[str, AsyncIOMotorClient]] = {}
+        self._timers: dict[ObjectId, asyncio.Task] = {}
+        # Every delayed write, kept until it's done, even after it left `_timers` and started writing.
+        self._writes: set[asyncio.Task] = set()
+        self.requested: int = 0
+        self.coalesced: int = 0
+        self.written: int = 0
+        self.failed: int = 0
+
+    async def schedule(
+            self,
+            placement_id: ObjectId,
+            placement_type: str,
+            db: AsyncIOMotorClient,
+    ) -> None:
+        self.requested += 1
+        if self.window <= 0:
+            self._pending[placement_id] = (placement_type, db)
+            await self._write(placement_id)
+            return
+        if placement_id in self._pending:
+            self.coalesced += 1
+            logger.info(
+                f'History record for `placement` => {placement_id} coalesced with already pending one'
+            )
+            return
+        self._pending[placement_id] = (placement_type, db)
+        timer: asyncio.Task = asyncio.create_task(self._delayed_write(placement_id))
+        self._timers[placement_id] = timer
+        self._writes.add(timer)
+        timer.add_done_callback(self._writes.discard)
+
+    async def _delayed_write(self, placement_id: ObjectId) -> None:
+        await asyncio.sleep(self.window)
+        self._timers.pop(placement_id, None)
+        await self._write(placement_id)
+
+    async def _write(self, placement_id: ObjectId) -> None:
+        pending = self._pending.pop(placement_id, None)
+        if pending is None:
+            return
+        placement_type, db = pending
+        try:
+            await self.write_record(placement_id, placement_type, db)
+            self.written += 1
+        except Exception as error:
+            self.failed += 1
+            logger.error(
+                f'Error while writing history record for `placement` => {placement_id}'
+                f' of type {placement_type} | ERROR: {error}'
+            )
+
+    async def flush(self) -> None:
+        """
+        Writes every pending record right away, used on shutdown.
+        Waits for delayed writes which already started, so they're not cut off.
+        """
+        timers: list[asyncio.Task] = list(self._timers.values())
+        self._timers.clear()
+        for timer in timers:
+            timer.cancel()
+        pending_placements: list[ObjectId] = list(self._pending.keys())
+        logger.info(f'Flushing {len(pending_placements)} pending history records')
+        await asyncio.gather(
+            *[self._write(placement_id) for placement_id in pending_placements]
+        )
+        await asyncio.gather(*self._writes, return_exceptions=True)
+
+    def metrics(self) -> dict:
+        return {
+            'window': self.window,
+            'requested': self.requested,
+            'coalesced': self.coalesced,
+            'written': self.written,
+            'failed': self.failed,
+            'pending': len(self._pending),
+        }
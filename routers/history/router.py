@@ -1,16 +1,41 @@
+import asyncio
 from bson import ObjectId
 from loguru import logger
-from datetime import datetime, timezone
+from datetime import datetime
+from bson.errors import InvalidId
 from fastapi.responses import JSONResponse
 from database.mongo_connection import mongo_client
 from motor.motor_asyncio import AsyncIOMotorClient
-from fastapi import APIRouter, Depends, status, Body, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
 from auth.jwt_validation import get_role_verification_dependency
-from routers.history.history_actions import gather_placement_history_data
+from routers.history.history_deltas import history_reconstruct_records, history_records_diff
+from routers.history.history_actions import gather_placement_history_data, create_history_record, history_writer
+from routers.history.history_compaction import compact_history
 from routers.history.models.models import ForceHistoryRecord, BasicPlacementTypes
-from utility.utilities import get_object_id, convert_object_id_and_datetime_to_str
-from constants import DB_PMK_NAME, CLN_PLACEMENT_HISTORY, ADMIN_ACCESS_ROLES, BASIC_PAGE_VIEW_ROLES
-from routers.history.crud import db_history_create_record, db_history_get_records, db_history_get_record
+from routers.jobs.crud import db_enqueue_job, db_get_last_finished_job
+from utility.utilities import (
+    get_object_id,
+    convert_object_id_and_datetime_to_str,
+    encode_cursor_token,
+    decode_cursor_token,
+)
+from constants import (
+    DB_PMK_NAME,
+    CLN_PLACEMENT_HISTORY,
+    CLN_JOBS_QUEUE,
+    JOB_HISTORY_COMPACTION,
+    JOBS_QUEUE_ENABLED,
+    ADMIN_ACCESS_ROLES,
+    BASIC_PAGE_VIEW_ROLES,
+    HISTORY_PAGE_LIMIT_DEFAULT,
+    HISTORY_PAGE_LIMIT_MAX,
+)
+from routers.history.crud import (
+    db_history_get_records,
+    db_history_count_records,
+    db_history_get_record,
+    db_history_get_record_at,
+)
 
 
 # We need to record at times:
@@ -41,10 +66,8 @@ async def route_post_force_history_record(
     placement_type: str = placement_info['placementType']
     logger.info(f'ID: {placement_object_id} | Type: {placement_type}')
     placement_data = await gather_placement_history_data(placement_object_id, placement_type, db)
-    history_record = await db_history_create_record(
-        placement_data, db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY
-    )
-    created_id: str = convert_object_id_and_datetime_to_str(history_record.inserted_id)
+    history_record_id = await create_history_record(placement_data, db)
+    created_id: str = convert_object_id_and_datetime_to_str(history_record_id)
     return JSONResponse(
         content={
             '_id': created_id
@@ -55,23 +78,27 @@ async def route_post_force_history_record(
 
 @router.get(
     path='/all',
-    description='Gathers and returns all db records in provided period.'
-                ' If no period provided, returns all records',
+    description='Gathers and returns page of the records in provided period, ordered by `createdAt`.'
+                ' If no period provided, pages through all records.'
+                ' `next` token of the response is used to get the next page, `null` == last page.'
+                ' `count` of the matching records is only returned for the first page',
     name='Get History Records',
 )
 async def route_get_history_records(
         include_data: bool = Query(
-            default=True,
+            default=False,
             description='Include data of the records,'
-                        ' or just provide their basic info: `_id`, `createdAt, `placementType`',
+                        ' or just provide their basic info: `_id`, `createdAt`, `placementType`, `placementData._id`',
         ),
         period_start: datetime = Query(
-            default=datetime(1970, 1, 1, tzinfo=timezone.utc),
-            description='Start date of the period, default is Unix Epoch (start of time)',
+            default=None,
+            description='Start date of the period (inclusive), without it records aren\'t limited from the start.'
+                        ' Kept the same for every page, `next` token only continues after the last record',
         ),
         period_end: datetime = Query(
-            default=datetime.now(timezone.utc),
-            description='End date of the period, default is time of the request',
+            default=None,
+            description='End date of the period (inclusive), without it records aren\'t limited from the end,'
+                        ' and records created while paging are included on the later pages',
         ),
         placement_id: str = Query(
             None,
@@ -81,17 +108,69 @@ async def route_get_history_records(
             None,
             description='`placementType` of a placement to filter records on',
         ),
+        limit: int = Query(
+            default=HISTORY_PAGE_LIMIT_DEFAULT,
+            ge=1,
+            le=HISTORY_PAGE_LIMIT_MAX,
+            description='Max number of records on the page',
+        ),
+        next_token: str = Query(
+            default=None,
+            alias='next',
+            description='`next` token of the previous page',
+        ),
         db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
         token_data: dict = get_role_verification_dependency(BASIC_PAGE_VIEW_ROLES),
 ):
     if placement_id:
         placement_id: ObjectId = await get_object_id(placement_id)
-    history_records: list[dict] = await db_history_get_records(
-        include_data, period_start, period_end, db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY, placement_id, placement_type
+    after: tuple[datetime, ObjectId] | None = None
+    if next_token:
+        cursor_data: dict = await decode_cursor_token(next_token)
+        try:
+            after = (
+                datetime.fromisoformat(cursor_data['createdAt']),
+                ObjectId(cursor_data['_id']),
+            )
+        except (KeyError, TypeError, ValueError, InvalidId):
+            raise HTTPException(
+                detail='Invalid cursor token',
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+    # Extra record tells us if there's a next page.
+    records_task = db_history_get_records(
+        include_data, period_start, period_end, db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY,
+        placement_id, placement_type, after, limit + 1
     )
+    if after is None:
+        history_records, (records_count, count_exact) = await asyncio.gather(
+            records_task,
+            db_history_count_records(
+                period_start, period_end, db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY, placement_id, placement_type
+            ),
+        )
+    else:
+        history_records = await records_task
+        records_count, count_exact = None, None
+    next_cursor: str | None = None
+    if len(history_records) > limit:
+        history_records = history_records[:limit]
+        next_cursor = await encode_cursor_token({
+            'createdAt': history_records[-1]['createdAt'],
+            '_id': history_records[-1]['_id'],
+        })
+    if include_data:
+        history_records = await history_reconstruct_records(
+            history_records, db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY
+        )
     cor_history_records: list[dict] = convert_object_id_and_datetime_to_str(history_records)
     return JSONResponse(
-        content=cor_history_records,
+        content={
+            'records': cor_history_records,
+            'next': next_cursor,
+            'count': records_count,
+            'countExact': count_exact,
+        },
         status_code=status.HTTP_200_OK,
     )
 
@@ -118,8 +197,192 @@ async def route_get_history_record(
     history_record = await db_history_get_record(
         include_data, record_object_id, db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY
     )
+    if include_data and history_record is not None:
+        history_record = (await history_reconstruct_records(
+            [history_record], db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY
+        ))[0]
+    cor_history_record = convert_object_id_and_datetime_to_str(history_record)
+    return JSONResponse(
+        content=cor_history_record,
+        status_code=status.HTTP_200_OK,
+    )
+
+
+async def get_placement_record_at(
+        placement_id: ObjectId,
+        record_time: datetime,
+        db: AsyncIOMotorClient,
+) -> dict | None:
+    history_record = await db_history_get_record_at(
+        placement_id, record_time, db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY
+    )
+    if history_record is None:
+        return None
+    return (await history_reconstruct_records(
+        [history_record], db, DB_PMK_NAME, CLN_PLACEMENT_HISTORY
+    ))[0]
+
+
+@router.get(
+    path='/at',
+    description='Get state of the placement at the provided time.'
+                ' Returns the latest history record created before|at `ts`',
+    name='Get History Record At',
+)
+async def route_get_history_record_at(
+        placement_id: str = Query(
+            default=...,
+            alias='placementId',
+            description='`ObjectId` of the placement',
+        ),
+        record_time: datetime = Query(
+            default=...,
+            alias='ts',
+            description='Time we need the placement state at',
+        ),
+        db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
+        token_data: dict = get_role_verification_dependency(BASIC_PAGE_VIEW_ROLES),
+):
+    placement_object_id: ObjectId = await get_object_id(placement_id)
+    history_record = await get_placement_record_at(placement_object_id, record_time, db)
+    if history_record is None:
+        raise HTTPException(
+            detail=f'No `historyRecord`s of the placement => {placement_id} before => {record_time}',
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
     cor_history_record = convert_object_id_and_datetime_to_str(history_record)
     return JSONResponse(
         content=cor_history_record,
         status_code=status.HTTP_200_OK,
     )
+
+
+@router.get(
+    path='/diff',
+    description='Get changes of the placement between 2 moments of time.'
+                ' Only changed cells, `wheelstack`s and `order`s are returned, with their `before` and `after` states.'
+                ' If there\'s no records before `from`, everything in the `to` state is treated as added',
+    name='Get History Diff',
+)
+async def route_get_history_diff(
+        placement_id: str = Query(
+            default=...,
+            alias='placementId',
+            description='`ObjectId` of the placement',
+        ),
+        period_start: datetime = Query(
+            default=...,
+            alias='from',
+            description='Time of the state to compare from',
+        ),
+        period_end: datetime = Query(
+            default=...,
+            alias='to',
+            description='Time of the state to compare to',
+        ),
+        db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
+        token_data: dict = get_role_verification_dependency(BASIC_PAGE_VIEW_ROLES),
+):
+    if period_start > period_end:
+        raise HTTPException(
+            detail='`from` should be earlier than `to`',
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+    placement_object_id: ObjectId = await get_object_id(placement_id)
+    before_record = await get_placement_record_at(placement_object_id, period_start, db)
+    after_record = await get_placement_record_at(placement_object_id, period_end, db)
+    if after_record is None:
+        raise HTTPException(
+            detail=f'No `historyRecord`s of the placement => {placement_id} before => {period_end}',
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+    records_diff: dict = {
+        'placementId': placement_object_id,
+        'placementType': after_record['placementType'],
+        'from': {
+            'recordId': before_record['_id'] if before_record else None,
+            'createdAt': before_record['createdAt'] if before_record else None,
+        },
+        'to': {
+            'recordId': after_record['_id'],
+            'createdAt': after_record['createdAt'],
+        },
+    }
+    records_diff.update(history_records_diff(before_record, after_record))
+    cor_records_diff = convert_object_id_and_datetime_to_str(records_diff)
+    return JSONResponse(
+        content=cor_records_diff,
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@router.get(
+    path='/writer/metrics',
+    description='Get metrics of the coalescing history writer: requested, coalesced and written records.'
+                ' Metrics are gathered by every worker separately, so it\'s metrics of the worker handling request',
+    name='Get History Writer Metrics',
+)
+async def route_get_history_writer_metrics(
+        token_data: dict = get_role_verification_dependency(ADMIN_ACCESS_ROLES),
+):
+    return JSONResponse(
+        content=history_writer.metrics(),
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@router.post(
+    path='/compaction',
+    description='Start compaction of the history records with tiered retention.'
+                ' Compaction is enqueued as a job, and its report is available with `GET /history/compaction`.'
+                ' If jobs queue is disabled, compaction is done right away and its report is returned',
+    name='Start History Compaction',
+)
+async def route_post_history_compaction(
+        db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
+        token_data: dict = get_role_verification_dependency(ADMIN_ACCESS_ROLES),
+):
+    if not JOBS_QUEUE_ENABLED:
+        report = await compact_history(db)
+        return JSONResponse(
+            content=convert_object_id_and_datetime_to_str(report),
+            status_code=status.HTTP_200_OK,
+        )
+    created: bool = await db_enqueue_job(
+        JOB_HISTORY_COMPACTION, {}, db, DB_PMK_NAME, CLN_JOBS_QUEUE, JOB_HISTORY_COMPACTION
+    )
+    return JSONResponse(
+        content={
+            'enqueued': created,
+        },
+        status_code=status.HTTP_202_ACCEPTED,
+    )
+
+
+@router.get(
+    path='/compaction',
+    description='Get report of the last finished history compaction: deleted|rewritten records and reclaimed space',
+    name='Get History Compaction',
+)
+async def route_get_history_compaction(
+        db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
+        token_data: dict = get_role_verification_dependency(ADMIN_ACCESS_ROLES),
+):
+    last_job = await db_get_last_finished_job(
+        JOB_HISTORY_COMPACTION, db, DB_PMK_NAME, CLN_JOBS_QUEUE
+    )
+    if last_job is None:
+        raise HTTPException(
+            detail='History compaction was never finished',
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+    return JSONResponse(
+        content=convert_object_id_and_datetime_to_str({
+            'jobId': last_job['_id'],
+            'status': last_job['status'],
+            'finishedAt': last_job['finishedAt'],
+            'lastError': last_job.get('lastError'),
+            'result': last_job.get('result'),
+        }),
+        status_code=status.HTTP_200_OK,
+    )
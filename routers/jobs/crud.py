@@ -0,0 +1,349 @@
+from bson import ObjectId
+from loguru import logger
+from datetime import timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError, DuplicateKeyError
+from fastapi import HTTPException, status
+from motor.motor_asyncio import AsyncIOMotorClient
+from utility.utilities import get_db_collection, time_w_timezone, log_db_record, log_db_error_record
+from constants import (
+    JOB_STATUS_PENDING,
+    JOB_STATUS_RUNNING,
+    JOB_STATUS_DONE,
+    JOB_STATUS_FAILED,
+    JOBS_MAX_ATTEMPTS,
+)
+
+
+async def db_enqueue_job(
+        job_type: str,
+        payload: dict,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+        dedup_key: str = '',
+        delay: float = 0,
+        max_attempts: int = JOBS_MAX_ATTEMPTS,
+) -> bool:
+    """
+    Adds a new `pending` job into the queue.
+    If `dedup_key` is provided and there's already `pending` job with it, new job is coalesced with it.
+    Returns `True` if a new job was created, `False` if it was coalesced.
+    """
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    logger.info(
+        f'Attempt to enqueue job of type => {job_type} | `dedupKey` => {dedup_key}' + db_info
+    )
+    creation_time = await time_w_timezone()
+    job_record: dict = {
+        'jobType': job_type,
+        'payload': payload,
+        'status': JOB_STATUS_PENDING,
+        'attempts': 0,
+        'maxAttempts': max_attempts,
+        'createdAt': creation_time,
+        'availableAt': creation_time + timedelta(seconds=delay),
+        'startedAt': None,
+        'finishedAt': None,
+        'leaseOwner': None,
+        'leaseUntil': None,
+        'lastError': None,
+    }
+    try:
+        if not dedup_key:
+            job_record['requests'] = 1
+            await collection.insert_one(job_record)
+            return True
+        job_record['dedupKey'] = dedup_key
+        result = await collection.update_one(
+            {
+                'dedupKey': dedup_key,
+                'status': JOB_STATUS_PENDING,
+            },
+            {
+                '$setOnInsert': job_record,
+                '$inc': {'requests': 1},
+            },
+            upsert=True,
+        )
+        created: bool = result.upserted_id is not None
+        logger.info(
+            f'Successfully enqueued job of type => {job_type} | `dedupKey` => {dedup_key}'
+            f' | Coalesced: {not created}' + db_info
+        )
+        return created
+    except DuplicateKeyError:
+        # Other worker created the same `pending` job at the same time.
+        return False
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while enqueuing job of type => {job_type}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while enqueuing job',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_claim_job(
+        lease_owner: str,
+        lease_seconds: int,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+) -> dict | None:
+    """
+    Claims the oldest available job: `pending` job, or `running` job with expired lease (consumer died).
+    Every claim counts as an attempt.
+    """
+    collection = await get_db_collection(db, db_name, db_collection)
+    claim_time = await time_w_timezone()
+    query = {
+        '$or': [
+            {
+                'status': JOB_STATUS_PENDING,
+                'availableAt': {'$lte': claim_time},
+            },
+            {
+                'status': JOB_STATUS_RUNNING,
+                'leaseUntil': {'$lte': claim_time},
+            },
+        ]
+    }
+    update = {
+        '$set': {
+            'status': JOB_STATUS_RUNNING,
+            'startedAt': claim_time,
+            'leaseOwner': lease_owner,
+            'leaseUntil': claim_time + timedelta(seconds=lease_seconds),
+        },
+        '$inc': {
+            'attempts': 1,
+        },
+    }
+    try:
+        return await collection.find_one_and_update(
+            query, update, sort=[('availableAt', 1)], return_document=ReturnDocument.AFTER,
+        )
+    except PyMongoError as error:
+        db_info = await log_db_record(db_name, db_collection)
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while claiming job by => {lease_owner}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while claiming job',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_extend_job_lease(
+        job_id: ObjectId,
+        lease_owner: str,
+        lease_seconds: int,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+) -> bool:
+    collection = await get_db_collection(db, db_name, db_collection)
+    lease_until = await time_w_timezone() + timedelta(seconds=lease_seconds)
+    try:
+        result = await collection.update_one(
+            {'_id': job_id, 'leaseOwner': lease_owner, 'status': JOB_STATUS_RUNNING},
+            {'$set': {'leaseUntil': lease_until}},
+        )
+        return bool(result.matched_count)
+    except PyMongoError as error:
+        db_info = await log_db_record(db_name, db_collection)
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while extending lease of the job => {job_id}' + db_info + error_extra
+        )
+        return False
+
+
+async def db_finish_job(
+        job_id: ObjectId,
+        lease_owner: str,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+        error_message: str | None = None,
+        retry_delay: float | None = None,
+        result: dict | None = None,
+):
+    """
+    Marks job as `done` if there's no `error_message`, with `result` returned by its handler.
+    Otherwise, it's returned into `pending` after `retry_delay`, or marked `failed` when `retry_delay` is `None`.
+    Only lease owner can finish the job.
+    """
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    finish_time = await time_w_timezone()
+    job_update: dict = {
+        'leaseOwner': None,
+        'leaseUntil': None,
+        'lastError': error_message,
+    }
+    if error_message is None:
+        job_update['status'] = JOB_STATUS_DONE
+        job_update['finishedAt'] = finish_time
+        job_update['result'] = result
+    elif retry_delay is None:
+        job_update['status'] = JOB_STATUS_FAILED
+        job_update['finishedAt'] = finish_time
+    else:
+        job_update['status'] = JOB_STATUS_PENDING
+        job_update['availableAt'] = finish_time + timedelta(seconds=retry_delay)
+    try:
+        result = await collection.update_one(
+            {'_id': job_id, 'leaseOwner': lease_owner},
+            {'$set': job_update},
+        )
+        logger.info(
+            f'Job => {job_id} finished with status => {job_update['status']}' + db_info
+        )
+        return result
+    except DuplicateKeyError:
+        # Returning job into `pending` while there's already new `pending` job with the same `dedupKey`.
+        # New one will gather the latest state anyway, so this one is done.
+        return await collection.update_one(
+            {'_id': job_id, 'leaseOwner': lease_owner},
+            {'$set': {
+                'status': JOB_STATUS_DONE,
+                'finishedAt': finish_time,
+                'leaseOwner': None,
+                'leaseUntil': None,
+                'lastError': error_message,
+            }},
+        )
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while finishing job => {job_id}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while finishing job',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_get_last_finished_job(
+        job_type: str,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+) -> dict | None:
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    query = {
+        'jobType': job_type,
+        'status': {
+            '$in': [JOB_STATUS_DONE, JOB_STATUS_FAILED],
+        },
+    }
+    try:
+        return await collection.find_one(query, sort=[('finishedAt', -1)])
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while searching last finished job of type => {job_type}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while searching job',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_get_jobs_metrics(
+        period_seconds: int,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+) -> dict:
+    """
+    Returns queue depth by `status` and `jobType`, age of the oldest available job,
+     and wait|run times of the jobs finished in the last `period_seconds`.
+    """
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    now = await time_w_timezone()
+    period_start = now - timedelta(seconds=period_seconds)
+    pipeline = [
+        {
+            '$facet': {
+                'depth': [
+                    {'$match': {'status': {'$in': [JOB_STATUS_PENDING, JOB_STATUS_RUNNING, JOB_STATUS_FAILED]}}},
+                    {'$group': {
+                        '_id': {'status': '$status', 'jobType': '$jobType'},
+                        'count': {'$sum': 1},
+                        'requests': {'$sum': '$requests'},
+                    }},
+                ],
+                'oldestAvailable': [
+                    {'$match': {'status': JOB_STATUS_PENDING, 'availableAt': {'$lte': now}}},
+                    {'$sort': {'availableAt': 1}},
+                    {'$limit': 1},
+                    {'$project': {'_id': 0, 'availableAt': 1}},
+                ],
+                'finished': [
+                    {'$match': {'status': JOB_STATUS_DONE, 'finishedAt': {'$gte': period_start}}},
+                    {'$project': {
+                        'jobType': 1,
+                        'attempts': 1,
+                        'waitMs': {'$dateDiff': {
+                            'startDate': '$availableAt', 'endDate': '$startedAt', 'unit': 'millisecond'
+                        }},
+                        'runMs': {'$dateDiff': {
+                            'startDate': '$startedAt', 'endDate': '$finishedAt', 'unit': 'millisecond'
+                        }},
+                    }},
+                    {'$group': {
+                        '_id': '$jobType',
+                        'count': {'$sum': 1},
+                        'retried': {'$sum': {'$cond': [{'$gt': ['$attempts', 1]}, 1, 0]}},
+                        'waitMsAvg': {'$avg': '$waitMs'},
+                        'waitMsMax': {'$max': '$waitMs'},
+                        'runMsAvg': {'$avg': '$runMs'},
+                        'runMsMax': {'$max': '$runMs'},
+                    }},
+                ],
+            }
+        }
+    ]
+    try:
+        result = await collection.aggregate(pipeline).to_list(length=1)
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while gathering jobs metrics' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while gathering jobs metrics',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+    facets: dict = result[0]
+    depth: dict = {}
+    for record in facets['depth']:
+        job_status: str = record['_id']['status']
+        job_type: str = record['_id']['jobType']
+        depth.setdefault(job_type, {})[job_status] = {
+            'count': record['count'],
+            'requests': record['requests'],
+        }
+    oldest_age: float = 0
+    if facets['oldestAvailable']:
+        oldest_available = facets['oldestAvailable'][0]['availableAt']
+        oldest_age = (now.replace(tzinfo=None) - oldest_available.replace(tzinfo=None)).total_seconds()
+    finished: dict = {}
+    for record in facets['finished']:
+        job_type = record.pop('_id')
+        finished[job_type] = record
+    return {
+        'depth': depth,
+        'oldestAvailableAgeSec': oldest_age,
+        'periodSec': period_seconds,
+        'finished': finished,
+    }
@@ -0,0 +1,13 @@
+from constants import JOB_HISTORY_RECORD, JOB_HISTORY_COMPACTION, JOB_ORDERS_ARCHIVE
+from routers.jobs.jobs_queue import JobHandler
+from routers.history.history_actions import history_record_job
+from routers.history.history_compaction import history_compaction_job
+from routers.orders.orders_archive import orders_archive_job
+
+
+# Every `jobType` we can process.
+JOB_HANDLERS: dict[str, JobHandler] = {
+    JOB_HISTORY_RECORD: history_record_job,
+    JOB_HISTORY_COMPACTION: history_compaction_job,
+    JOB_ORDERS_ARCHIVE: orders_archive_job,
+}
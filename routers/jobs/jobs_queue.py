@@ -0,0 +1,160 @@
+import os
+import socket
+import asyncio
+from uuid import uuid4
+from loguru import logger
+from typing import Awaitable, Callable
+from motor.motor_asyncio import AsyncIOMotorClient
+from routers.jobs.crud import db_claim_job, db_extend_job_lease, db_finish_job
+from constants import (
+    DB_PMK_NAME,
+    CLN_JOBS_QUEUE,
+    JOBS_LEASE_SECONDS,
+    JOBS_BACKOFF_BASE,
+    JOBS_BACKOFF_MAX,
+    JOBS_POLL_INTERVAL,
+)
+
+
+# { jobType: handler(payload, db) }, returned dictionary is stored as `result` of the job.
+JobHandler = Callable[[dict, AsyncIOMotorClient], Awaitable[dict | None]]
+
+
+def job_retry_delay(attempt: int) -> float:
+    return min(JOBS_BACKOFF_MAX, JOBS_BACKOFF_BASE * 2 ** (attempt - 1))
+
+
+class JobsConsumerPool:
+    """
+    Pool of `concurrency` consumers, every one of them claims and processes a single job at a time.
+    Claimed job is leased to the consumer, and lease is extended while job is running.
+    If consumer dies, lease expires and job is claimed again by any other consumer.
+    Failed jobs are retried with exponential backoff, until `maxAttempts` is reached.
+    """
+
+    def __init__(
+            self,
+            handlers: dict[str, JobHandler],
+            db: AsyncIOMotorClient,
+            concurrency: int,
+            lease_seconds: int = JOBS_LEASE_SECONDS,
+            poll_interval: float = JOBS_POLL_INTERVAL,
+    ):
+        self.handlers: dict[str, JobHandler] = handlers
+        self.db: AsyncIOMotorClient = db
+        self.concurrency: int = concurrency
+        self.lease_seconds: int = lease_seconds
+        self.poll_interval: float = poll_interval
+        self.owner_prefix: str = f'{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}'
+        self._consumers: list[asyncio.Task] = []
+        self._stop_event: asyncio.Event = asyncio.Event()
+        self.processed: int = 0
+        self.retried: int = 0
+        self.failed: int = 0
+        self.running: int = 0
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        for index in range(self.concurrency):
+            self._consumers.append(
+                asyncio.create_task(self._consume(f'{self.owner_prefix}:{index}'))
+            )
+        logger.info(f'Started {self.concurrency} jobs consumers => {self.owner_prefix}')
+
+    async def stop(self) -> None:
+        """
+        Stops claiming new jobs and waits for the running ones to finish.
+        """
+        self._stop_event.set()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers.clear()
+        logger.info(f'Stopped jobs consumers => {self.owner_prefix}')
+
+    async def wait(self) -> None:
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+
+    async def _consume(self, lease_owner: str) -> None:
+        while not self._stop_event.is_set():
+            try:
+                job: dict | None = await db_claim_job(
+                    lease_owner, self.lease_seconds, self.db, DB_PMK_NAME, CLN_JOBS_QUEUE
+                )
+            except Exception as error:
+                logger.error(f'Jobs consumer => {lease_owner} failed to claim a job | ERROR: {error}')
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._process(job, lease_owner)
+            except Exception as error:
+                # Job is still leased, it's going to be claimed again after lease expires.
+                logger.error(f'Jobs consumer => {lease_owner} failed to process job => {job['_id']} | ERROR: {error}')
+
+    async def _extend_lease(self, job: dict, lease_owner: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            extended: bool = await db_extend_job_lease(
+                job['_id'], lease_owner, self.lease_seconds, self.db, DB_PMK_NAME, CLN_JOBS_QUEUE
+            )
+            if not extended:
+                logger.warning(f'Lease of the job => {job['_id']} lost by => {lease_owner}')
+                return
+
+    async def _process(self, job: dict, lease_owner: str) -> None:
+        job_type: str = job['jobType']
+        handler: JobHandler | None = self.handlers.get(job_type)
+        error_message: str | None = None
+        if handler is None:
+            error_message = f'No handler for the job of type => {job_type}'
+        elif job['attempts'] > job['maxAttempts']:
+            # Lease expired on the last attempt, consumer died while processing it.
+            error_message = job.get('lastError') or 'Lease expired on the last attempt'
+        if error_message is not None:
+            logger.error(f'Job => {job['_id']} failed | {error_message}')
+            self.failed += 1
+            await db_finish_job(
+                job['_id'], lease_owner, self.db, DB_PMK_NAME, CLN_JOBS_QUEUE, error_message
+            )
+            return
+        self.running += 1
+        lease_task = asyncio.create_task(self._extend_lease(job, lease_owner))
+        job_result: dict | None = None
+        try:
+            job_result = await handler(job['payload'], self.db)
+        except Exception as error:
+            error_message = f'{type(error).__name__}: {getattr(error, 'detail', error)}'
+        finally:
+            lease_task.cancel()
+            self.running -= 1
+        retry_delay: float | None = None
+        if error_message is None:
+            self.processed += 1
+        elif job['attempts'] < job['maxAttempts']:
+            self.retried += 1
+            retry_delay = job_retry_delay(job['attempts'])
+            logger.warning(
+                f'Job => {job['_id']} of type {job_type} failed on attempt {job['attempts']}'
+                f' retrying in {retry_delay}s | ERROR: {error_message}'
+            )
+        else:
+            self.failed += 1
+            logger.error(
+                f'Job => {job['_id']} of type {job_type} failed on the last attempt | ERROR: {error_message}'
+            )
+        await db_finish_job(
+            job['_id'], lease_owner, self.db, DB_PMK_NAME, CLN_JOBS_QUEUE, error_message, retry_delay, job_result
+        )
+
+    def metrics(self) -> dict:
+        return {
+            'owner': self.owner_prefix,
+            'concurrency': self.concurrency,
+            'running': self.running,
+            'processed': self.processed,
+            'retried': self.retried,
+            'failed': self.failed,
+        }
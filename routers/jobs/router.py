@@ -0,0 +1,39 @@
+from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, status, Query
+from database.mongo_connection import mongo_client
+from motor.motor_asyncio import AsyncIOMotorClient
+from routers.jobs.crud import db_get_jobs_metrics
+from routers.history.history_actions import history_writer
+from auth.jwt_validation import get_role_verification_dependency
+from utility.utilities import convert_object_id_and_datetime_to_str
+from constants import DB_PMK_NAME, CLN_JOBS_QUEUE, ADMIN_ACCESS_ROLES
+
+
+router = APIRouter()
+
+# Consumers started inside of this worker, if there's any.
+api_jobs_consumers: dict = {}
+
+
+@router.get(
+    path='/metrics',
+    description='Get jobs queue metrics: depth by `status` and `jobType`, age of the oldest available job'
+                ' and wait|run times of the finished jobs in the last `period` seconds.'
+                ' `consumers` are only present if consumers are running inside of the worker handling request',
+    name='Get Jobs Metrics',
+)
+async def route_get_jobs_metrics(
+        period: int = Query(300,
+                            ge=1,
+                            description='Period in seconds to gather finished jobs metrics'),
+        db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
+        token_data: dict = get_role_verification_dependency(ADMIN_ACCESS_ROLES),
+):
+    queue_metrics: dict = await db_get_jobs_metrics(period, db, DB_PMK_NAME, CLN_JOBS_QUEUE)
+    if 'pool' in api_jobs_consumers:
+        queue_metrics['consumers'] = api_jobs_consumers['pool'].metrics()
+    queue_metrics['historyWriter'] = history_writer.metrics()
+    return JSONResponse(
+        content=convert_object_id_and_datetime_to_str(queue_metrics),
+        status_code=status.HTTP_200_OK,
+    )
@@ -0,0 +1,100 @@
+from bson import ObjectId
+from loguru import logger
+from datetime import datetime
+from pymongo.errors import PyMongoError
+from fastapi import HTTPException, status
+from motor.motor_asyncio import AsyncIOMotorClient
+from utility.utilities import get_db_collection, log_db_record, log_db_error_record
+
+
+OCCUPANCY_FIELDS: list[str] = [
+    'totalCells',
+    'occupiedCells',
+    'blockedCells',
+    'freeCells',
+    'wheelstacks',
+    'wheels',
+]
+
+
+async def db_insert_occupancy_sample(
+        occupancy_sample: dict,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+):
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    placement_id: ObjectId = occupancy_sample['placement']['placementId']
+    try:
+        return await collection.insert_one(occupancy_sample)
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while recording occupancy of the `placementId` => {placement_id}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while recording occupancy',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_get_occupancy_series(
+        placement_id: ObjectId,
+        period_start: datetime,
+        period_end: datetime,
+        unit: str,
+        fill: bool,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+) -> list[dict]:
+    """
+    Returns the last sample of every `unit` (minute|hour|day) in the period.
+    With `fill`, `unit`s without samples are filled with the previous sample, placement didn't change in them.
+    """
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    pipeline: list[dict] = [
+        {'$match': {
+            'placement.placementId': placement_id,
+            'timestamp': {'$gte': period_start, '$lte': period_end},
+        }},
+        {'$sort': {'timestamp': 1}},
+        {'$group': {
+            '_id': {'$dateTrunc': {'date': '$timestamp', 'unit': unit}},
+            **{field: {'$last': f'${field}'} for field in OCCUPANCY_FIELDS},
+        }},
+        {'$project': {
+            '_id': 0,
+            'timestamp': '$_id',
+            **{field: 1 for field in OCCUPANCY_FIELDS},
+        }},
+        {'$sort': {'timestamp': 1}},
+    ]
+    if fill:
+        pipeline.extend([
+            {'$densify': {
+                'field': 'timestamp',
+                'range': {'step': 1, 'unit': unit, 'bounds': 'full'},
+            }},
+            {'$fill': {
+                'sortBy': {'timestamp': 1},
+                'output': {field: {'method': 'locf'} for field in OCCUPANCY_FIELDS},
+            }},
+        ])
+    logger.info(
+        f'Attempt to gather occupancy of the `placementId` => {placement_id}'
+        f' in period: {period_start} => {period_end} | Unit: {unit}' + db_info
+    )
+    try:
+        return await collection.aggregate(pipeline).to_list(length=None)
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while gathering occupancy of the `placementId` => {placement_id}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while gathering occupancy',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
@@ -0,0 +1,49 @@
+from bson import ObjectId
+from constants import PT_STORAGE
+
+
+def placement_occupancy(history_record_data: dict) -> dict:
+    """
+    Counts occupancy of the placement from the gathered history data.
+    `grid` and `basePlatform` rows only contain `wheelstack` cells, so every cell is counted.
+    `storage` doesn't have cells, only the number of placed `wheelstack`s is counted.
+    """
+    placement_data: dict = history_record_data['placementData']
+    placement_id: ObjectId = placement_data['_id']
+    total_cells: int = 0
+    occupied_cells: int = 0
+    blocked_cells: int = 0
+    free_cells: int = 0
+    if PT_STORAGE == history_record_data['placementType']:
+        occupied_cells = len(placement_data.get('elements', []))
+    else:
+        for row_data in placement_data.get('rows', {}).values():
+            for cell_data in row_data['columns'].values():
+                total_cells += 1
+                if cell_data['wheelStack'] is not None:
+                    occupied_cells += 1
+                if cell_data['blocked']:
+                    blocked_cells += 1
+                elif cell_data['wheelStack'] is None:
+                    free_cells += 1
+    # { status: count } <- `wheelstacksData` also includes `wheelstack`s of the orders from other placements.
+    wheelstacks: dict[str, int] = {}
+    wheels: int = 0
+    for wheelstack_data in history_record_data['wheelstacksData'].values():
+        if wheelstack_data['placement']['placementId'] != placement_id:
+            continue
+        wheelstacks[wheelstack_data['status']] = wheelstacks.get(wheelstack_data['status'], 0) + 1
+        wheels += len(wheelstack_data['wheels'])
+    return {
+        'timestamp': history_record_data['createdAt'],
+        'placement': {
+            'placementId': placement_id,
+            'placementType': history_record_data['placementType'],
+        },
+        'totalCells': total_cells,
+        'occupiedCells': occupied_cells,
+        'blockedCells': blocked_cells,
+        'freeCells': free_cells,
+        'wheelstacks': wheelstacks,
+        'wheels': wheels,
+    }
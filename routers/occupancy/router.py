@@ -0,0 +1,89 @@
+from bson import ObjectId
+from datetime import datetime, timedelta, timezone
+from fastapi.responses import JSONResponse
+from database.mongo_connection import mongo_client
+from motor.motor_asyncio import AsyncIOMotorClient
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Query
+from auth.jwt_validation import get_role_verification_dependency
+from routers.occupancy.crud import db_get_occupancy_series
+from utility.utilities import get_object_id, time_w_timezone, convert_object_id_and_datetime_to_str
+from constants import (
+    DB_PMK_NAME,
+    CLN_PLACEMENT_OCCUPANCY,
+    BASIC_PAGE_VIEW_ROLES,
+    OCCUPANCY_UNITS,
+    OCCUPANCY_POINTS_MAX,
+)
+
+
+router = APIRouter()
+
+
+OCCUPANCY_UNITS_DURATION: dict[str, timedelta] = {
+    'minute': timedelta(minutes=1),
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+}
+
+
+@router.get(
+    path='/{placement_id}',
+    description='Get occupancy of the placement over time: total, occupied, blocked and free cells,'
+                ' placed `wheelstack`s by `status` and number of `wheel`s.'
+                ' Only the last state of every `unit` is returned.'
+                ' Default period is the last 24 hours',
+    name='Get Placement Occupancy',
+)
+async def route_get_placement_occupancy(
+        placement_id: str = Path(...,
+                                 description='`ObjectId` of the placement'),
+        period_start: datetime = Query(None,
+                                       alias='from',
+                                       description='Start date of the period'),
+        period_end: datetime = Query(None,
+                                     alias='to',
+                                     description='End date of the period, default is time of the request'),
+        unit: str = Query('minute',
+                          description=f'Size of a single point, one of: {', '.join(OCCUPANCY_UNITS)}'),
+        fill: bool = Query(False,
+                           description='Fill `unit`s without changes with the previous state'),
+        db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
+        token_data: dict = get_role_verification_dependency(BASIC_PAGE_VIEW_ROLES),
+):
+    if unit not in OCCUPANCY_UNITS:
+        raise HTTPException(
+            detail=f'Incorrect `unit`, should be one of: {', '.join(OCCUPANCY_UNITS)}',
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+    placement_object_id: ObjectId = await get_object_id(placement_id)
+    if period_end is None:
+        period_end = await time_w_timezone()
+    elif period_end.tzinfo is None:
+        period_end = period_end.replace(tzinfo=timezone.utc)
+    if period_start is None:
+        period_start = period_end - timedelta(days=1)
+    elif period_start.tzinfo is None:
+        period_start = period_start.replace(tzinfo=timezone.utc)
+    if period_start > period_end:
+        raise HTTPException(
+            detail='`from` should be earlier than `to`',
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+    if (period_end - period_start) / OCCUPANCY_UNITS_DURATION[unit] > OCCUPANCY_POINTS_MAX:
+        raise HTTPException(
+            detail=f'Period is too long for the `unit` => {unit}, max number of points = {OCCUPANCY_POINTS_MAX}',
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+    occupancy_points = await db_get_occupancy_series(
+        placement_object_id, period_start, period_end, unit, fill, db, DB_PMK_NAME, CLN_PLACEMENT_OCCUPANCY
+    )
+    return JSONResponse(
+        content=convert_object_id_and_datetime_to_str({
+            'placementId': placement_object_id,
+            'unit': unit,
+            'from': period_start,
+            'to': period_end,
+            'points': occupancy_points,
+        }),
+        status_code=status.HTTP_200_OK,
+    )
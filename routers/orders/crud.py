@@ -1,10 +1,17 @@
 import asyncio
 from bson import ObjectId
+from datetime import datetime, timedelta
 from loguru import logger
-from pymongo.errors import PyMongoError
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError, BulkWriteError, DuplicateKeyError
 from fastapi import HTTPException, status
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorClientSession
-from utility.utilities import get_db_collection, log_db_record, log_db_error_record
+from routers.placement_changes.crud import db_insert_placement_change
+from utility.utilities import get_db_collection, log_db_record, log_db_error_record, time_w_timezone
+
+
+# Code of the write error, when the document with the same `_id` already exists.
+DUPLICATE_KEY_CODE: int = 11000
 
 
 async def order_make_json_friendly(order_data: dict):
@@ -143,6 +150,55 @@ async def db_delete_order(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Database error")
 
 
+async def db_create_orders_many(
+        orders_data: list[dict],
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+        session: AsyncIOMotorClientSession = None,
+):
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    try:
+        return await collection.insert_many(orders_data, ordered=False, session=session)
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while creating {len(orders_data)} orders' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Database insertion error',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_delete_orders_many(
+        orders: list[ObjectId],
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+        session: AsyncIOMotorClientSession = None,
+):
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    query = {
+        '_id': {
+            '$in': orders,
+        }
+    }
+    try:
+        return await collection.delete_many(query, session=session)
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while deleting orders => {orders}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Database error',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
 async def db_history_get_orders_by_placement(
         placement_id: ObjectId,
         placement_type: str,
@@ -223,3 +279,442 @@ async def db_get_orders_by_id_many(
             detail='Error while gathering data',
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
+
+
+def orders_union_pipeline(
+        query: dict,
+        collections: list[str],
+        projection: dict | None = None,
+) -> list[dict]:
+    """
+    Pipeline for the first of `collections`, which adds results of the same `query` from all others.
+    Every `collection` is matched separately, so their own indexes are used.
+    """
+    collection_pipeline: list[dict] = [{'$match': query}]
+    if projection:
+        collection_pipeline.append({'$project': projection})
+    pipeline: list[dict] = list(collection_pipeline)
+    for collection in collections[1:]:
+        pipeline.append(
+            {'$unionWith': {'coll': collection, 'pipeline': collection_pipeline}}
+        )
+    return pipeline
+
+
+async def db_get_orders_union(
+        query: dict,
+        collections: list[str],
+        db: AsyncIOMotorClient,
+        db_name: str,
+        projection: dict | None = None,
+        session: AsyncIOMotorClientSession = None,
+) -> list[dict]:
+    if not collections:
+        return []
+    collection = await get_db_collection(db, db_name, collections[0])
+    db_info = await log_db_record(db_name, ' + '.join(collections))
+    logger.info(
+        f'Attempt to gather `ordersData` with a single query' + db_info
+    )
+    pipeline: list[dict] = orders_union_pipeline(query, collections, projection)
+    try:
+        result = await collection.aggregate(pipeline, session=session).to_list(length=None)
+        logger.info(
+            f'Successfully gathered `ordersData` with a single query' + db_info
+        )
+        return result
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while gathering `ordersData` with a single query' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while gathering data',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_get_orders_page(
+        collections_queries: dict[str, dict],
+        sort: dict,
+        limit: int,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        projection: dict | None = None,
+        session: AsyncIOMotorClientSession = None,
+) -> list[dict]:
+    """
+    Single page of orders from every collection of `collections_queries`, ordered by `sort`.
+    Every collection is sorted and limited by itself (with its own query and indexes),
+     so only `limit` orders of each collection are merged and sorted again.
+    """
+    if not collections_queries:
+        return []
+    pipelines: dict[str, list[dict]] = {}
+    for collection_name, query in collections_queries.items():
+        pipelines[collection_name] = [
+            {'$match': query},
+            {'$sort': sort},
+            {'$limit': limit},
+        ]
+        if projection:
+            pipelines[collection_name].append({'$project': projection})
+    first_collection, *other_collections = pipelines
+    pipeline: list[dict] = list(pipelines[first_collection])
+    if other_collections:
+        for collection_name in other_collections:
+            pipeline.append(
+                {'$unionWith': {'coll': collection_name, 'pipeline': pipelines[collection_name]}}
+            )
+        pipeline.extend([
+            {'$sort': sort},
+            {'$limit': limit},
+        ])
+    collection = await get_db_collection(db, db_name, first_collection)
+    db_info = await log_db_record(db_name, ' + '.join(pipelines))
+    logger.info(
+        f'Attempt to gather page of `ordersData` | Limit: {limit}' + db_info
+    )
+    try:
+        result = await collection.aggregate(pipeline, session=session).to_list(length=None)
+        logger.info(
+            f'Successfully gathered page of `ordersData` | Limit: {limit}' + db_info
+        )
+        return result
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while gathering page of `ordersData`' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while gathering data',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_get_orders_by_id_chunk(
+        orders: list[ObjectId],
+        after_id: ObjectId | None,
+        limit: int,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+        session: AsyncIOMotorClientSession = None,
+):
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    logger.info(
+        f'Attempt to gather chunk of `ordersData`, after => {after_id} | limit => {limit}' + db_info
+    )
+    query = {
+        '_id': {
+            '$in': orders,
+        }
+    }
+    if after_id is not None:
+        query['_id']['$gt'] = after_id
+    try:
+        result = await collection.find(
+            query, session=session
+        ).sort('_id', 1).limit(limit).to_list(length=limit)
+        logger.info(
+            f'Successfully gathered chunk of `ordersData`' + db_info
+        )
+        return result
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while gathering chunk of `ordersData`' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while gathering data',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_get_placements_fields(
+        placements: list[ObjectId],
+        fields: list[str],
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+        session: AsyncIOMotorClientSession = None,
+) -> dict[ObjectId, dict]:
+    """
+    Gathers only `fields` (cells|extra elements) of every placement in `placements`, with a single query.
+    Returns { placement_id: placement_data }, missing placements are not included.
+    """
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    query = {
+        '_id': {
+            '$in': placements,
+        }
+    }
+    projection = {'_id': 1}
+    for field in fields:
+        projection[field] = 1
+    try:
+        result = await collection.find(query, projection, session=session).to_list(length=None)
+        return {
+            placement['_id']: placement for placement in result
+        }
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while gathering fields of placements => {placements}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while gathering data',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_update_placement_cells(
+        placement_id: ObjectId,
+        cells_fields: dict,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+        session: AsyncIOMotorClientSession = None,
+        expected_cells: dict | None = None,
+        expected_version: int | None = None,
+) -> bool:
+    """
+    Sets every field of `cells_fields` ({ `rows.{row}.columns.{col}.{key}`: value }) with a single update,
+     and marks placement as changed. Empty `cells_fields` only updates `lastChange`.
+    Update is only applied if placement still has every field of `expected_cells` with the same value,
+     and `version` == `expected_version` (if provided). `version` is incremented by the same update,
+     so conflicting writers are detected without a transaction.
+    Changed cells are recorded into `placementChanges` journal, with the same `session`.
+    Returns `False` if placement doesn't exist or doesn't match expected state.
+    """
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    query = {
+        '_id': placement_id,
+        **(expected_cells or {}),
+    }
+    if expected_version is not None:
+        query['version'] = expected_version
+    update = {
+        '$set': {
+            **cells_fields,
+            'lastChange': await time_w_timezone(),
+        }
+    }
+    try:
+        if not cells_fields:
+            result = await collection.update_one(query, update, session=session)
+            return 0 != result.matched_count
+        update['$inc'] = {'version': 1}
+        placement = await collection.find_one_and_update(
+            query,
+            update,
+            projection={'_id': 1, 'version': 1},
+            return_document=ReturnDocument.AFTER,
+            session=session,
+        )
+        if placement is None:
+            logger.warning(
+                f'Placement => {placement_id} doesnt match expected state, cells are not updated' + db_info
+            )
+            return False
+        await db_insert_placement_change(
+            placement_id, placement['version'], update, db, db_name, db_collection, session
+        )
+        return True
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while updating cells of placement => {placement_id}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while updating `cell_data`',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_get_orders_before(
+        date_field: str,
+        before: datetime,
+        limit: int,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+) -> list[dict]:
+    """
+    Oldest orders with `date_field` earlier than `before`.
+    """
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    query = {
+        date_field: {
+            '$lt': before,
+        }
+    }
+    try:
+        return await collection.find(query).sort(date_field, 1).limit(limit).to_list(length=None)
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while gathering orders with `{date_field}` before => {before}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while gathering data',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_create_orders_archive(
+        indexes: list[dict],
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+) -> None:
+    # Collection is created with its first index, and `create_index` of the existing index does nothing.
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    try:
+        for index in indexes:
+            await collection.create_index(list(index['keys'].items()), **index.get('options', {}))
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while creating orders archive' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while creating orders archive',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_insert_orders_archive(
+        orders: list[dict],
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+) -> int:
+    """
+    Inserts `orders` into the archive, orders which are already archived are skipped.
+    Returns number of inserted orders.
+    """
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    try:
+        result = await collection.insert_many(orders, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as error:
+        # Orders archived by interrupted archivation, which weren't deleted from the hot collection.
+        write_errors: list[dict] = error.details.get('writeErrors', [])
+        if all(DUPLICATE_KEY_CODE == write_error['code'] for write_error in write_errors):
+            return error.details.get('nInserted', 0)
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while inserting orders into archive' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while archiving orders',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while inserting orders into archive' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while archiving orders',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_get_orders_archives(
+        collections: list[str],
+        archive_suffix: str,
+        db: AsyncIOMotorClient,
+        db_name: str,
+) -> list[str]:
+    """
+    Names of the existing archive collections of `collections`, newest first.
+    """
+    names_filter = {
+        'name': {
+            '$regex': f'^({'|'.join(collections)}){archive_suffix}_',
+        }
+    }
+    try:
+        archives: list[str] = await db[db_name].list_collection_names(filter=names_filter)
+        return sorted(archives, key=lambda archive: archive.rsplit(archive_suffix, 1)[-1], reverse=True)
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while gathering orders archives of => {collections} | DB: {db_name}' + error_extra
+        )
+        raise HTTPException(
+            detail='Error while gathering data',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_acquire_placement_lease(
+        placement_key: str,
+        lease_owner: str,
+        lease_seconds: float,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+) -> bool:
+    """
+    Takes (or extends) lease of the placement, if it's free, expired, or already owned by `lease_owner`.
+    Returns `False` if placement is leased by someone else.
+    """
+    collection = await get_db_collection(db, db_name, db_collection)
+    lease_time = await time_w_timezone()
+    query = {
+        '_id': placement_key,
+        '$or': [
+            {'leaseOwner': lease_owner},
+            {'leaseUntil': {'$lte': lease_time}},
+        ]
+    }
+    update = {
+        '$set': {
+            'leaseOwner': lease_owner,
+            'leaseUntil': lease_time + timedelta(seconds=lease_seconds),
+        }
+    }
+    try:
+        await collection.update_one(query, update, upsert=True)
+        return True
+    except DuplicateKeyError:
+        # Lease exists and owned by someone else, upsert tried to create the second one.
+        return False
+    except PyMongoError as error:
+        db_info = await log_db_record(db_name, db_collection)
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while taking lease of the placement => {placement_key} by => {lease_owner}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while taking lease of the placement',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_release_placement_lease(
+        placement_key: str,
+        lease_owner: str,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+) -> None:
+    collection = await get_db_collection(db, db_name, db_collection)
+    try:
+        await collection.delete_one({'_id': placement_key, 'leaseOwner': lease_owner})
+    except PyMongoError as error:
+        # Lease expires by itself.
+        db_info = await log_db_record(db_name, db_collection)
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while releasing lease of the placement => {placement_key} by => {lease_owner}' + db_info + error_extra
+        )
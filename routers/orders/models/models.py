@@ -12,6 +12,7 @@ from constants import (
     PS_STORAGE,
     PS_BASE_PLATFORM,
     ORDER_MOVE_TO_STORAGE, PS_GRID,
+    ORDERS_BULK_LIMIT,
 )
 
 
@@ -234,3 +235,71 @@ class CreateMoveFromStorageRequest(BaseModel):
     orderType: FromStorageOrderTypes = Field(...)
     chosenWheel: str = Field(None,
                              description='Chosen wheel to move, only used with `orderType` == `moveToLaboratory`')
+
+
+# BULK COMPLETION|CANCELLATION
+class BulkOrdersRequest(BaseModel):
+    orders: list[str] = Field(...,
+                              min_length=1,
+                              max_length=ORDERS_BULK_LIMIT,
+                              description='`objectId`s of the orders')
+
+
+class BulkCancelOrdersRequest(BulkOrdersRequest):
+    cancellationReason: str = Field('',
+                                    description='reason of cancellation, used for every order')
+
+
+# BULK MOVES
+class BulkMoveOrderTypes(str, Enum):
+    moveWholeStack = ORDER_MOVE_WHOLE_STACK
+    mergeWheelStacks = ORDER_MERGE_WHEELSTACKS
+    moveToStorage = ORDER_MOVE_TO_STORAGE
+
+
+class BulkMoveSource(BaseModel):
+    placementType: SourcePlacementType = Field(...,
+                                               description='Type of the source placement')
+    placementId: str = Field(...,
+                             description='`ObjectId` of the source placement')
+    rowPlacement: str = Field('0',
+                              description='`row` identifier of a cell, not used by `storage`')
+    columnPlacement: str = Field('0',
+                                 description='`column` identifier of a cell, not used by `storage`')
+    wheelstackId: str = Field(None,
+                              description='`ObjectId` of the `wheelstack`, only used with `storage`')
+
+
+class BulkMoveDestination(BaseModel):
+    placementType: DestinationPlacementType = Field(...,
+                                                    description='Type of the destination placement')
+    placementId: str = Field(...,
+                             description='`ObjectId` of the destination placement')
+    rowPlacement: str = Field('0',
+                              description='`row` identifier of a cell, not used by `storage`')
+    columnPlacement: str = Field('0',
+                                 description='`column` identifier of a cell, not used by `storage`')
+
+
+class BulkMoveOrder(BaseModel):
+    orderName: str = Field('',
+                           description='Optional name of the `order`')
+    orderDescription: str = Field('',
+                                  description='Optional description of the `order`')
+    orderType: BulkMoveOrderTypes = Field(...)
+    source: BulkMoveSource = Field(...)
+    destination: BulkMoveDestination = Field(...)
+
+
+class CreateBulkMovesRequest(BaseModel):
+    orders: list[BulkMoveOrder] = Field(...,
+                                        min_length=1,
+                                        max_length=ORDERS_BULK_LIMIT,
+                                        description='every order to create')
+
+
+class ValidateMovesRequest(BaseModel):
+    orders: list[BulkMoveOrder] = Field(...,
+                                        min_length=1,
+                                        max_length=ORDERS_BULK_LIMIT,
+                                        description='every order to check, every one of them is checked alone')
@@ -0,0 +1,148 @@
+import os
+import socket
+import asyncio
+from uuid import uuid4
+from loguru import logger
+from motor.motor_asyncio import AsyncIOMotorClient
+from routers.orders.crud import db_acquire_placement_lease, db_release_placement_lease
+from routers.orders.orders_bulk_creation import orders_bulk_create_moves
+from constants import (
+    DB_PMK_NAME,
+    CLN_PLACEMENT_LEASES,
+    PLACEMENT_COLLECTIONS,
+    ORDERS_BULK_LIMIT,
+    ORDERS_ACTOR_TICK,
+    ORDERS_ACTOR_LEASE,
+    ORDERS_ACTOR_LEASE_SECONDS,
+)
+
+
+# Orders of the same placement created at the same time fight over the same document,
+#  and transactions of them are aborted and retried.
+# With `ORDERS_ACTOR_ENABLED` every order is queued to the actor of its source placement instead.
+# Actor collects queued orders for `ORDERS_ACTOR_TICK`, and creates all of them with bulk creation:
+#  orders are validated one after another, and placement is changed with a single write.
+# Every worker has its own actors, with `ORDERS_ACTOR_LEASE` they take lease of the placement before every write,
+#  so actors of different workers write one after another, and lease is released after every write.
+# Lease only removes contention, bulk creation still claims cells with conditional updates,
+#  so orders are never created over each other, even if lease expired in the middle of the write.
+
+PlacementKey = str
+
+
+class PlacementActor:
+    """
+    Single writer of the placement in this worker, creates queued move orders once per tick.
+    """
+
+    def __init__(self, placement_key: PlacementKey, db: AsyncIOMotorClient, lease_owner: str):
+        self.placement_key: PlacementKey = placement_key
+        self.db: AsyncIOMotorClient = db
+        self.lease_owner: str = lease_owner
+        self.lease_held: bool = False
+        # [ (order_data, outcome future) ]
+        self.queue: list[tuple[dict, asyncio.Future]] = []
+        self._task: asyncio.Task | None = None
+        self.ticks: int = 0
+        self.orders: int = 0
+        self.lease_waits: int = 0
+
+    async def submit(self, order_data: dict) -> dict:
+        """
+        Queues move order (`BulkMoveOrder`) and waits for its outcome, the same as bulk creation returns.
+        """
+        outcome: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.queue.append((order_data, outcome))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return await outcome
+
+    async def _run(self) -> None:
+        # Queue is only checked without `await` in between, so every submitted order is taken by this loop.
+        while self.queue:
+            # Orders submitted during the tick are created with the same write.
+            await asyncio.sleep(ORDERS_ACTOR_TICK)
+            if ORDERS_ACTOR_LEASE:
+                try:
+                    acquired: bool = await self._acquire()
+                except Exception as error:
+                    # Leases can't be read at all, queued orders are failed instead of waiting forever.
+                    failed, self.queue = self.queue, []
+                    self._fail(failed, error)
+                    continue
+                if not acquired:
+                    self.lease_waits += 1
+                    continue
+            batch: list[tuple[dict, asyncio.Future]] = self.queue[:ORDERS_BULK_LIMIT]
+            del self.queue[:len(batch)]
+            await self._create(batch)
+            if self.lease_held:
+                # Released after every write, so actors of other workers aren't starved by a steady queue.
+                await self._release()
+
+    async def _acquire(self) -> bool:
+        self.lease_held = await db_acquire_placement_lease(
+            self.placement_key, self.lease_owner, ORDERS_ACTOR_LEASE_SECONDS, self.db, DB_PMK_NAME, CLN_PLACEMENT_LEASES
+        )
+        return self.lease_held
+
+    async def _release(self) -> None:
+        self.lease_held = False
+        await db_release_placement_lease(
+            self.placement_key, self.lease_owner, self.db, DB_PMK_NAME, CLN_PLACEMENT_LEASES
+        )
+
+    async def _create(self, batch: list[tuple[dict, asyncio.Future]]) -> None:
+        self.ticks += 1
+        self.orders += len(batch)
+        try:
+            outcomes, _ = await orders_bulk_create_moves([order_data for order_data, _ in batch], self.db)
+        except Exception as error:
+            logger.error(f'Actor of the placement => {self.placement_key} failed to create orders | ERROR: {error}')
+            self._fail(batch, error)
+            return
+        for (_, outcome), order_outcome in zip(batch, outcomes):
+            # Request is already gone.
+            if not outcome.done():
+                outcome.set_result(order_outcome)
+
+    @staticmethod
+    def _fail(batch: list[tuple[dict, asyncio.Future]], error: Exception) -> None:
+        for _, outcome in batch:
+            if not outcome.done():
+                outcome.set_exception(error)
+
+    def metrics(self) -> dict:
+        return {
+            'placement': self.placement_key,
+            'queued': len(self.queue),
+            'ticks': self.ticks,
+            'orders': self.orders,
+            'leaseWaits': self.lease_waits,
+        }
+
+
+class PlacementActors:
+    """
+    Actors of every placement used by this worker, created on the first order of the placement.
+    """
+
+    def __init__(self):
+        self.lease_owner: str = f'{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}'
+        self.actors: dict[PlacementKey, PlacementActor] = {}
+
+    def actor(self, placement_key: PlacementKey, db: AsyncIOMotorClient) -> PlacementActor:
+        if placement_key not in self.actors:
+            self.actors[placement_key] = PlacementActor(placement_key, db, self.lease_owner)
+        return self.actors[placement_key]
+
+    async def submit(self, order_data: dict, db: AsyncIOMotorClient) -> dict:
+        source: dict = order_data['source']
+        placement_key: PlacementKey = f'{PLACEMENT_COLLECTIONS[source['placementType']]}:{source['placementId']}'
+        return await self.actor(placement_key, db).submit(order_data)
+
+    def metrics(self) -> list[dict]:
+        return [actor.metrics() for actor in self.actors.values()]
+
+
+placement_actors = PlacementActors()
@@ -0,0 +1,125 @@
+from bson import ObjectId
+from loguru import logger
+from datetime import datetime, timedelta
+from motor.motor_asyncio import AsyncIOMotorClient
+from utility.utilities import time_w_timezone
+from routers.orders.crud import (
+    db_get_orders_before,
+    db_create_orders_archive,
+    db_insert_orders_archive,
+    db_delete_orders_many,
+    db_get_orders_archives,
+    db_get_orders_union,
+)
+from constants import (
+    DB_PMK_NAME,
+    ORDERS_ARCHIVE_FIELDS,
+    ORDERS_ARCHIVE_SUFFIX,
+    ORDERS_ARCHIVE_AFTER_DAYS,
+    ORDERS_ARCHIVE_BATCH,
+    ORDERS_ARCHIVE_INDEXES,
+)
+
+
+# Completed|canceled orders older than `ORDERS_ARCHIVE_AFTER_DAYS` are moved out of the hot collections,
+#  so their indexes only cover recent orders.
+# Orders are inserted into the archive before they're deleted, without a transaction.
+# Interrupted archivation leaves orders in both collections, next one skips already archived and deletes them.
+# Archives only have `_id` and `ORDERS_ARCHIVE_INDEXES`, they're searched by `_id` only when hot collections miss.
+
+# Archives created by this process, we don't need to ensure their indexes again.
+orders_archives_ready: set[str] = set()
+
+
+def orders_archive_name(collection_name: str, archived_by: datetime) -> str:
+    return f'{collection_name}{ORDERS_ARCHIVE_SUFFIX}_{archived_by.strftime('%Y_%m')}'
+
+
+async def archive_orders_collection(
+        collection_name: str,
+        archive_before: datetime,
+        db: AsyncIOMotorClient,
+) -> dict[str, int]:
+    """
+    Moves every order of `collection_name` completed|canceled before `archive_before` into its monthly archive.
+    Returns number of archived orders by archives.
+    """
+    date_field: str = ORDERS_ARCHIVE_FIELDS[collection_name]
+    archived: dict[str, int] = {}
+    while True:
+        orders_data: list[dict] = await db_get_orders_before(
+            date_field, archive_before, ORDERS_ARCHIVE_BATCH, db, DB_PMK_NAME, collection_name
+        )
+        if not orders_data:
+            break
+        archives: dict[str, list[dict]] = {}
+        for order_data in orders_data:
+            archives.setdefault(
+                orders_archive_name(collection_name, order_data[date_field]), []
+            ).append(order_data)
+        for archive_name, archive_orders in archives.items():
+            if archive_name not in orders_archives_ready:
+                await db_create_orders_archive(ORDERS_ARCHIVE_INDEXES, db, DB_PMK_NAME, archive_name)
+                orders_archives_ready.add(archive_name)
+            await db_insert_orders_archive(archive_orders, db, DB_PMK_NAME, archive_name)
+            archived[archive_name] = archived.get(archive_name, 0) + len(archive_orders)
+        await db_delete_orders_many(
+            [order_data['_id'] for order_data in orders_data], db, DB_PMK_NAME, collection_name
+        )
+        if len(orders_data) < ORDERS_ARCHIVE_BATCH:
+            break
+    return archived
+
+
+async def archive_orders(db: AsyncIOMotorClient) -> dict:
+    """
+    Moves completed|canceled orders older than `ORDERS_ARCHIVE_AFTER_DAYS` into monthly archives.
+    Returns number of archived orders, by hot collections and by archives.
+    """
+    started_at: datetime = await time_w_timezone()
+    # Stored dates are naive UTC.
+    archive_before: datetime = started_at.replace(tzinfo=None) - timedelta(days=ORDERS_ARCHIVE_AFTER_DAYS)
+    logger.info(f'Started archivation of orders completed|canceled before => {archive_before}')
+    report: dict = {
+        'startedAt': started_at,
+        'archiveBefore': archive_before,
+        'archivedOrders': {},
+        'archives': {},
+    }
+    for collection_name in ORDERS_ARCHIVE_FIELDS:
+        archived: dict[str, int] = await archive_orders_collection(collection_name, archive_before, db)
+        report['archivedOrders'][collection_name] = sum(archived.values())
+        report['archives'].update(archived)
+    report['finishedAt'] = await time_w_timezone()
+    logger.info(
+        f'End of orders archivation | Archived orders: {report['archivedOrders']}'
+    )
+    return report
+
+
+async def orders_archive_job(payload: dict, db: AsyncIOMotorClient) -> dict:
+    return await archive_orders(db)
+
+
+async def orders_find_archived(
+        orders: list[ObjectId],
+        collections: list[str],
+        db: AsyncIOMotorClient,
+        projection: dict | None = None,
+) -> list[dict]:
+    """
+    Searches `orders` in the archives of `collections`, with a single query over all of them.
+    """
+    archived_collections: list[str] = [
+        collection_name for collection_name in collections if collection_name in ORDERS_ARCHIVE_FIELDS
+    ]
+    if not orders or not archived_collections:
+        return []
+    archives: list[str] = await db_get_orders_archives(
+        archived_collections, ORDERS_ARCHIVE_SUFFIX, db, DB_PMK_NAME
+    )
+    if not archives:
+        return []
+    return await db_get_orders_union(
+        {'_id': {'$in': orders}}, archives, db, DB_PMK_NAME, projection
+    )
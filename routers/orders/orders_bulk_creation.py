@@ -0,0 +1,636 @@
+import asyncio
+from bson import ObjectId
+from loguru import logger
+from pymongo.errors import PyMongoError
+from fastapi import HTTPException, status
+from motor.motor_asyncio import AsyncIOMotorClient
+from utility.batch_loader import DataLoaders
+from utility.utilities import get_object_id, time_w_timezone
+from routers.wheelstacks.crud import db_update_wheelstack
+from routers.storages.crud import db_update_storage_last_change
+from routers.orders.crud import (
+    db_create_orders_many,
+    db_delete_orders_many,
+    db_get_placements_fields,
+    db_update_placement_cells,
+)
+from routers.orders.orders_engine import (
+    ENGINE_TARGET_CELL,
+    engine_target_field,
+    engine_target_data,
+    engine_update_placement,
+)
+from routers.orders.orders_dispatch import order_placements, order_placement_keys, orders_conflict_groups
+from constants import (
+    DB_PMK_NAME,
+    CLN_STORAGES,
+    CLN_WHEELSTACKS,
+    CLN_ACTIVE_ORDERS,
+    PLACEMENT_COLLECTIONS,
+    PT_GRID,
+    PT_STORAGE,
+    WS_MAX_WHEELS,
+    ORDER_STATUS_PENDING,
+    ORDER_MOVE_WHOLE_STACK,
+    ORDER_MERGE_WHEELSTACKS,
+    ORDER_MOVE_TO_STORAGE,
+    ORDERS_BULK_CREATED,
+    ORDERS_BULK_FAILED,
+    ORDERS_BULK_OPTIMISTIC,
+)
+
+
+# Bulk creation of the move orders (`moveWholeStack`, `mergeWheelStacks`, `moveToStorage`):
+#  - read phase <- every placement is gathered once (one query per collection), `wheelstack`s with `DataLoaders`,
+#  - validation <- orders are checked one by one against the gathered data, and every valid order
+#     blocks its cells|`wheelstack`s in it. So orders of the same batch, which conflict with each other,
+#     are rejected the same way, as if the previous ones were already written,
+#  - write phase <- orders are grouped by placements they change, every group is written in parallel.
+#     Cells are updated only if they're still in the validated state, so concurrent requests never overwrite each other.
+#     Groups without `storage` sources are written without a transaction, see `bulk_move_optimistic`.
+
+# Only destination placement type allowed for every order type.
+BULK_MOVE_DESTINATIONS: dict[str, str] = {
+    ORDER_MOVE_WHOLE_STACK: PT_GRID,
+    ORDER_MERGE_WHEELSTACKS: PT_GRID,
+    ORDER_MOVE_TO_STORAGE: PT_STORAGE,
+}
+
+
+async def bulk_move_order(order_data: dict) -> tuple[dict, ObjectId | None]:
+    """
+    Converts requested order into the order we're going to create.
+    Returns it with `_id` of the `wheelstack` chosen in the source `storage`.
+    """
+    new_order: dict = {
+        '_id': ObjectId(),
+        'orderName': order_data['orderName'],
+        'orderDescription': order_data['orderDescription'],
+        'orderType': order_data['orderType'],
+        'status': ORDER_STATUS_PENDING,
+    }
+    for side in ('source', 'destination'):
+        side_data: dict = order_data[side]
+        storage_side: bool = PT_STORAGE == side_data['placementType']
+        new_order[side] = {
+            'placementType': side_data['placementType'],
+            'placementId': await get_object_id(side_data['placementId']),
+            'rowPlacement': '0' if storage_side else side_data['rowPlacement'],
+            'columnPlacement': '0' if storage_side else side_data['columnPlacement'],
+        }
+    source_wheelstack_id: ObjectId | None = None
+    if order_data['source'].get('wheelstackId'):
+        source_wheelstack_id = await get_object_id(order_data['source']['wheelstackId'])
+    return new_order, source_wheelstack_id
+
+
+def bulk_move_route_error(new_order: dict, source_wheelstack_id: ObjectId | None) -> HTTPException | None:
+    source_type: str = new_order['source']['placementType']
+    destination_type: str = new_order['destination']['placementType']
+    if BULK_MOVE_DESTINATIONS[new_order['orderType']] != destination_type:
+        return HTTPException(
+            detail=f'`{new_order['orderType']}` order cant be placed into `{destination_type}`',
+            status_code=status.HTTP_403_FORBIDDEN,
+        )
+    if PT_STORAGE == source_type:
+        if source_wheelstack_id is None:
+            return HTTPException(
+                detail='`wheelstackId` is required to move from the `storage`',
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+        if (PT_STORAGE == destination_type
+                and new_order['source']['placementId'] == new_order['destination']['placementId']):
+            return HTTPException(
+                detail='Already present in destination',
+                status_code=status.HTTP_403_FORBIDDEN,
+            )
+    return None
+
+
+def bulk_cell(new_order: dict, side: str, state: dict) -> dict | None:
+    placement_type: str = new_order[side]['placementType']
+    placement_data: dict | None = state['placements'].get(
+        (PLACEMENT_COLLECTIONS[placement_type], new_order[side]['placementId'])
+    )
+    # Cells are returned from the gathered placement itself, so every change of them stays for the next orders.
+    return engine_target_data(new_order, side, ENGINE_TARGET_CELL, placement_data)
+
+
+def bulk_storage(new_order: dict, side: str, state: dict) -> dict | None:
+    return state['placements'].get((CLN_STORAGES, new_order[side]['placementId']))
+
+
+def bulk_check_source(
+        new_order: dict,
+        source_wheelstack_id: ObjectId | None,
+        state: dict,
+) -> HTTPException | dict:
+    """
+    Returns error (with status code of the single order creation), or `wheelstack` we're moving.
+    """
+    source: dict = new_order['source']
+    if PT_STORAGE == source['placementType']:
+        wheelstack_data: dict | None = state['wheelstacks'].get(source_wheelstack_id)
+        if wheelstack_data is None:
+            return HTTPException(
+                detail=f'`wheelstack` = {source_wheelstack_id}. Not Found.',
+                status_code=status.HTTP_404_NOT_FOUND,
+            )
+        if wheelstack_data['blocked']:
+            return HTTPException(
+                detail=f'`wheelstack` is already blocked by order = {wheelstack_data['lastOrder']}',
+                status_code=status.HTTP_403_FORBIDDEN,
+            )
+        storage_data: dict | None = bulk_storage(new_order, 'source', state)
+        if storage_data is None or source_wheelstack_id not in storage_data.get('elements', []):
+            return HTTPException(
+                detail=f'`wheelstack` exists but not placed in the `storage` = {source['placementId']}',
+                status_code=status.HTTP_404_NOT_FOUND,
+            )
+        return wheelstack_data
+    cell_data: dict | None = bulk_cell(new_order, 'source', state)
+    if cell_data is None:
+        return HTTPException(
+            detail='Source cell or placement doesnt exist. Not Found.',
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+    if cell_data['blocked'] or cell_data['blockedBy'] is not None:
+        return HTTPException(
+            detail=f'Source cell `blocked`. Placed order {cell_data['blockedBy']}',
+            status_code=status.HTTP_403_FORBIDDEN,
+        )
+    if cell_data['wheelStack'] is None:
+        return HTTPException(
+            detail='Source cell doesnt contain any `wheelStack` on it. Not Found.',
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+    wheelstack_data = state['wheelstacks'].get(cell_data['wheelStack'])
+    if wheelstack_data is None:
+        logger.error(
+            f'Corrupted cell: row = {source['rowPlacement']}, col = {source['columnPlacement']}'
+            f' in a {source['placementType']} with `objectId` = {source['placementId']}.'
+            f' There\'s non-existing `wheelStack` placed on it = {cell_data['wheelStack']}'
+        )
+        return HTTPException(
+            detail=(f'Corrupted cell: row = {source['rowPlacement']}, col = {source['columnPlacement']},'
+                    f' inform someone to fix it'),
+            status_code=status.HTTP_403_FORBIDDEN,
+        )
+    if wheelstack_data['blocked']:
+        return HTTPException(
+            detail=f'Source cell `wheelStack` blocked by other order = {wheelstack_data['lastOrder']}',
+            status_code=status.HTTP_403_FORBIDDEN,
+        )
+    return wheelstack_data
+
+
+def bulk_check_destination(
+        new_order: dict,
+        source_wheelstack: dict,
+        state: dict,
+) -> HTTPException | dict | None:
+    """
+    Returns error (with status code of the single order creation),
+     or `wheelstack` we're merging with (`None` for other orders).
+    """
+    destination: dict = new_order['destination']
+    if PT_STORAGE == destination['placementType']:
+        if bulk_storage(new_order, 'destination', state) is None:
+            return HTTPException(
+                detail=f'`storage` = {destination['placementId']}. Not Found.',
+                status_code=status.HTTP_404_NOT_FOUND,
+            )
+        return None
+    cell_data: dict | None = bulk_cell(new_order, 'destination', state)
+    if cell_data is None:
+        return HTTPException(
+            detail='Destination cell or placement doesnt exist. Not Found.',
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+    if cell_data['blocked'] or cell_data['blockedBy'] is not None:
+        return HTTPException(
+            detail=f'Destination cell is `blocked`. Placed order {cell_data['blockedBy']}',
+            status_code=status.HTTP_403_FORBIDDEN,
+        )
+    if ORDER_MERGE_WHEELSTACKS != new_order['orderType']:
+        if cell_data['wheelStack'] is not None:
+            return HTTPException(
+                detail='Destination cell already contains `wheelStack`',
+                status_code=status.HTTP_403_FORBIDDEN,
+            )
+        return None
+    if cell_data['wheelStack'] is None:
+        return HTTPException(
+            detail='Destination cell doesnt contain any wheelstack to merge with',
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+    wheelstack_data: dict | None = state['wheelstacks'].get(cell_data['wheelStack'])
+    if wheelstack_data is None:
+        return HTTPException(
+            detail=(f'Corrupted cell: row = {destination['rowPlacement']}, col = {destination['columnPlacement']},'
+                    f' inform someone to fix it'),
+            status_code=status.HTTP_403_FORBIDDEN,
+        )
+    if wheelstack_data['blocked']:
+        return HTTPException(
+            detail=f'Destination cell `wheelStack` blocked by other order = {wheelstack_data['lastOrder']}',
+            status_code=status.HTTP_403_FORBIDDEN,
+        )
+    if source_wheelstack['_id'] == wheelstack_data['_id']:
+        return HTTPException(
+            detail='Same `wheelstack` cant be used as source and dest',
+            status_code=status.HTTP_403_FORBIDDEN,
+        )
+    if source_wheelstack['batchNumber'] != wheelstack_data['batchNumber']:
+        return HTTPException(
+            detail='Target `wheelstack` wheels should be from the same `batch`. Have equal `batchNumber`s.',
+            status_code=status.HTTP_403_FORBIDDEN,
+        )
+    merged_wheels: int = len(source_wheelstack['wheels']) + len(wheelstack_data['wheels'])
+    if merged_wheels > wheelstack_data.get('maxSize', WS_MAX_WHEELS):
+        return HTTPException(
+            detail='Merged wheelstack should be able to contain all wheels from both `wheelstack`s',
+            status_code=status.HTTP_403_FORBIDDEN,
+        )
+    return wheelstack_data
+
+
+def bulk_move_preconditions(
+        new_order: dict,
+        source_wheelstack_id: ObjectId | None,
+        state: dict,
+) -> HTTPException | tuple[dict, dict | None]:
+    """
+    Checks `new_order` against the gathered `state`, without changing it.
+    Returns error, or source and destination (`None` for other than merge) `wheelstack`s.
+    """
+    route_error: HTTPException | None = bulk_move_route_error(new_order, source_wheelstack_id)
+    if route_error is not None:
+        return route_error
+    source_wheelstack: HTTPException | dict = bulk_check_source(new_order, source_wheelstack_id, state)
+    if isinstance(source_wheelstack, HTTPException):
+        return source_wheelstack
+    destination_wheelstack: HTTPException | dict | None = bulk_check_destination(new_order, source_wheelstack, state)
+    if isinstance(destination_wheelstack, HTTPException):
+        return destination_wheelstack
+    return source_wheelstack, destination_wheelstack
+
+
+def bulk_move_check(
+        new_order: dict,
+        source_wheelstack_id: ObjectId | None,
+        state: dict,
+) -> HTTPException | None:
+    """
+    Validates `new_order` against the gathered `state`.
+    Valid order is completed with affected `wheelstack`s|wheels, and blocks them with its cells in the `state`.
+    """
+    checked: HTTPException | tuple[dict, dict | None] = bulk_move_preconditions(
+        new_order, source_wheelstack_id, state
+    )
+    if isinstance(checked, HTTPException):
+        return checked
+    source_wheelstack, destination_wheelstack = checked
+    new_order['affectedWheelStacks'] = {
+        'source': source_wheelstack['_id'],
+        'destination': destination_wheelstack['_id'] if destination_wheelstack else None,
+    }
+    new_order['affectedWheels'] = {
+        'source': list(source_wheelstack['wheels']),
+        'destination': list(destination_wheelstack['wheels']) if destination_wheelstack else [],
+    }
+    for side in ('source', 'destination'):
+        if PT_STORAGE == new_order[side]['placementType']:
+            continue
+        cell_data: dict = bulk_cell(new_order, side, state)
+        cell_data['blocked'] = True
+        cell_data['blockedBy'] = new_order['_id']
+    for wheelstack_data in (source_wheelstack, destination_wheelstack):
+        if wheelstack_data is None:
+            continue
+        wheelstack_data['blocked'] = True
+        wheelstack_data['lastOrder'] = new_order['_id']
+    return None
+
+
+async def bulk_move_read(
+        new_orders: list[tuple[dict, ObjectId | None]],
+        db: AsyncIOMotorClient,
+) -> dict:
+    """
+    Gathers every placement of `new_orders` once, with cells used by them,
+     and every `wheelstack` placed in these cells or chosen in `storage`s.
+    """
+    loaders: DataLoaders = DataLoaders(db)
+    # { collection: { placement_id: fields } }
+    placements_fields: dict[str, dict[ObjectId, set[str]]] = {}
+    storage_wheelstacks: list[ObjectId] = []
+    for new_order, source_wheelstack_id in new_orders:
+        for side in ('source', 'destination'):
+            placement_type: str = new_order[side]['placementType']
+            placement_fields: set[str] = placements_fields.setdefault(
+                PLACEMENT_COLLECTIONS[placement_type], {}
+            ).setdefault(new_order[side]['placementId'], set())
+            if PT_STORAGE == placement_type:
+                placement_fields.add('elements')
+            else:
+                placement_fields.add(engine_target_field(new_order, side, ENGINE_TARGET_CELL))
+        if source_wheelstack_id is not None:
+            storage_wheelstacks.append(source_wheelstack_id)
+    placements_tasks = [
+        db_get_placements_fields(
+            list(placements.keys()),
+            sorted({field for fields in placements.values() for field in fields}),
+            db, DB_PMK_NAME, placement_collection
+        )
+        for placement_collection, placements in placements_fields.items()
+    ]
+    placements_results, _ = await asyncio.gather(
+        asyncio.gather(*placements_tasks),
+        loaders.wheelstacks.load_many(storage_wheelstacks),
+    )
+    state: dict = {
+        # { (collection, placement_id): placement_data }
+        'placements': {},
+        # { wheelstack_id: wheelstack_data }
+        'wheelstacks': {},
+    }
+    for placement_collection, collection_placements in zip(placements_fields, placements_results):
+        for placement_id, placement_data in collection_placements.items():
+            state['placements'][(placement_collection, placement_id)] = placement_data
+    wheelstacks: list[ObjectId] = list(storage_wheelstacks)
+    for new_order, _ in new_orders:
+        for side in ('source', 'destination'):
+            if PT_STORAGE == new_order[side]['placementType']:
+                continue
+            cell_data: dict | None = bulk_cell(new_order, side, state)
+            if cell_data is not None and cell_data.get('wheelStack') is not None:
+                wheelstacks.append(cell_data['wheelStack'])
+    wheelstacks = list(dict.fromkeys(wheelstacks))
+    # Storage `wheelstack`s are already loaded, `load_many` reuses them.
+    wheelstacks_data: list[dict | None] = await loaders.wheelstacks.load_many(wheelstacks)
+    for wheelstack_id, wheelstack_data in zip(wheelstacks, wheelstacks_data):
+        if wheelstack_data is not None:
+            state['wheelstacks'][wheelstack_id] = wheelstack_data
+    return state
+
+
+def bulk_move_changes(new_orders: list[dict]) -> dict:
+    """
+    Collects every change of `new_orders`, every placement is changed once with cells of all the orders.
+    """
+    changes: dict = {
+        # { (collection, placement_id): { field: value } }
+        'placements': {},
+        # { (collection, placement_id): { field: value } } <- cells as they were validated
+        'expected': {},
+        # { (collection, placement_id): { field: value } } <- changed fields, while cells are ours
+        'claimed': {},
+        'storages': set(),
+        # { wheelstack_id: { field: value } }
+        'wheelstacks': {},
+    }
+    for new_order in new_orders:
+        for side in ('source', 'destination'):
+            placement_type: str = new_order[side]['placementType']
+            placement_id: ObjectId = new_order[side]['placementId']
+            if PT_STORAGE == placement_type:
+                changes['storages'].add(placement_id)
+                continue
+            cell_field: str = engine_target_field(new_order, side, ENGINE_TARGET_CELL)
+            placement_key: tuple[str, ObjectId] = (PLACEMENT_COLLECTIONS[placement_type], placement_id)
+            placement_update: dict = changes['placements'].setdefault(placement_key, {})
+            placement_update[f'{cell_field}.wheelStack'] = new_order['affectedWheelStacks'][side]
+            placement_update[f'{cell_field}.blocked'] = True
+            placement_update[f'{cell_field}.blockedBy'] = new_order['_id']
+            placement_expected: dict = changes['expected'].setdefault(placement_key, {})
+            placement_expected[f'{cell_field}.wheelStack'] = new_order['affectedWheelStacks'][side]
+            placement_expected[f'{cell_field}.blocked'] = False
+            placement_expected[f'{cell_field}.blockedBy'] = None
+            changes['claimed'].setdefault(placement_key, {})[f'{cell_field}.blockedBy'] = new_order['_id']
+        for wheelstack_id in new_order['affectedWheelStacks'].values():
+            if wheelstack_id is None:
+                continue
+            changes['wheelstacks'][wheelstack_id] = {
+                'blocked': True,
+                'lastOrder': new_order['_id'],
+            }
+    return changes
+
+
+def bulk_move_optimistic(new_orders: list[dict]) -> bool:
+    """
+    Orders can be created without a transaction, if every affected `wheelstack` is placed in their cells.
+    Claimed cells guard these `wheelstack`s, no one else can use them until cells are released.
+    `wheelstack`s chosen in `storage`s don't have such guard.
+    """
+    if not ORDERS_BULK_OPTIMISTIC:
+        return False
+    return all(PT_STORAGE != new_order['source']['placementType'] for new_order in new_orders)
+
+
+async def bulk_move_release(changes: dict, placements: list[tuple[str, ObjectId]], db: AsyncIOMotorClient) -> None:
+    """
+    Unblocks cells of `placements`, only the ones still blocked by our orders.
+    """
+    release_tasks = []
+    for placement_key in placements:
+        placement_collection, placement_id = placement_key
+        claimed: dict = changes['claimed'][placement_key]
+        cells_fields: dict = {}
+        for blocked_by_field in claimed:
+            cell_field: str = blocked_by_field.removesuffix('.blockedBy')
+            cells_fields[f'{cell_field}.blocked'] = False
+            cells_fields[f'{cell_field}.blockedBy'] = None
+        release_tasks.append(
+            db_update_placement_cells(
+                placement_id, cells_fields, db, DB_PMK_NAME, placement_collection, None, claimed
+            )
+        )
+    await asyncio.gather(*release_tasks, return_exceptions=True)
+
+
+async def bulk_move_write_optimistic(new_orders: list[dict], changes: dict, db: AsyncIOMotorClient) -> None:
+    """
+    Claims cells of `new_orders` with conditional updates, and only then creates orders.
+    Nothing is written if any cell was changed after validation,
+     and claimed cells are released if anything fails after the claim.
+    """
+    placements: list[tuple[str, ObjectId]] = list(changes['placements'])
+    claims = await asyncio.gather(
+        *[
+            db_update_placement_cells(
+                placement_id, changes['placements'][(placement_collection, placement_id)],
+                db, DB_PMK_NAME, placement_collection, None,
+                changes['expected'][(placement_collection, placement_id)]
+            )
+            for placement_collection, placement_id in placements
+        ],
+        return_exceptions=True,
+    )
+    claimed: list[tuple[str, ObjectId]] = [
+        placement_key for placement_key, claim in zip(placements, claims) if claim is True
+    ]
+    if len(claimed) != len(placements):
+        await bulk_move_release(changes, claimed, db)
+        for claim in claims:
+            if isinstance(claim, HTTPException):
+                raise claim
+        raise HTTPException(
+            detail='Cells of the orders were changed by other operation, try again',
+            status_code=status.HTTP_409_CONFLICT,
+        )
+    write_tasks = [
+        db_create_orders_many(
+            new_orders, db, DB_PMK_NAME, CLN_ACTIVE_ORDERS
+        )
+    ]
+    for wheelstack_id, wheelstack_update in changes['wheelstacks'].items():
+        write_tasks.append(
+            db_update_wheelstack(
+                wheelstack_update, wheelstack_id, db, DB_PMK_NAME, CLN_WHEELSTACKS
+            )
+        )
+    if changes['storages']:
+        write_tasks.append(
+            db_update_storage_last_change(
+                [{'_id': storage_id} for storage_id in changes['storages']],
+                db, DB_PMK_NAME, CLN_STORAGES
+            )
+        )
+    results = await asyncio.gather(*write_tasks, return_exceptions=True)
+    errors: list[BaseException] = [result for result in results if isinstance(result, BaseException)]
+    if not errors:
+        return
+    # Rolling back everything we've done, `wheelstack`s are guarded by our cells until they're released.
+    await asyncio.gather(
+        db_delete_orders_many(
+            [new_order['_id'] for new_order in new_orders], db, DB_PMK_NAME, CLN_ACTIVE_ORDERS
+        ),
+        *[
+            db_update_wheelstack(
+                {'blocked': False}, wheelstack_id, db, DB_PMK_NAME, CLN_WHEELSTACKS
+            )
+            for wheelstack_id in changes['wheelstacks']
+        ],
+        return_exceptions=True,
+    )
+    await bulk_move_release(changes, claimed, db)
+    raise errors[0]
+
+
+async def bulk_move_write(new_orders: list[dict], db: AsyncIOMotorClient) -> None:
+    """
+    Creates every order of `new_orders`, with a single transaction or with claimed cells (`bulk_move_optimistic`).
+    Every changed placement is updated once, with cells of all the orders,
+     and only if these cells weren't changed after validation.
+    """
+    changes: dict = bulk_move_changes(new_orders)
+    if bulk_move_optimistic(new_orders):
+        await bulk_move_write_optimistic(new_orders, changes, db)
+        return
+    async with (await db.start_session()) as session:
+        async with session.start_transaction():
+            transaction_tasks = [
+                db_create_orders_many(
+                    new_orders, db, DB_PMK_NAME, CLN_ACTIVE_ORDERS, session
+                )
+            ]
+            for (placement_collection, placement_id), cells_fields in changes['placements'].items():
+                transaction_tasks.append(
+                    engine_update_placement(
+                        placement_collection, placement_id, cells_fields,
+                        changes['expected'][(placement_collection, placement_id)], db, session
+                    )
+                )
+            for wheelstack_id, wheelstack_update in changes['wheelstacks'].items():
+                transaction_tasks.append(
+                    db_update_wheelstack(
+                        wheelstack_update, wheelstack_id, db, DB_PMK_NAME, CLN_WHEELSTACKS, session
+                    )
+                )
+            if changes['storages']:
+                transaction_tasks.append(
+                    db_update_storage_last_change(
+                        [{'_id': storage_id} for storage_id in changes['storages']],
+                        db, DB_PMK_NAME, CLN_STORAGES, session
+                    )
+                )
+            await asyncio.gather(*transaction_tasks)
+
+
+async def orders_bulk_create_moves(
+        orders_data: list[dict],
+        db: AsyncIOMotorClient,
+) -> tuple[list[dict], set[tuple[ObjectId, str]]]:
+    """
+    Creates every move order of `orders_data`.
+    Returns outcome of every order, in the same order as requested, and every placement changed by them.
+    """
+    logger.info(f'Attempt to create {len(orders_data)} move orders')
+    outcomes: list[dict] = [
+        {
+            'index': index,
+            '_id': None,
+            'status': ORDERS_BULK_FAILED,
+            'detail': None,
+            # Status code the single order creation responds with, only for failed orders.
+            'statusCode': None,
+        }
+        for index in range(len(orders_data))
+    ]
+    # [ (index, new_order, source_wheelstack_id) ]
+    new_orders: list[tuple[int, dict, ObjectId | None]] = []
+    for index, order_data in enumerate(orders_data):
+        try:
+            new_order, source_wheelstack_id = await bulk_move_order(order_data)
+        except HTTPException as error:
+            outcomes[index]['detail'] = error.detail
+            outcomes[index]['statusCode'] = error.status_code
+            continue
+        new_orders.append((index, new_order, source_wheelstack_id))
+    state: dict = await bulk_move_read(
+        [(new_order, source_wheelstack_id) for _, new_order, source_wheelstack_id in new_orders], db
+    )
+    creation_time = await time_w_timezone()
+    # { order_id: (index, new_order) }
+    valid_orders: dict[ObjectId, tuple[int, dict]] = {}
+    for index, new_order, source_wheelstack_id in new_orders:
+        error: HTTPException | None = bulk_move_check(new_order, source_wheelstack_id, state)
+        if error is not None:
+            outcomes[index]['detail'] = error.detail
+            outcomes[index]['statusCode'] = error.status_code
+            continue
+        new_order['createdAt'] = creation_time
+        new_order['lastUpdated'] = creation_time
+        valid_orders[new_order['_id']] = (index, new_order)
+
+    async def create_group(group: list[ObjectId]) -> None:
+        try:
+            await bulk_move_write([valid_orders[order_id][1] for order_id in group], db)
+        except (HTTPException, PyMongoError) as error:
+            detail: str = getattr(error, 'detail', str(error))
+            status_code: int = getattr(error, 'status_code', status.HTTP_500_INTERNAL_SERVER_ERROR)
+            logger.error(f'Error while trying to create orders => {group} | ERROR: {detail}')
+            for order_id in group:
+                outcomes[valid_orders[order_id][0]]['detail'] = detail
+                outcomes[valid_orders[order_id][0]]['statusCode'] = status_code
+            return
+        for order_id in group:
+            outcome: dict = outcomes[valid_orders[order_id][0]]
+            outcome['_id'] = order_id
+            outcome['status'] = ORDERS_BULK_CREATED
+
+    groups: list[list[ObjectId]] = orders_conflict_groups(
+        {order_id: order_placement_keys(new_order) for order_id, (_, new_order) in valid_orders.items()}
+    )
+    await asyncio.gather(*[create_group(group) for group in groups])
+    changed_placements: set[tuple[ObjectId, str]] = set()
+    for order_id, (index, new_order) in valid_orders.items():
+        if ORDERS_BULK_CREATED == outcomes[index]['status']:
+            changed_placements.update(order_placements(new_order))
+    logger.info(
+        f'End of bulk creation | Orders: {len(orders_data)} | Groups: {len(groups)}'
+        f' | Created: {sum(1 for outcome in outcomes if ORDERS_BULK_CREATED == outcome['status'])}'
+    )
+    return outcomes, changed_placements
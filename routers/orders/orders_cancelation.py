@@ -3,6 +3,7 @@ from bson import ObjectId
 from loguru import logger
 from fastapi import HTTPException, status
 from utility.utilities import time_w_timezone
+from utility.batch_loader import DataLoaders
 from motor.motor_asyncio import AsyncIOMotorClient
 from routers.storages.crud import db_update_storage_last_change
 from routers.orders.crud import db_delete_order, db_create_order
@@ -570,17 +571,15 @@ async def orders_cancel_merge_wheelstacks(
     order_data['lastUpdated'] = cancellation_time
     source_wheelstack_id: ObjectId = order_data['affectedWheelStacks']['source']
     destination_wheelstack_id: ObjectId = order_data['affectedWheelStacks']['destination']
+    # Both `wheelstack`s with a single query.
+    loaders = DataLoaders(db)
     wheelstacks_data_tasks = []
     # 0 - source wheelstack | 1 - dest wheelstack
     wheelstacks_data_tasks.append(
-        db_find_wheelstack_by_object_id(
-            source_wheelstack_id, db, DB_PMK_NAME, CLN_WHEELSTACKS
-        )
+        loaders.wheelstacks.load(source_wheelstack_id)
     )
     wheelstacks_data_tasks.append(
-        db_find_wheelstack_by_object_id(
-            destination_wheelstack_id, db, DB_PMK_NAME, CLN_WHEELSTACKS
-        )
+        loaders.wheelstacks.load(destination_wheelstack_id)
     )
     data_result = await asyncio.gather(*wheelstacks_data_tasks)
     async def validate_wheelstack(order_data: dict, wheelstack_data: dict) -> None:
@@ -1,9 +1,11 @@
 import asyncio
 from loguru import logger
 from bson import ObjectId
+from datetime import datetime
 from fastapi import HTTPException, status
 from routers.batch_numbers.crud import db_insert_test_wheel
 from utility.utilities import time_w_timezone, get_object_id
+from utility.batch_loader import DataLoaders
 from routers.orders.crud import db_delete_order, db_create_order
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorClientSession
 from routers.base_platform.crud import db_get_platform_cell_data, db_update_platform_cell_data
@@ -14,6 +16,7 @@ from routers.storages.crud import (
     db_storage_delete_placed_wheelstack
 )
 from routers.wheels.crud import (
+    db_insert_wheel_movements,
     db_update_wheel_status,
     db_update_wheel_position,
     db_find_wheel_by_object_id,
@@ -49,10 +52,64 @@ from constants import (
     PS_LABORATORY,
     CLN_STORAGES,
     PS_STORAGE,
-    PS_BASE_PLATFORM
+    PS_BASE_PLATFORM,
+    CLN_WHEEL_MOVEMENTS,
 )
 
 
+def order_wheel_movements(
+        order_data: dict,
+        wheels: list[ObjectId],
+        moved_at: datetime,
+        from_wheelstack: ObjectId | None,
+        to_wheelstack: ObjectId | None,
+) -> list[dict]:
+    """
+    Creates `wheelMovements` records for every `wheel` moved by the completed order.
+    """
+    return [
+        {
+            'wheel': wheel,
+            'movedAt': moved_at,
+            'orderId': order_data['_id'],
+            'orderType': order_data['orderType'],
+            'from': {
+                'placementType': order_data['source']['placementType'],
+                'placementId': order_data['source']['placementId'],
+                'rowPlacement': order_data['source']['rowPlacement'],
+                'columnPlacement': order_data['source']['columnPlacement'],
+                'wheelStack': from_wheelstack,
+            },
+            'to': {
+                'placementType': order_data['destination']['placementType'],
+                'placementId': order_data['destination']['placementId'],
+                'rowPlacement': order_data['destination']['rowPlacement'],
+                'columnPlacement': order_data['destination']['columnPlacement'],
+                'wheelStack': to_wheelstack,
+            },
+        }
+        for wheel in wheels
+    ]
+
+
+def order_wheel_movements_task(
+        order_data: dict,
+        wheels: list[ObjectId],
+        completion_time: datetime,
+        from_wheelstack: ObjectId | None,
+        to_wheelstack: ObjectId | None,
+        db: AsyncIOMotorClient,
+        session: AsyncIOMotorClientSession,
+):
+    """
+    Insert of `wheelMovements` records of the completed order, added to the tasks of its transaction.
+    """
+    return db_insert_wheel_movements(
+        order_wheel_movements(order_data, wheels, completion_time, from_wheelstack, to_wheelstack),
+        db, DB_PMK_NAME, CLN_WHEEL_MOVEMENTS, session
+    )
+
+
 async def orders_complete_move_wholestack(order_data: dict, db: AsyncIOMotorClient) -> ObjectId:
     # Source can be a `grid` and `basePlatform`.
     # -1- Check if source cell exists and correct `wheelStack` on it
@@ -196,6 +253,12 @@ async def orders_complete_move_wholestack(order_data: dict, db: AsyncIOMotorClie
             order_data['status'] = ORDER_STATUS_COMPLETED
             order_data['lastUpdated'] = completion_time
             order_data['completedAt'] = completion_time
+            transaction_tasks.append(
+                order_wheel_movements_task(
+                    order_data, order_data['affectedWheels']['source'], completion_time,
+                    source_wheelstack_data['_id'], source_wheelstack_data['_id'], db, session
+                )
+            )
             transaction_tasks.append(
                 db_create_order(
                     order_data, db, DB_PMK_NAME, CLN_COMPLETED_ORDERS, session
@@ -324,6 +387,12 @@ async def orders_complete_move_to_processing(order_data: dict, db: AsyncIOMotorC
             order_data['status'] = ORDER_STATUS_COMPLETED
             order_data['lastUpdated'] = completion_time
             order_data['completedAt'] = completion_time
+            transaction_tasks.append(
+                order_wheel_movements_task(
+                    order_data, order_data['affectedWheels']['source'], completion_time,
+                    source_wheelstack_data['_id'], source_wheelstack_data['_id'], db, session
+                )
+            )
             transaction_tasks.append(
                 db_create_order(
                     order_data, db, DB_PMK_NAME, CLN_COMPLETED_ORDERS, session
@@ -450,6 +519,12 @@ async def orders_complete_move_to_rejected(order_data: dict, db: AsyncIOMotorCli
             order_data['status'] = ORDER_STATUS_COMPLETED
             order_data['lastUpdated'] = completion_time
             order_data['completedAt'] = completion_time
+            transaction_tasks.append(
+                order_wheel_movements_task(
+                    order_data, order_data['affectedWheels']['source'], completion_time,
+                    source_wheelstack_data['_id'], source_wheelstack_data['_id'], db, session
+                )
+            )
             transaction_tasks.append(
                 db_create_order(
                     order_data, db, DB_PMK_NAME, CLN_COMPLETED_ORDERS, session
@@ -611,6 +686,12 @@ async def orders_complete_move_to_laboratory(order_data: dict, db: AsyncIOMotorC
             order_data['status'] = ORDER_STATUS_COMPLETED
             order_data['lastUpdated'] = completion_time
             order_data['completedAt'] = completion_time
+            transaction_tasks.append(
+                order_wheel_movements_task(
+                    order_data, [lab_wheel], completion_time,
+                    source_wheelstack_data['_id'], None, db, session
+                )
+            )
             transaction_tasks.append(
                 db_create_order(
                     order_data, db, DB_PMK_NAME, CLN_COMPLETED_ORDERS, session
@@ -736,6 +817,12 @@ async def orders_complete_move_to_storage(
                     db, DB_PMK_NAME, CLN_STORAGES, session
                 )
             )
+            transaction_tasks.append(
+                order_wheel_movements_task(
+                    order_data, order_data['affectedWheels']['source'], completion_time,
+                    source_wheelstack_data['_id'], source_wheelstack_data['_id'], db, session
+                )
+            )
             transaction_tasks.append(
                 db_create_order(
                     order_data, db, DB_PMK_NAME, CLN_COMPLETED_ORDERS, session
@@ -834,6 +921,12 @@ async def orders_complete_move_wholestack_from_storage(
                     order_data['_id'], db, DB_PMK_NAME, CLN_ACTIVE_ORDERS, session
                 )
             )
+            transaction_tasks.append(
+                order_wheel_movements_task(
+                    order_data, source_wheelstack_data['wheels'], completion_time,
+                    source_wheelstack_data['_id'], source_wheelstack_data['_id'], db, session
+                )
+            )
             transaction_tasks.append(
                 db_create_order(
                     order_data, db, DB_PMK_NAME, CLN_COMPLETED_ORDERS, session
@@ -922,6 +1015,12 @@ async def orders_complete_move_to_pro_rej_from_storage(
             order_data['status'] = ORDER_STATUS_COMPLETED
             order_data['lastUpdated'] = completion_time
             order_data['completedAt'] = completion_time
+            transaction_tasks.append(
+                order_wheel_movements_task(
+                    order_data, source_wheelstack_data['wheels'], completion_time,
+                    source_wheelstack_data['_id'], source_wheelstack_data['_id'], db, session
+                )
+            )
             transaction_tasks.append(
                 db_create_order(
                     order_data, db, DB_PMK_NAME, CLN_COMPLETED_ORDERS, session
@@ -983,6 +1082,12 @@ async def orders_complete_move_from_storage_to_storage(
                     source_wheelstack_data, source_wheelstack_data['_id'], db, DB_PMK_NAME, CLN_WHEELSTACKS, session,
                 )
             )
+            transaction_tasks.append(
+                order_wheel_movements_task(
+                    order_data, source_wheelstack_data['wheels'], completion_time,
+                    source_wheelstack_data['_id'], source_wheelstack_data['_id'], db, session
+                )
+            )
             transaction_tasks.append(
                 db_create_order(
                     order_data, db, DB_PMK_NAME, CLN_COMPLETED_ORDERS, session
@@ -1079,6 +1184,12 @@ async def orders_complete_move_from_storage_to_lab(
                 )
             )
             # endregion labRebuild
+            transaction_tasks.append(
+                order_wheel_movements_task(
+                    order_data, [chosen_wheel_id], completion_time,
+                    source_wheelstack_data['_id'], None, db, session
+                )
+            )
             transaction_tasks.append(
                 db_create_order(
                     order_data, db, DB_PMK_NAME, CLN_COMPLETED_ORDERS, session,
@@ -1300,16 +1411,14 @@ async def orders_complete_merge_wheelstacks(
     # + Gather source|dest wheelstacks data +
     source_wheelstack_id: ObjectId = order_data['affectedWheelStacks']['source']
     destination_wheelstack_id: ObjectId = order_data['affectedWheelStacks']['destination']
+    # Both `wheelstack`s with a single query.
+    loaders = DataLoaders(db)
     wheelstacks_data_tasks = []
     wheelstacks_data_tasks.append(
-        db_find_wheelstack_by_object_id(
-            source_wheelstack_id, db, DB_PMK_NAME, CLN_WHEELSTACKS
-        )
+        loaders.wheelstacks.load(source_wheelstack_id)
     )
     wheelstacks_data_tasks.append(
-        db_find_wheelstack_by_object_id(
-            destination_wheelstack_id, db, DB_PMK_NAME, CLN_WHEELSTACKS
-        )
+        loaders.wheelstacks.load(destination_wheelstack_id)
     )
     wheelstacks_data_results = await asyncio.gather(*wheelstacks_data_tasks)
     # - Gather source|dest wheelstacks data -
@@ -1414,6 +1523,12 @@ async def orders_complete_merge_wheelstacks(
             order_data['status'] = ORDER_STATUS_COMPLETED
             order_data['lastUpdated'] = completion_time
             order_data['completedAt'] = completion_time
+            transaction_tasks.append(
+                order_wheel_movements_task(
+                    order_data, source_wheelstack_data['wheels'], completion_time,
+                    source_wheelstack_id, destination_wheelstack_id, db, session
+                )
+            )
             transaction_tasks.append(
                 db_create_order(
                     order_data, db, DB_PMK_NAME, CLN_COMPLETED_ORDERS, session
@@ -69,6 +69,18 @@ from constants import (
 #  Literal CtrlC+V fiesta, but doesnt have time to make them universal.
 #  Just brute_forcing...
 
+async def orders_creation_check_conflicts(transaction_results: list) -> None:
+    """
+    Raises if any update of the transaction matched nothing,
+     e.g. cell was taken by other order after our checks. Aborts the whole transaction.
+    """
+    if any(0 == result.matched_count for result in transaction_results):
+        raise HTTPException(
+            detail='Order placements were changed by other operation, try again',
+            status_code=status.HTTP_409_CONFLICT,
+        )
+
+
 async def orders_create_move_whole_wheelstack(db: AsyncIOMotorClient, order_data: dict) -> ObjectId:
     # SOURCE:
     #  1. SourcePlacement EXISTS
@@ -180,6 +192,17 @@ async def orders_create_move_whole_wheelstack(db: AsyncIOMotorClient, order_data
             created_order_id: ObjectId = created_order.inserted_id
             # Order Creation ---
             transaction_tasks = []
+            # Cells are only changed if they're still in the state we've checked.
+            source_expected: dict = {
+                'wheelStack': source_wheelstack_data['_id'],
+                'blocked': False,
+                'blockedBy': None,
+            }
+            destination_expected: dict = {
+                'wheelStack': None,
+                'blocked': False,
+                'blockedBy': None,
+            }
             # We need to change in SOURCE:
             #  1. SourceCell should be `blocked` and `order` `objectId` placed in `blockedBy`.
             #  2. SourceWheelstack should be `blocked` and `order` `objectId` placed in `blockedBy`
@@ -194,14 +217,14 @@ async def orders_create_move_whole_wheelstack(db: AsyncIOMotorClient, order_data
                 transaction_tasks.append(
                     db_update_grid_cell_data(
                         source_id, source_row, source_col, new_source_cell_data,
-                        db, DB_PMK_NAME, CLN_GRID, session, record_change
+                        db, DB_PMK_NAME, CLN_GRID, session, record_change, source_expected
                     )
                 )
             elif PRES_TYPE_PLATFORM == source_type:
                 transaction_tasks.append(
                     db_update_platform_cell_data(
                         source_id, source_row, source_col, new_source_cell_data,
-                        db, DB_PMK_NAME, CLN_BASE_PLATFORM, session, True
+                        db, DB_PMK_NAME, CLN_BASE_PLATFORM, session, True, source_expected
                     )
                 )
             source_wheelstack_data['blocked'] = True
@@ -221,11 +244,12 @@ async def orders_create_move_whole_wheelstack(db: AsyncIOMotorClient, order_data
             transaction_tasks.append(
                 db_update_grid_cell_data(
                     destination_id, destination_row, destination_col,
-                    destination_cell_data, db, DB_PMK_NAME, CLN_GRID, session, True
+                    destination_cell_data, db, DB_PMK_NAME, CLN_GRID, session, True, destination_expected
                 )
             )
             # Destination change ---
             transaction_tasks_results = await asyncio.gather(*transaction_tasks)
+            await orders_creation_check_conflicts(transaction_tasks_results)
             return created_order_id
 
 
@@ -380,6 +404,17 @@ async def orders_create_merge_wheelstacks(db: AsyncIOMotorClient, order_data: di
             created_order_id: ObjectId = created_order.inserted_id
             # Order Creation ---
             transaction_tasks = []
+            # Cells are only changed if they're still in the state we've checked.
+            source_expected: dict = {
+                'wheelStack': source_wheelstack_data['_id'],
+                'blocked': False,
+                'blockedBy': None,
+            }
+            destination_expected: dict = {
+                'wheelStack': destination_wheelstack_data['_id'],
+                'blocked': False,
+                'blockedBy': None,
+            }
             # We need to change in SOURCE:
             #  1. SourceCell should be `blocked` and `order` `objectId` placed in `blockedBy`.
             #  2. SourceWheelstack should be `blocked` and `order` `objectId` placed in `blockedBy`
@@ -394,14 +429,14 @@ async def orders_create_merge_wheelstacks(db: AsyncIOMotorClient, order_data: di
                 transaction_tasks.append(
                     db_update_grid_cell_data(
                         source_id, source_row, source_col, new_source_cell_data,
-                        db, DB_PMK_NAME, CLN_GRID, session, record_change
+                        db, DB_PMK_NAME, CLN_GRID, session, record_change, source_expected
                     )
                 )
             elif PRES_TYPE_PLATFORM == source_type:
                 transaction_tasks.append(
                     db_update_platform_cell_data(
                         source_id, source_row, source_col, new_source_cell_data,
-                        db, DB_PMK_NAME, CLN_BASE_PLATFORM, session, True
+                        db, DB_PMK_NAME, CLN_BASE_PLATFORM, session, True, source_expected
                     )
                 )
             source_wheelstack_data['blocked'] = True
@@ -421,7 +456,7 @@ async def orders_create_merge_wheelstacks(db: AsyncIOMotorClient, order_data: di
             transaction_tasks.append(
                 db_update_grid_cell_data(
                     destination_id, destination_row, destination_col,
-                    destination_cell_data, db, DB_PMK_NAME, CLN_GRID, session, True
+                    destination_cell_data, db, DB_PMK_NAME, CLN_GRID, session, True, destination_expected
                 )
             )
             destination_wheelstack_data['blocked'] = True
@@ -433,6 +468,7 @@ async def orders_create_merge_wheelstacks(db: AsyncIOMotorClient, order_data: di
             )
             # Destination change ---
             transaction_tasks_results = await asyncio.gather(*transaction_tasks)
+            await orders_creation_check_conflicts(transaction_tasks_results)
             return created_order_id
 
 
@@ -0,0 +1,265 @@
+import asyncio
+from bson import ObjectId
+from loguru import logger
+from pymongo.errors import PyMongoError
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorClient
+from routers.orders.crud import db_get_orders_by_id_many
+from routers.orders.orders_engine import (
+    order_engine_spec,
+    order_engine_run,
+    order_engine_read_many,
+    order_engine_check,
+    order_engine_plan,
+    order_engine_merge_plans,
+    order_engine_plan_keys,
+    order_engine_write,
+)
+from routers.orders.orders_completion import (
+    orders_complete_merge_wheelstacks,
+    orders_complete_move_wholestack,
+    orders_complete_move_to_rejected,
+    orders_complete_move_to_processing,
+    orders_complete_move_to_laboratory,
+    orders_complete_move_to_storage,
+    orders_complete_move_wholestack_from_storage,
+    orders_complete_move_to_pro_rej_from_storage,
+    orders_complete_move_from_storage_to_storage,
+    orders_complete_move_from_storage_to_lab,
+)
+from routers.orders.orders_cancelation import (
+    orders_cancel_basic_extra_element_moves,
+    orders_cancel_merge_wheelstacks,
+    orders_cancel_move_wholestack,
+    orders_cancel_move_to_storage,
+    orders_cancel_move_from_storage_to_grid,
+    orders_cancel_move_from_storage_to_extras,
+    orders_cancel_move_from_storage_to_storage,
+)
+from constants import (
+    DB_PMK_NAME,
+    CLN_ACTIVE_ORDERS,
+    PLACEMENT_COLLECTIONS,
+    BASIC_EXTRA_MOVES,
+    PS_STORAGE,
+    ORDER_MERGE_WHEELSTACKS,
+    ORDER_MOVE_WHOLE_STACK,
+    ORDER_MOVE_TO_LABORATORY,
+    ORDER_MOVE_TO_PROCESSING,
+    ORDER_MOVE_TO_REJECTED,
+    ORDER_MOVE_TO_STORAGE,
+    ORDER_STATUS_COMPLETED,
+    ORDER_STATUS_CANCELED,
+    ORDER_ACTION_COMPLETE,
+    ORDER_ACTION_CANCEL,
+    ORDERS_BULK_NOT_FOUND,
+    ORDERS_BULK_FAILED,
+)
+
+
+async def orders_complete_dispatch(order_data: dict, db: AsyncIOMotorClient) -> ObjectId | None:
+    engine_spec: dict | None = order_engine_spec(ORDER_ACTION_COMPLETE, order_data)
+    if engine_spec is not None:
+        return await order_engine_run(engine_spec, order_data, db)
+    result: ObjectId | None = None
+    if order_data['orderType'] == ORDER_MOVE_WHOLE_STACK:
+        if PS_STORAGE == order_data['source']['placementType']:
+            result = await orders_complete_move_wholestack_from_storage(order_data, db)
+        else:
+            result = await orders_complete_move_wholestack(order_data, db)
+    elif order_data['orderType'] == ORDER_MOVE_TO_PROCESSING:
+        if PS_STORAGE == order_data['source']['placementType']:
+            result = await orders_complete_move_to_pro_rej_from_storage(db, order_data, True)
+        else:
+            result = await orders_complete_move_to_processing(order_data, db)
+    elif order_data['orderType'] == ORDER_MOVE_TO_REJECTED:
+        if PS_STORAGE == order_data['source']['placementType']:
+            result = await orders_complete_move_to_pro_rej_from_storage(db, order_data, False)
+        else:
+            result = await orders_complete_move_to_rejected(order_data, db)
+    elif order_data['orderType'] == ORDER_MOVE_TO_LABORATORY:
+        if PS_STORAGE == order_data['source']['placementType']:
+            result = await orders_complete_move_from_storage_to_lab(order_data, db)
+        else:
+            result = await orders_complete_move_to_laboratory(order_data, db)
+    elif order_data['orderType'] == ORDER_MOVE_TO_STORAGE:
+        if (order_data['source']['placementType'] == PS_STORAGE
+                and order_data['destination']['placementType'] == PS_STORAGE):
+            result = await orders_complete_move_from_storage_to_storage(order_data, db)
+        else:
+            result = await orders_complete_move_to_storage(order_data, db)
+    elif order_data['orderType'] == ORDER_MERGE_WHEELSTACKS:
+        # TODO: What about storages?
+        result = await orders_complete_merge_wheelstacks(order_data, db)
+    return result
+
+
+async def orders_cancel_dispatch(
+        order_data: dict,
+        cancellation_reason: str,
+        db: AsyncIOMotorClient,
+) -> ObjectId | None:
+    engine_spec: dict | None = order_engine_spec(ORDER_ACTION_CANCEL, order_data)
+    if engine_spec is not None:
+        return await order_engine_run(engine_spec, order_data, db, cancellation_reason)
+    result: ObjectId | None = None
+    if order_data['orderType'] == ORDER_MOVE_WHOLE_STACK:
+        if order_data['source']['placementType'] == PS_STORAGE:
+            result = await orders_cancel_move_from_storage_to_grid(
+                order_data, cancellation_reason, db
+            )
+        else:
+            result = await orders_cancel_move_wholestack(order_data, cancellation_reason, db)
+    elif order_data['orderType'] in BASIC_EXTRA_MOVES:
+        if order_data['source']['placementType'] == PS_STORAGE:
+            result = await orders_cancel_move_from_storage_to_extras(order_data, cancellation_reason, db)
+        else:
+            result = await orders_cancel_basic_extra_element_moves(order_data, cancellation_reason, db)
+    elif order_data['orderType'] == ORDER_MOVE_TO_STORAGE:
+        if (order_data['source']['placementType'] == PS_STORAGE
+                and order_data['destination']['placementType'] == PS_STORAGE):
+            result = await orders_cancel_move_from_storage_to_storage(order_data, cancellation_reason, db)
+        else:
+            result = await orders_cancel_move_to_storage(
+                order_data, cancellation_reason, db
+            )
+    elif order_data['orderType'] == ORDER_MERGE_WHEELSTACKS:
+        # TODO: What about storages?
+        result = await orders_cancel_merge_wheelstacks(order_data, cancellation_reason, db)
+    return result
+
+
+def order_placements(order_data: dict) -> set[tuple[ObjectId, str]]:
+    return {
+        (order_data[side]['placementId'], order_data[side]['placementType']) for side in ('source', 'destination')
+    }
+
+
+def order_placement_keys(order_data: dict) -> set[str]:
+    return {
+        f'{PLACEMENT_COLLECTIONS[placement_type]}:{placement_id}'
+        for placement_id, placement_type in order_placements(order_data)
+    }
+
+
+def orders_conflict_groups(orders_keys: dict[ObjectId, set[str]]) -> list[list[ObjectId]]:
+    """
+    Splits orders into groups, which don't share any document (placement, batch).
+    Orders of different groups can be written in parallel, without write conflicts.
+    """
+    parents: dict[str, str] = {}
+
+    def find(key: str) -> str:
+        while parents.setdefault(key, key) != key:
+            parents[key] = parents[parents[key]]
+            key = parents[key]
+        return key
+
+    for keys in orders_keys.values():
+        first, *others = keys
+        for key in others:
+            parents[find(key)] = find(first)
+    groups: dict[str, list[ObjectId]] = {}
+    for order_id, keys in orders_keys.items():
+        groups.setdefault(find(next(iter(keys))), []).append(order_id)
+    return list(groups.values())
+
+
+async def orders_bulk_process(
+        action: str,
+        orders: list[ObjectId],
+        db: AsyncIOMotorClient,
+        cancellation_reason: str = '',
+) -> tuple[list[dict], set[tuple[ObjectId, str]]]:
+    """
+    Completes|cancels every order of `orders`.
+    Everything engine orders need is gathered with a single read phase, and orders are grouped by shared placements.
+    Engine orders of the same group are written with a single transaction, groups are written in parallel.
+    Orders not declared in the engine are processed by their own functions, one by one inside their group.
+    Returns outcome of every order, and every placement changed by them.
+    """
+    orders = list(dict.fromkeys(orders))
+    logger.info(f'Attempt to {action} {len(orders)} orders')
+    orders_data: dict[ObjectId, dict] = {
+        order_data['_id']: order_data
+        for order_data in await db_get_orders_by_id_many(orders, db, DB_PMK_NAME, CLN_ACTIVE_ORDERS)
+    }
+    done_status: str = ORDER_STATUS_COMPLETED if ORDER_ACTION_COMPLETE == action else ORDER_STATUS_CANCELED
+    outcomes: dict[ObjectId, dict] = {}
+
+    def set_outcome(order_id: ObjectId, outcome_status: str, detail: str | None = None) -> None:
+        outcomes[order_id] = {
+            '_id': order_id,
+            'status': outcome_status,
+            'detail': detail,
+        }
+
+    engine_orders: list[tuple[dict, dict]] = []
+    own_orders: list[ObjectId] = []
+    for order_id in orders:
+        order_data: dict | None = orders_data.get(order_id)
+        if order_data is None:
+            set_outcome(order_id, ORDERS_BULK_NOT_FOUND, f'Order with `objectId` = {order_id}. Not Found.')
+            continue
+        engine_spec: dict | None = order_engine_spec(action, order_data)
+        if engine_spec is None:
+            own_orders.append(order_id)
+        else:
+            engine_orders.append((engine_spec, order_data))
+    plans: dict[ObjectId, dict] = {}
+    if engine_orders:
+        contexts: list[dict] = await order_engine_read_many(engine_orders, db)
+        for (engine_spec, order_data), context in zip(engine_orders, contexts):
+            context['cancellationReason'] = cancellation_reason
+            errors: list[str] = order_engine_check(engine_spec, context)
+            if errors:
+                logger.error(errors[0])
+                set_outcome(order_data['_id'], ORDERS_BULK_FAILED, errors[0])
+                continue
+            plans[order_data['_id']] = order_engine_plan(engine_spec, context)
+    orders_keys: dict[ObjectId, set[str]] = {}
+    for order_id, plan in plans.items():
+        orders_keys[order_id] = order_placement_keys(orders_data[order_id]) | order_engine_plan_keys(plan)
+    for order_id in own_orders:
+        orders_keys[order_id] = order_placement_keys(orders_data[order_id])
+
+    async def process_group(group: list[ObjectId]) -> None:
+        group_plans: list[dict] = [plans[order_id] for order_id in group if order_id in plans]
+        if group_plans:
+            try:
+                archived_orders: list[ObjectId] = await order_engine_write(
+                    order_engine_merge_plans(group_plans), db
+                )
+                for order_id in archived_orders:
+                    set_outcome(order_id, done_status)
+            except (HTTPException, PyMongoError) as error:
+                detail: str = getattr(error, 'detail', str(error))
+                logger.error(f'Error while trying to {action} orders => {group} | ERROR: {detail}')
+                for order_id in group:
+                    if order_id in plans:
+                        set_outcome(order_id, ORDERS_BULK_FAILED, detail)
+        for order_id in group:
+            if order_id in plans:
+                continue
+            try:
+                if ORDER_ACTION_COMPLETE == action:
+                    await orders_complete_dispatch(orders_data[order_id], db)
+                else:
+                    await orders_cancel_dispatch(orders_data[order_id], cancellation_reason, db)
+                set_outcome(order_id, done_status)
+            except (HTTPException, PyMongoError) as error:
+                detail = getattr(error, 'detail', str(error))
+                logger.error(f'Error while trying to {action} order => {order_id} | ERROR: {detail}')
+                set_outcome(order_id, ORDERS_BULK_FAILED, detail)
+
+    groups: list[list[ObjectId]] = orders_conflict_groups(orders_keys)
+    await asyncio.gather(*[process_group(group) for group in groups])
+    changed_placements: set[tuple[ObjectId, str]] = set()
+    for order_id, outcome in outcomes.items():
+        if done_status == outcome['status']:
+            changed_placements.update(order_placements(orders_data[order_id]))
+    logger.info(
+        f'End of bulk {action} | Orders: {len(orders)} | Groups: {len(groups)}'
+        f' | Done: {sum(1 for outcome in outcomes.values() if done_status == outcome['status'])}'
+    )
+    return [outcomes[order_id] for order_id in orders], changed_placements
@@ -0,0 +1,662 @@
+import asyncio
+from bson import ObjectId
+from loguru import logger
+from functools import partial
+from typing import Callable
+from fastapi import HTTPException, status
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorClientSession
+from utility.utilities import time_w_timezone
+from utility.batch_loader import DataLoaders
+from routers.batch_numbers.crud import db_insert_test_wheel
+from routers.wheelstacks.crud import db_update_wheelstack
+from routers.orders.orders_completion import order_wheel_movements
+from routers.wheels.crud import db_insert_wheel_movements, db_bulk_update_wheels
+from routers.orders.crud import (
+    db_delete_orders_many,
+    db_create_orders_many,
+    db_get_placements_fields,
+    db_update_placement_cells,
+)
+from constants import (
+    DB_PMK_NAME,
+    CLN_WHEELS,
+    CLN_WHEELSTACKS,
+    CLN_BATCH_NUMBERS,
+    CLN_ACTIVE_ORDERS,
+    CLN_COMPLETED_ORDERS,
+    CLN_CANCELED_ORDERS,
+    CLN_WHEEL_MOVEMENTS,
+    PLACEMENT_COLLECTIONS,
+    PT_GRID,
+    PT_BASE_PLATFORM,
+    PS_GRID,
+    PS_SHIPPED,
+    PS_REJECTED,
+    PS_LABORATORY,
+    ORDER_MOVE_WHOLE_STACK,
+    ORDER_MOVE_TO_PROCESSING,
+    ORDER_MOVE_TO_REJECTED,
+    ORDER_MOVE_TO_LABORATORY,
+    ORDER_STATUS_COMPLETED,
+    ORDER_STATUS_CANCELED,
+    ORDER_ACTION_COMPLETE,
+    ORDER_ACTION_CANCEL,
+    ORDER_ENGINE_ENABLED,
+)
+
+
+# Every order type we can complete|cancel is declared in `ORDER_ENGINE_SPECS`:
+#  - which part of the `source`|`destination` placements it uses (cell or `extra` element),
+#  - `preconditions` <- checks of the gathered data, every one of them returns an error or `None`,
+#  - `effects` <- changes of the order, collected into a single write `plan`.
+# Engine gathers everything with one read phase: placements (one query per collection),
+#  `wheelstack` and `wheel`s (`DataLoaders`) are all requested at the same time.
+# Then checks every precondition, and applies the whole `plan` in one transaction.
+# Storage orders and merges are not declared, they're still completed|canceled with their own functions.
+
+ENGINE_TARGET_CELL: str = 'cell'
+ENGINE_TARGET_EXTRA: str = 'extra'
+
+# (context) -> error message | None
+EnginePrecondition = Callable[[dict], str | None]
+# (context, plan) -> None
+EngineEffect = Callable[[dict, dict], None]
+
+
+def engine_target_field(order_data: dict, side: str, target: str) -> str:
+    row: str = order_data[side]['rowPlacement']
+    col: str = order_data[side]['columnPlacement']
+    if ENGINE_TARGET_EXTRA == target:
+        return f'extra.{col}'
+    return f'rows.{row}.columns.{col}'
+
+
+def engine_target_data(order_data: dict, side: str, target: str, placement_data: dict | None) -> dict | None:
+    if placement_data is None:
+        return None
+    row: str = order_data[side]['rowPlacement']
+    col: str = order_data[side]['columnPlacement']
+    if ENGINE_TARGET_EXTRA == target:
+        return placement_data.get('extra', {}).get(col)
+    return placement_data.get('rows', {}).get(row, {}).get('columns', {}).get(col)
+
+
+def order_engine_spec(action: str, order_data: dict) -> dict | None:
+    """
+    Returns spec of the order, or `None` if it should be processed by its own function.
+    """
+    if not ORDER_ENGINE_ENABLED:
+        return None
+    spec: dict | None = ORDER_ENGINE_SPECS.get((action, order_data['orderType']))
+    if spec is None:
+        return None
+    if (order_data['source']['placementType'] not in spec['sourceTypes']
+            or order_data['destination']['placementType'] not in spec['destinationTypes']):
+        return None
+    return spec
+
+
+# region readPhase
+async def order_engine_read_many(
+        orders: list[tuple[dict, dict]],
+        db: AsyncIOMotorClient,
+        loaders: DataLoaders | None = None,
+) -> list[dict]:
+    """
+    Gathers everything every (spec, order_data) of `orders` needs, every query is sent at the same time.
+    Placements are gathered with one query per collection, with cells|extra elements of all the `orders`.
+    """
+    loaders = loaders or DataLoaders(db)
+    # { collection: { placement_id: fields } }
+    placements_fields: dict[str, dict[ObjectId, set[str]]] = {}
+    wheels: list[ObjectId] = []
+    for spec, order_data in orders:
+        for side in ('source', 'destination'):
+            placement_collection: str = PLACEMENT_COLLECTIONS[order_data[side]['placementType']]
+            placements_fields.setdefault(placement_collection, {}).setdefault(
+                order_data[side]['placementId'], set()
+            ).add(engine_target_field(order_data, side, spec[side]))
+        if spec['loadWheels']:
+            wheels.extend(order_data['affectedWheels']['source'])
+    placements_tasks = [
+        db_get_placements_fields(
+            list(placements.keys()),
+            sorted({field for fields in placements.values() for field in fields}),
+            db, DB_PMK_NAME, placement_collection
+        )
+        for placement_collection, placements in placements_fields.items()
+    ]
+    placements_results, wheelstacks_data, wheels_data = await asyncio.gather(
+        asyncio.gather(*placements_tasks),
+        loaders.wheelstacks.load_many(
+            [order_data['affectedWheelStacks']['source'] for _, order_data in orders]
+        ),
+        loaders.wheels.load_many(wheels),
+    )
+    placements: dict[tuple[str, ObjectId], dict] = {}
+    for placement_collection, collection_placements in zip(placements_fields, placements_results):
+        for placement_id, placement_data in collection_placements.items():
+            placements[(placement_collection, placement_id)] = placement_data
+    loaded_wheels: dict[ObjectId, dict | None] = dict(zip(wheels, wheels_data))
+    read_time = await time_w_timezone()
+    contexts: list[dict] = []
+    for (spec, order_data), wheelstack_data in zip(orders, wheelstacks_data):
+        context: dict = {
+            'order': order_data,
+            'wheelstack': wheelstack_data,
+            'wheels': {
+                wheel_id: loaded_wheels[wheel_id]
+                for wheel_id in order_data['affectedWheels']['source'] if wheel_id in loaded_wheels
+            },
+            'time': read_time,
+        }
+        for side in ('source', 'destination'):
+            placement_collection = PLACEMENT_COLLECTIONS[order_data[side]['placementType']]
+            placement_id: ObjectId = order_data[side]['placementId']
+            context[side] = {
+                'collection': placement_collection,
+                'placementId': placement_id,
+                'data': engine_target_data(
+                    order_data, side, spec[side], placements.get((placement_collection, placement_id))
+                ),
+            }
+        contexts.append(context)
+    return contexts
+
+
+async def order_engine_read(
+        spec: dict,
+        order_data: dict,
+        db: AsyncIOMotorClient,
+        loaders: DataLoaders | None = None,
+) -> dict:
+    contexts: list[dict] = await order_engine_read_many([(spec, order_data)], db, loaders)
+    return contexts[0]
+# endregion readPhase
+
+
+# region preconditions
+def check_source_cell(context: dict) -> str | None:
+    order_data: dict = context['order']
+    source: dict = order_data['source']
+    cell_data: dict | None = context['source']['data']
+    cell: str = f'{source['rowPlacement']}|{source['columnPlacement']}'
+    if cell_data is None:
+        return (f'{cell} <- source cell doesnt exist in the `{source['placementType']}` = {source['placementId']}.'
+                f' But given order = {order_data['_id']} marks it as source cell.')
+    if cell_data['blockedBy'] != order_data['_id']:
+        return (f'Corrupted `order` = {order_data['_id']}, marking cell {cell}'
+                f' in `{source['placementType']}` = {source['placementId']}.'
+                f' But different order is blocking it {cell_data['blockedBy']}')
+    if cell_data['wheelStack'] != order_data['affectedWheelStacks']['source']:
+        return (f'{cell} <- source cell in the `{source['placementType']}` = {source['placementId']}'
+                f' contains non target `wheelstack` => {cell_data['wheelStack']}.'
+                f' While order = {order_data['_id']} target => {order_data['affectedWheelStacks']['source']}')
+    return None
+
+
+def check_source_wheelstack(context: dict) -> str | None:
+    order_data: dict = context['order']
+    if context['wheelstack'] is None:
+        return (f'Corrupted cell {order_data['source']['rowPlacement']}|{order_data['source']['columnPlacement']}'
+                f' in `{order_data['source']['placementType']}` = {order_data['source']['placementId']}.'
+                f' Marks `wheelstack` = {order_data['affectedWheelStacks']['source']} as placed on it,'
+                f' but it doesnt exist.')
+    return None
+
+
+def check_destination_cell_empty(context: dict) -> str | None:
+    order_data: dict = context['order']
+    destination: dict = order_data['destination']
+    cell_data: dict | None = context['destination']['data']
+    cell: str = f'{destination['rowPlacement']}|{destination['columnPlacement']}'
+    if cell_data is None:
+        return (f'Corrupted `{destination['placementType']}` = {destination['placementId']} cell {cell}.'
+                f' Used in order = {order_data['_id']}, but it doesnt exist.')
+    if cell_data['wheelStack'] is not None:
+        return (f'Corrupted `{destination['placementType']}` = {destination['placementId']} cell {cell}.'
+                f' Used in order = {order_data['_id']} as destination, but its already taken')
+    return None
+
+
+def check_destination_extra(context: dict) -> str | None:
+    order_data: dict = context['order']
+    destination: dict = order_data['destination']
+    if context['destination']['data'] is None:
+        return (f'Corrupted extra element in `grid` = {destination['placementId']},'
+                f' cell {destination['rowPlacement']}|{destination['columnPlacement']}.'
+                f' Used in order = {order_data['_id']}, but it doesnt exist.')
+    return None
+
+
+def check_chosen_wheel(context: dict) -> str | None:
+    order_data: dict = context['order']
+    chosen_wheel: ObjectId = order_data['affectedWheels']['source'][0]
+    if chosen_wheel not in context['wheelstack']['wheels']:
+        return (f'Corrupted order = {order_data['_id']}, marking `wheel` for deletion = {chosen_wheel}.'
+                f' But it doesnt present in the affected wheelStack = {context['wheelstack']['_id']}.')
+    if context['wheels'].get(chosen_wheel) is None:
+        return (f'Corrupted order = {order_data['_id']}, marking `wheel` for deletion = {chosen_wheel}.'
+                f' But it doesnt exist.')
+    return None
+
+
+def order_engine_check(spec: dict, context: dict) -> list[str]:
+    """
+    Returns errors of every failed precondition, checks of the same order stop on the first one.
+    Every next check can rely on the previous ones, e.g. `wheelstack` exists.
+    """
+    for precondition in spec['preconditions']:
+        error: str | None = precondition(context)
+        if error is not None:
+            return [error]
+    return []
+# endregion preconditions
+
+
+# region effects
+def plan_placement(plan: dict, context: dict, side: str) -> dict:
+    placement_key: tuple[str, ObjectId] = (context[side]['collection'], context[side]['placementId'])
+    return plan['placements'].setdefault(placement_key, {})
+
+
+def plan_cell(plan: dict, context: dict, side: str, cell_update: dict) -> None:
+    order_data: dict = context['order']
+    cell_field: str = engine_target_field(order_data, side, ENGINE_TARGET_CELL)
+    placement_update: dict = plan_placement(plan, context, side)
+    for key, value in cell_update.items():
+        placement_update[f'{cell_field}.{key}'] = value
+    # Cell is only changed if it's still in the state we've checked.
+    placement_key: tuple[str, ObjectId] = (context[side]['collection'], context[side]['placementId'])
+    placement_expected: dict = plan['expected'].setdefault(placement_key, {})
+    for key in ('wheelStack', 'blockedBy'):
+        placement_expected[f'{cell_field}.{key}'] = context[side]['data'][key]
+
+
+def plan_wheelstack(plan: dict, context: dict, wheelstack_update: dict) -> None:
+    plan['wheelstacks'].setdefault(context['wheelstack']['_id'], {}).update(wheelstack_update)
+
+
+def plan_wheel(plan: dict, wheel_id: ObjectId, wheel_update: dict) -> None:
+    plan['wheels'].setdefault(wheel_id, {}).update(wheel_update)
+
+
+def effect_clear_source_cell(context: dict, plan: dict) -> None:
+    plan_cell(plan, context, 'source', {
+        'wheelStack': None,
+        'blocked': False,
+        'blockedBy': None,
+    })
+
+
+def effect_unblock_cell(side: str, context: dict, plan: dict) -> None:
+    plan_cell(plan, context, side, {
+        'blocked': False,
+        'blockedBy': None,
+    })
+
+
+def effect_place_on_destination_cell(context: dict, plan: dict) -> None:
+    plan_cell(plan, context, 'destination', {
+        'wheelStack': context['wheelstack']['_id'],
+        'blocked': False,
+        'blockedBy': None,
+    })
+
+
+def effect_touch_destination(context: dict, plan: dict) -> None:
+    # Nothing changes in the `extra` element, but placement is still marked as changed.
+    plan_placement(plan, context, 'destination')
+
+
+def effect_move_wheelstack(wheelstack_status: str, blocked: bool, context: dict, plan: dict) -> None:
+    order_data: dict = context['order']
+    destination: dict = order_data['destination']
+    plan_wheelstack(plan, context, {
+        'placement.type': destination['placementType'],
+        'placement.placementId': destination['placementId'],
+        'rowPlacement': destination['rowPlacement'],
+        'colPlacement': destination['columnPlacement'],
+        'lastOrder': order_data['_id'],
+        'status': wheelstack_status,
+        'blocked': blocked,
+    })
+
+
+def effect_unblock_wheelstack(context: dict, plan: dict) -> None:
+    plan_wheelstack(plan, context, {
+        'blocked': False,
+        'lastOrder': context['order']['_id'],
+    })
+
+
+def effect_wheels_status(wheel_status: str, use_virtual_position: bool, context: dict, plan: dict) -> None:
+    order_data: dict = context['order']
+    wheel_update: dict = {
+        'status': wheel_status,
+    }
+    if use_virtual_position:
+        wheel_update['sqlData.virtualPosition'] = order_data.get('virtualPosition', 0)
+    for wheel in order_data['affectedWheels']['source']:
+        plan_wheel(plan, wheel, wheel_update)
+
+
+def effect_take_chosen_wheel(context: dict, plan: dict) -> None:
+    order_data: dict = context['order']
+    wheelstack_data: dict = context['wheelstack']
+    chosen_wheel: ObjectId = order_data['affectedWheels']['source'][0]
+    wheels_left: list[ObjectId] = [
+        wheel for wheel in wheelstack_data['wheels'] if wheel != chosen_wheel
+    ]
+    for new_pos, wheel in enumerate(wheels_left):
+        plan_wheel(plan, wheel, {'wheelStack.wheelStackPosition': new_pos})
+    plan_wheel(plan, chosen_wheel, {
+        'wheelStack': None,
+        'status': PS_LABORATORY,
+    })
+    wheelstack_update: dict = {
+        'wheels': wheels_left,
+        'blocked': False,
+        'lastOrder': order_data['_id'],
+    }
+    cell_update: dict = {
+        'blocked': False,
+        'blockedBy': None,
+    }
+    # We shouldn't leave empty `wheelStack` placed in the grid.
+    if not wheels_left:
+        cell_update['wheelStack'] = None
+        wheelstack_update['blocked'] = True
+        wheelstack_update['status'] = PS_SHIPPED
+    plan_cell(plan, context, 'source', cell_update)
+    plan_wheelstack(plan, context, wheelstack_update)
+    chosen_wheel_data: dict = context['wheels'][chosen_wheel]
+    plan['testWheels'].append(
+        (
+            chosen_wheel_data['batchNumber'],
+            {
+                '_id': chosen_wheel_data['_id'],
+                'wheelId': chosen_wheel_data['wheelId'],
+                'arrivalDate': context['time'],
+                'result': None,
+                'testDate': None,
+                'confirmedBy': '',
+            }
+        )
+    )
+
+
+def effect_record_movements(whole_wheelstack: bool, context: dict, plan: dict) -> None:
+    order_data: dict = context['order']
+    wheelstack_id: ObjectId = context['wheelstack']['_id']
+    plan['movements'].extend(
+        order_wheel_movements(
+            order_data,
+            order_data['affectedWheels']['source'],
+            context['time'],
+            wheelstack_id,
+            wheelstack_id if whole_wheelstack else None,
+        )
+    )
+
+
+def effect_complete_order(context: dict, plan: dict) -> None:
+    order_data: dict = context['order']
+    order_data['status'] = ORDER_STATUS_COMPLETED
+    order_data['lastUpdated'] = context['time']
+    order_data['completedAt'] = context['time']
+    plan['orders'].append((order_data, CLN_COMPLETED_ORDERS))
+
+
+def effect_cancel_order(context: dict, plan: dict) -> None:
+    order_data: dict = context['order']
+    order_data['status'] = ORDER_STATUS_CANCELED
+    order_data['cancellationReason'] = context.get('cancellationReason') or 'Not specified'
+    order_data['canceledAt'] = context['time']
+    order_data['lastUpdated'] = context['time']
+    plan['orders'].append((order_data, CLN_CANCELED_ORDERS))
+
+
+def order_engine_empty_plan() -> dict:
+    return {
+        # { (collection, placement_id): { field: value } }
+        'placements': {},
+        # { (collection, placement_id): { field: expected value } }
+        'expected': {},
+        # { wheelstack_id: { field: value } }
+        'wheelstacks': {},
+        # { wheel_id: { field: value } }
+        'wheels': {},
+        # [ (batchNumber, test_wheel_record) ]
+        'testWheels': [],
+        'movements': [],
+        # [ (order_data, collection it's moved into) ]
+        'orders': [],
+    }
+
+
+def order_engine_plan(spec: dict, context: dict) -> dict:
+    plan: dict = order_engine_empty_plan()
+    for effect in spec['effects']:
+        effect(context, plan)
+    return plan
+
+
+def order_engine_merge_plans(plans: list[dict]) -> dict:
+    """
+    Combines plans of different orders, so they're written with a single transaction.
+    Orders can share placements, but never the same cells|`wheelstack`s, they're blocked by a single order.
+    """
+    merged: dict = order_engine_empty_plan()
+    for plan in plans:
+        for field in ('placements', 'expected', 'wheelstacks', 'wheels'):
+            for key, update in plan[field].items():
+                merged[field].setdefault(key, {}).update(update)
+        for field in ('testWheels', 'movements', 'orders'):
+            merged[field].extend(plan[field])
+    return merged
+
+
+def order_engine_plan_keys(plan: dict) -> set[str]:
+    """
+    Documents shared between orders, plans touching any of the same keys conflict in separate transactions.
+    """
+    keys: set[str] = {
+        f'{placement_collection}:{placement_id}' for placement_collection, placement_id in plan['placements']
+    }
+    keys.update(
+        f'{CLN_BATCH_NUMBERS}:{batch_number}' for batch_number, _ in plan['testWheels']
+    )
+    return keys
+# endregion effects
+
+
+# region writePhase
+async def engine_update_placement(
+        placement_collection: str,
+        placement_id: ObjectId,
+        cells_fields: dict,
+        expected_cells: dict | None,
+        db: AsyncIOMotorClient,
+        session: AsyncIOMotorClientSession,
+) -> None:
+    updated: bool = await db_update_placement_cells(
+        placement_id, cells_fields, db, DB_PMK_NAME, placement_collection, session, expected_cells
+    )
+    if not updated:
+        raise HTTPException(
+            detail=f'Placement => {placement_id} was changed by other operation, try again',
+            status_code=status.HTTP_409_CONFLICT,
+        )
+
+
+async def order_engine_write(plan: dict, db: AsyncIOMotorClient) -> list[ObjectId]:
+    """
+    Applies the whole `plan` in one transaction.
+    Placements are only updated if their cells are still in the checked state,
+     any concurrent change of them aborts the whole transaction.
+    Returns `_id`s of the orders moved into `completedOrders`|`canceledOrders`.
+    """
+    archives: dict[str, list[dict]] = {}
+    for order_data, archive_collection in plan['orders']:
+        archives.setdefault(archive_collection, []).append(order_data)
+    async with (await db.start_session()) as session:
+        async with session.start_transaction():
+            transaction_tasks = []
+            for (placement_collection, placement_id), cells_fields in plan['placements'].items():
+                transaction_tasks.append(
+                    engine_update_placement(
+                        placement_collection, placement_id, cells_fields,
+                        plan['expected'].get((placement_collection, placement_id)), db, session
+                    )
+                )
+            for wheelstack_id, wheelstack_update in plan['wheelstacks'].items():
+                transaction_tasks.append(
+                    db_update_wheelstack(
+                        wheelstack_update, wheelstack_id, db, DB_PMK_NAME, CLN_WHEELSTACKS, session
+                    )
+                )
+            transaction_tasks.append(
+                db_bulk_update_wheels(
+                    plan['wheels'], db, DB_PMK_NAME, CLN_WHEELS, session
+                )
+            )
+            for batch_number, test_wheel_record in plan['testWheels']:
+                transaction_tasks.append(
+                    db_insert_test_wheel(
+                        batch_number, test_wheel_record, db, DB_PMK_NAME, CLN_BATCH_NUMBERS, session
+                    )
+                )
+            transaction_tasks.append(
+                db_insert_wheel_movements(
+                    plan['movements'], db, DB_PMK_NAME, CLN_WHEEL_MOVEMENTS, session
+                )
+            )
+            transaction_tasks.append(
+                db_delete_orders_many(
+                    [order_data['_id'] for order_data, _ in plan['orders']],
+                    db, DB_PMK_NAME, CLN_ACTIVE_ORDERS, session
+                )
+            )
+            for archive_collection, archive_orders in archives.items():
+                transaction_tasks.append(
+                    db_create_orders_many(
+                        archive_orders, db, DB_PMK_NAME, archive_collection, session
+                    )
+                )
+            await asyncio.gather(*transaction_tasks)
+            return [order_data['_id'] for order_data, _ in plan['orders']]
+# endregion writePhase
+
+
+async def order_engine_run(
+        spec: dict,
+        order_data: dict,
+        db: AsyncIOMotorClient,
+        cancellation_reason: str = '',
+        loaders: DataLoaders | None = None,
+) -> ObjectId:
+    """
+    Completes|cancels `order_data` as declared by its `spec`.
+    Returns `_id` of the order in `completedOrders`|`canceledOrders`.
+    """
+    context: dict = await order_engine_read(spec, order_data, db, loaders)
+    context['cancellationReason'] = cancellation_reason
+    errors: list[str] = order_engine_check(spec, context)
+    if errors:
+        logger.error(errors[0])
+        raise HTTPException(
+            detail=errors[0],
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+    plan: dict = order_engine_plan(spec, context)
+    archived_orders: list[ObjectId] = await order_engine_write(plan, db)
+    return archived_orders[0]
+
+
+def pro_rej_completion_spec(wheelstack_status: str) -> dict:
+    return {
+        'sourceTypes': {PT_GRID},
+        'destinationTypes': {PT_GRID},
+        'source': ENGINE_TARGET_CELL,
+        'destination': ENGINE_TARGET_EXTRA,
+        'loadWheels': False,
+        'preconditions': [check_source_cell, check_source_wheelstack, check_destination_extra],
+        'effects': [
+            effect_clear_source_cell,
+            effect_touch_destination,
+            partial(effect_move_wheelstack, wheelstack_status, True),
+            partial(effect_wheels_status, wheelstack_status, True),
+            partial(effect_record_movements, True),
+            effect_complete_order,
+        ],
+    }
+
+
+EXTRA_MOVE_CANCELLATION_SPEC: dict = {
+    'sourceTypes': {PT_GRID},
+    'destinationTypes': {PT_GRID},
+    'source': ENGINE_TARGET_CELL,
+    'destination': ENGINE_TARGET_EXTRA,
+    'loadWheels': False,
+    'preconditions': [check_source_cell, check_source_wheelstack, check_destination_extra],
+    'effects': [
+        partial(effect_unblock_cell, 'source'),
+        effect_unblock_wheelstack,
+        effect_cancel_order,
+    ],
+}
+
+
+# { (action, orderType): spec }
+ORDER_ENGINE_SPECS: dict[tuple[str, str], dict] = {
+    (ORDER_ACTION_COMPLETE, ORDER_MOVE_WHOLE_STACK): {
+        'sourceTypes': {PT_GRID, PT_BASE_PLATFORM},
+        'destinationTypes': {PT_GRID},
+        'source': ENGINE_TARGET_CELL,
+        'destination': ENGINE_TARGET_CELL,
+        'loadWheels': False,
+        'preconditions': [check_source_cell, check_source_wheelstack, check_destination_cell_empty],
+        'effects': [
+            effect_clear_source_cell,
+            effect_place_on_destination_cell,
+            partial(effect_move_wheelstack, PS_GRID, False),
+            partial(effect_wheels_status, PS_GRID, False),
+            partial(effect_record_movements, True),
+            effect_complete_order,
+        ],
+    },
+    (ORDER_ACTION_COMPLETE, ORDER_MOVE_TO_PROCESSING): pro_rej_completion_spec(PS_SHIPPED),
+    (ORDER_ACTION_COMPLETE, ORDER_MOVE_TO_REJECTED): pro_rej_completion_spec(PS_REJECTED),
+    (ORDER_ACTION_COMPLETE, ORDER_MOVE_TO_LABORATORY): {
+        'sourceTypes': {PT_GRID},
+        'destinationTypes': {PT_GRID},
+        'source': ENGINE_TARGET_CELL,
+        'destination': ENGINE_TARGET_EXTRA,
+        'loadWheels': True,
+        'preconditions': [check_source_cell, check_source_wheelstack, check_destination_extra, check_chosen_wheel],
+        'effects': [
+            effect_take_chosen_wheel,
+            effect_touch_destination,
+            partial(effect_record_movements, False),
+            effect_complete_order,
+        ],
+    },
+    (ORDER_ACTION_CANCEL, ORDER_MOVE_WHOLE_STACK): {
+        'sourceTypes': {PT_GRID, PT_BASE_PLATFORM},
+        'destinationTypes': {PT_GRID},
+        'source': ENGINE_TARGET_CELL,
+        'destination': ENGINE_TARGET_CELL,
+        'loadWheels': False,
+        'preconditions': [check_source_cell, check_source_wheelstack, check_destination_cell_empty],
+        'effects': [
+            partial(effect_unblock_cell, 'source'),
+            partial(effect_unblock_cell, 'destination'),
+            effect_unblock_wheelstack,
+            effect_cancel_order,
+        ],
+    },
+    (ORDER_ACTION_CANCEL, ORDER_MOVE_TO_PROCESSING): EXTRA_MOVE_CANCELLATION_SPEC,
+    (ORDER_ACTION_CANCEL, ORDER_MOVE_TO_REJECTED): EXTRA_MOVE_CANCELLATION_SPEC,
+    (ORDER_ACTION_CANCEL, ORDER_MOVE_TO_LABORATORY): EXTRA_MOVE_CANCELLATION_SPEC,
+}
@@ -0,0 +1,129 @@
+import json
+from bson import ObjectId
+from loguru import logger
+from fastapi import Request
+from pymongo.errors import PyMongoError
+from motor.motor_asyncio import AsyncIOMotorClient
+from utility.utilities import convert_object_id_and_datetime_to_str
+from constants import (
+    DB_PMK_NAME,
+    ORDER_EVENTS_COLLECTIONS,
+    ORDERS_STREAM_HEARTBEAT,
+)
+
+
+# Compact order summary, we don't need `affectedWheels` and descriptions in the stream.
+ORDER_EVENT_SUMMARY_FIELDS: list[str] = [
+    '_id',
+    'orderName',
+    'orderType',
+    'status',
+    'source',
+    'destination',
+    'affectedWheelStacks',
+    'createdAt',
+    'lastUpdated',
+    'completedAt',
+    'canceledAt',
+    'cancellationReason',
+]
+
+
+async def build_orders_events_pipeline(
+        placement_id: ObjectId | None,
+        placement_type: str,
+        order_types: list[str],
+        event_types: list[str],
+) -> list[dict]:
+    watched_collections: list[str] = [
+        collection for collection, event_type in ORDER_EVENTS_COLLECTIONS.items()
+        if not event_types or event_type in event_types
+    ]
+    # Orders are only inserted into these collections when they're created|completed|canceled.
+    match_query: dict = {
+        'operationType': 'insert',
+        'ns.coll': {
+            '$in': watched_collections,
+        },
+    }
+    if order_types:
+        match_query['fullDocument.orderType'] = {
+            '$in': order_types,
+        }
+    if placement_id is not None:
+        source_query = {'fullDocument.source.placementId': placement_id}
+        destination_query = {'fullDocument.destination.placementId': placement_id}
+        if placement_type:
+            source_query['fullDocument.source.placementType'] = placement_type
+            destination_query['fullDocument.destination.placementType'] = placement_type
+        match_query['$or'] = [source_query, destination_query]
+    projection: dict = {
+        'ns': 1,
+        **{f'fullDocument.{field}': 1 for field in ORDER_EVENT_SUMMARY_FIELDS},
+    }
+    return [
+        {'$match': match_query},
+        {'$project': projection},
+    ]
+
+
+def sse_message(data: dict | str, event_type: str = '', event_id: str = '') -> str:
+    message: str = ''
+    if event_id:
+        message += f'id: {event_id}\n'
+    if event_type:
+        message += f'event: {event_type}\n'
+    if not isinstance(data, str):
+        data = json.dumps(data)
+    message += f'data: {data}\n\n'
+    return message
+
+
+async def orders_events_stream(
+        request: Request,
+        pipeline: list[dict],
+        last_event_id: str,
+        db: AsyncIOMotorClient,
+):
+    """
+    Streams order lifecycle events as SSE messages, using change stream of the orders collections.
+    `id` of every event is a change stream resume token, so client can resume with `Last-Event-ID`.
+    If we can't resume from `last_event_id` (too old, or incorrect) `reset` event is sent first,
+     and stream continues from the current moment, client should refresh its orders data.
+    """
+    watch_options: dict = {
+        'max_await_time_ms': ORDERS_STREAM_HEARTBEAT * 1000,
+    }
+    database = db[DB_PMK_NAME]
+    # Sending something right away, so proxies and clients know stream is alive.
+    yield ': connected\n\n'
+    change: dict | None = None
+    change_stream = None
+    try:
+        if last_event_id:
+            change_stream = database.watch(pipeline, resume_after={'_data': last_event_id}, **watch_options)
+            # Resume token is only validated with the first request.
+            try:
+                change = await change_stream.try_next()
+            except PyMongoError as error:
+                logger.warning(
+                    f'Orders events stream can not be resumed from `Last-Event-ID` = {last_event_id}'
+                    f' | ERROR: {error}'
+                )
+                await change_stream.close()
+                change_stream = None
+                yield sse_message({'lastEventId': last_event_id}, 'reset')
+        if change_stream is None:
+            change_stream = database.watch(pipeline, **watch_options)
+        async with change_stream:
+            while not await request.is_disconnected():
+                if change is None:
+                    yield ': keep-alive\n\n'
+                else:
+                    event_type: str = ORDER_EVENTS_COLLECTIONS[change['ns']['coll']]
+                    event_data: dict = convert_object_id_and_datetime_to_str(change['fullDocument'])
+                    yield sse_message(event_data, event_type, change['_id']['_data'])
+                change = await change_stream.try_next()
+    except PyMongoError as error:
+        logger.error(f'Error while streaming orders events | ERROR: {error}')
+        yield sse_message({'message': 'Orders events stream interrupted'}, 'error')
@@ -0,0 +1,196 @@
+from bson import ObjectId
+from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorClient
+from routers.orders.crud import db_get_orders_union, db_get_orders_page
+from routers.orders.orders_archive import orders_find_archived
+from constants import (
+    DB_PMK_NAME,
+    ORDER_STATUS_COLLECTIONS,
+)
+
+
+# Newest orders first, `_id` breaks ties of the same `createdAt`.
+# Every collection has (`status`, `createdAt`, `_id`) and (`orderType`, `status`, `createdAt`, `_id`) indexes,
+#  and pages always match `status` of the collection, so this order is taken from an index.
+ORDERS_PAGE_SORT: dict = {
+    'createdAt': -1,
+    '_id': -1,
+}
+
+
+def orders_collections(statuses: list[str] | None = None) -> list[str]:
+    """
+    Order collections storing orders with any of `statuses`, all of them if `statuses` is empty.
+    """
+    return [
+        collection for order_status, collection in ORDER_STATUS_COLLECTIONS.items()
+        if not statuses or order_status in statuses
+    ]
+
+
+def orders_query_by_ids(orders: list[ObjectId]) -> dict:
+    return {
+        '_id': {
+            '$in': orders,
+        }
+    }
+
+
+def orders_query_by_placement(placement_id: ObjectId, placement_type: str = '') -> dict:
+    sides_query: list[dict] = []
+    for side in ('source', 'destination'):
+        side_query: dict = {
+            f'{side}.placementId': placement_id,
+        }
+        if placement_type:
+            side_query[f'{side}.placementType'] = placement_type
+        sides_query.append(side_query)
+    return {
+        '$or': sides_query,
+    }
+
+
+def orders_query_by_wheels(wheels: list[ObjectId]) -> dict:
+    return {
+        '$or': [
+            {'affectedWheels.source': {'$in': wheels}},
+            {'affectedWheels.destination': {'$in': wheels}},
+        ]
+    }
+
+
+def orders_query_by_wheelstacks(wheelstacks: list[ObjectId]) -> dict:
+    return {
+        '$or': [
+            {'affectedWheelStacks.source': {'$in': wheelstacks}},
+            {'affectedWheelStacks.destination': {'$in': wheelstacks}},
+        ]
+    }
+
+
+async def orders_find(
+        query: dict,
+        db: AsyncIOMotorClient,
+        statuses: list[str] | None = None,
+        projection: dict | None = None,
+) -> list[dict]:
+    """
+    Orders matching `query` from every collection of `statuses`, gathered with a single round trip.
+    """
+    return await db_get_orders_union(
+        query, orders_collections(statuses), db, DB_PMK_NAME, projection
+    )
+
+
+async def orders_find_by_ids(
+        orders: list[ObjectId],
+        db: AsyncIOMotorClient,
+        statuses: list[str] | None = None,
+        projection: dict | None = None,
+        include_archives: bool = True,
+) -> list[dict]:
+    """
+    Orders with `_id` in `orders`, archives are only searched for orders missing in the hot collections.
+    """
+    orders_data: list[dict] = await orders_find(orders_query_by_ids(orders), db, statuses, projection)
+    if include_archives:
+        found_orders: set[ObjectId] = {order_data['_id'] for order_data in orders_data}
+        missing_orders: list[ObjectId] = [order_id for order_id in orders if order_id not in found_orders]
+        if missing_orders:
+            orders_data.extend(
+                await orders_find_archived(missing_orders, orders_collections(statuses), db, projection)
+            )
+    return orders_data
+
+
+async def orders_find_by_placement(
+        placement_id: ObjectId,
+        db: AsyncIOMotorClient,
+        placement_type: str = '',
+        statuses: list[str] | None = None,
+        projection: dict | None = None,
+) -> list[dict]:
+    return await orders_find(
+        orders_query_by_placement(placement_id, placement_type), db, statuses, projection
+    )
+
+
+async def orders_find_by_wheels(
+        wheels: list[ObjectId],
+        db: AsyncIOMotorClient,
+        statuses: list[str] | None = None,
+        projection: dict | None = None,
+) -> list[dict]:
+    return await orders_find(orders_query_by_wheels(wheels), db, statuses, projection)
+
+
+async def orders_find_by_wheelstacks(
+        wheelstacks: list[ObjectId],
+        db: AsyncIOMotorClient,
+        statuses: list[str] | None = None,
+        projection: dict | None = None,
+) -> list[dict]:
+    return await orders_find(orders_query_by_wheelstacks(wheelstacks), db, statuses, projection)
+
+
+def orders_page_queries(
+        order_types: list[str] | None = None,
+        statuses: list[str] | None = None,
+        placement_id: ObjectId | None = None,
+        placement_type: str = '',
+        wheelstack_id: ObjectId | None = None,
+        created_from: datetime | None = None,
+        created_to: datetime | None = None,
+        after: tuple[datetime, ObjectId] | None = None,
+) -> dict[str, dict]:
+    """
+    Query of every order collection of `statuses`, for a single page of `GET /orders`.
+    `after` == (`createdAt`, `_id`) of the last order from the previous page, only older orders are matched.
+    """
+    filters: list[dict] = []
+    if order_types:
+        filters.append({'orderType': {'$in': order_types}})
+    if created_from or created_to:
+        created_query: dict = {}
+        if created_from:
+            created_query['$gte'] = created_from
+        if created_to:
+            created_query['$lte'] = created_to
+        filters.append({'createdAt': created_query})
+    if placement_id:
+        filters.append(orders_query_by_placement(placement_id, placement_type))
+    if wheelstack_id:
+        filters.append(orders_query_by_wheelstacks([wheelstack_id]))
+    if after:
+        after_created_at, after_id = after
+        filters.append({
+            '$or': [
+                {'createdAt': {'$lt': after_created_at}},
+                {'createdAt': after_created_at, '_id': {'$lt': after_id}},
+            ]
+        })
+    collections_queries: dict[str, dict] = {}
+    for order_status, collection_name in ORDER_STATUS_COLLECTIONS.items():
+        if statuses and order_status not in statuses:
+            continue
+        # Every order of the collection has the same `status`, but we need it to use `status` indexes.
+        collection_query: dict = {'status': order_status}
+        if filters:
+            collection_query = {'$and': [collection_query, *filters]}
+        collections_queries[collection_name] = collection_query
+    return collections_queries
+
+
+async def orders_find_page(
+        collections_queries: dict[str, dict],
+        limit: int,
+        db: AsyncIOMotorClient,
+        fields: list[str] | None = None,
+) -> list[dict]:
+    projection: dict | None = None
+    if fields:
+        # Page is ordered and continued by them, so they're always returned.
+        projection = {field: 1 for field in [*ORDERS_PAGE_SORT, *fields]}
+    return await db_get_orders_page(
+        collections_queries, ORDERS_PAGE_SORT, limit, db, DB_PMK_NAME, projection
+    )
@@ -0,0 +1,159 @@
+import asyncio
+from bson import ObjectId
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorClient
+from utility.batch_loader import DataLoaders
+from routers.orders.crud import db_get_placements_fields
+from routers.orders.orders_bulk_creation import (
+    bulk_cell,
+    bulk_move_order,
+    bulk_move_preconditions,
+)
+from constants import (
+    DB_PMK_NAME,
+    PLACEMENT_COLLECTIONS,
+    PT_STORAGE,
+)
+
+
+# Dry run of the move orders, used by drag-and-drop to check every hovered cell before the drop.
+# Every worker keeps placements it already read, with their `lastChange` and `version`.
+# Every check only reads these two fields of the used placements, whole placement is read again only after it's changed.
+# `wheelstack`s are always read, they're small and can be changed without their placements.
+# Orders are checked by the same rules as bulk creation, but the gathered state is never changed:
+#  every order is checked alone, because checked positions are alternatives of the same move, not a batch.
+
+PlacementKey = tuple[str, ObjectId]
+
+# { (collection, placement_id): { 'stamp': (lastChange, version), 'data': placement_data } }
+validation_placements: dict[PlacementKey, dict] = {}
+
+
+def validation_stamp(placement_data: dict) -> tuple:
+    # `lastChange` alone can miss changes made in the same millisecond, `version` can't.
+    return placement_data.get('lastChange'), placement_data.get('version', 0)
+
+
+def validation_placement_field(placement_type: str) -> str:
+    return 'elements' if PT_STORAGE == placement_type else 'rows'
+
+
+async def validation_read(
+        new_orders: list[tuple[dict, ObjectId | None]],
+        db: AsyncIOMotorClient,
+) -> dict:
+    """
+    Gathers the same `state` as `bulk_move_read`, placements are taken from the cache if they're not changed.
+    """
+    # { collection: { placement_id: field } }
+    placements: dict[str, dict[ObjectId, str]] = {}
+    storage_wheelstacks: list[ObjectId] = []
+    for new_order, source_wheelstack_id in new_orders:
+        for side in ('source', 'destination'):
+            placement_type: str = new_order[side]['placementType']
+            placements.setdefault(PLACEMENT_COLLECTIONS[placement_type], {})[
+                new_order[side]['placementId']
+            ] = validation_placement_field(placement_type)
+        if source_wheelstack_id is not None:
+            storage_wheelstacks.append(source_wheelstack_id)
+    stamps_results = await asyncio.gather(*[
+        db_get_placements_fields(
+            list(collection_placements), ['lastChange', 'version'], db, DB_PMK_NAME, placement_collection
+        )
+        for placement_collection, collection_placements in placements.items()
+    ])
+    existing: list[PlacementKey] = []
+    # { collection: [ placement_id ] }
+    stale: dict[str, list[ObjectId]] = {}
+    for placement_collection, collection_stamps in zip(placements, stamps_results):
+        for placement_id in placements[placement_collection]:
+            placement_key: PlacementKey = (placement_collection, placement_id)
+            stamp_data: dict | None = collection_stamps.get(placement_id)
+            if stamp_data is None:
+                validation_placements.pop(placement_key, None)
+                continue
+            existing.append(placement_key)
+            cached: dict | None = validation_placements.get(placement_key)
+            if cached is None or cached['stamp'] != validation_stamp(stamp_data):
+                stale.setdefault(placement_collection, []).append(placement_id)
+    fresh_results = await asyncio.gather(*[
+        db_get_placements_fields(
+            stale_placements,
+            sorted({placements[placement_collection][placement_id] for placement_id in stale_placements})
+            + ['lastChange', 'version'],
+            db, DB_PMK_NAME, placement_collection
+        )
+        for placement_collection, stale_placements in stale.items()
+    ])
+    for placement_collection, collection_placements in zip(stale, fresh_results):
+        for placement_id in stale[placement_collection]:
+            placement_data: dict | None = collection_placements.get(placement_id)
+            # Deleted after its stamp was read.
+            if placement_data is None:
+                validation_placements.pop((placement_collection, placement_id), None)
+                continue
+            validation_placements[(placement_collection, placement_id)] = {
+                'stamp': validation_stamp(placement_data),
+                'data': placement_data,
+            }
+    state: dict = {
+        'placements': {
+            placement_key: validation_placements[placement_key]['data']
+            for placement_key in existing if placement_key in validation_placements
+        },
+        'wheelstacks': {},
+    }
+    wheelstacks: list[ObjectId] = list(storage_wheelstacks)
+    for new_order, _ in new_orders:
+        for side in ('source', 'destination'):
+            if PT_STORAGE == new_order[side]['placementType']:
+                continue
+            cell_data: dict | None = bulk_cell(new_order, side, state)
+            if cell_data is not None and cell_data.get('wheelStack') is not None:
+                wheelstacks.append(cell_data['wheelStack'])
+    wheelstacks = list(dict.fromkeys(wheelstacks))
+    loaders: DataLoaders = DataLoaders(db)
+    wheelstacks_data: list[dict | None] = await loaders.wheelstacks.load_many(wheelstacks)
+    for wheelstack_id, wheelstack_data in zip(wheelstacks, wheelstacks_data):
+        if wheelstack_data is not None:
+            state['wheelstacks'][wheelstack_id] = wheelstack_data
+    return state
+
+
+async def orders_validate_moves(
+        orders_data: list[dict],
+        db: AsyncIOMotorClient,
+) -> list[dict]:
+    """
+    Checks if every move order of `orders_data` can be created right now, nothing is written.
+    Returns outcome of every order, in the same order as requested.
+    """
+    outcomes: list[dict] = [
+        {
+            'index': index,
+            'valid': False,
+            'detail': None,
+        }
+        for index in range(len(orders_data))
+    ]
+    # [ (index, new_order, source_wheelstack_id) ]
+    new_orders: list[tuple[int, dict, ObjectId | None]] = []
+    for index, order_data in enumerate(orders_data):
+        try:
+            new_order, source_wheelstack_id = await bulk_move_order(order_data)
+        except HTTPException as error:
+            outcomes[index]['detail'] = error.detail
+            continue
+        new_orders.append((index, new_order, source_wheelstack_id))
+    state: dict = await validation_read(
+        [(new_order, source_wheelstack_id) for _, new_order, source_wheelstack_id in new_orders], db
+    )
+    for index, new_order, source_wheelstack_id in new_orders:
+        checked: HTTPException | tuple[dict, dict | None] = bulk_move_preconditions(
+            new_order, source_wheelstack_id, state
+        )
+        if isinstance(checked, HTTPException):
+            outcomes[index]['detail'] = checked.detail
+            continue
+        outcomes[index]['valid'] = True
+    return outcomes
@@ -1,37 +1,40 @@
 from bson import ObjectId
+from datetime import datetime
+from bson.errors import InvalidId
 from loguru import logger
-from utility.utilities import get_object_id
+from utility.utilities import (
+    get_object_id,
+    convert_object_id_and_datetime_to_str,
+    encode_cursor_token,
+    decode_cursor_token,
+)
 from database.mongo_connection import mongo_client
 from motor.motor_asyncio import AsyncIOMotorClient
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from auth.jwt_validation import get_role_verification_dependency
-from routers.history.history_actions import background_history_record
-from fastapi import APIRouter, Depends, HTTPException, status, Body, Path, Query, BackgroundTasks
+from routers.history.history_actions import background_history_record, background_history_records
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Path, Query, Header, Request
+from routers.orders.orders_events import build_orders_events_pipeline, orders_events_stream
 from routers.orders.crud import (
     db_find_order_by_object_id,
-    db_get_all_orders,
     order_make_json_friendly,
-    db_get_order_by_object_id,
 )
-from routers.orders.orders_completion import (
-    orders_complete_merge_wheelstacks,
-    orders_complete_move_wholestack,
-    orders_complete_move_to_rejected,
-    orders_complete_move_to_processing,
-    orders_complete_move_to_laboratory, orders_complete_move_to_storage,
-    orders_complete_move_wholestack_from_storage,
-    orders_complete_move_to_pro_rej_from_storage,
-    orders_complete_move_from_storage_to_storage,
-    orders_complete_move_from_storage_to_lab
+from routers.orders.orders_dispatch import (
+    orders_complete_dispatch,
+    orders_cancel_dispatch,
+    orders_bulk_process,
 )
-from routers.orders.orders_cancelation import (
-    orders_cancel_basic_extra_element_moves,
-    orders_cancel_merge_wheelstacks,
-    orders_cancel_move_wholestack,
-    orders_cancel_move_to_storage,
-    orders_cancel_move_from_storage_to_grid,
-    orders_cancel_move_from_storage_to_extras,
-    orders_cancel_move_from_storage_to_storage,
+from routers.orders.orders_bulk_creation import orders_bulk_create_moves
+from routers.orders.orders_validation import orders_validate_moves
+from routers.orders.orders_actor import placement_actors
+from routers.orders.orders_archive import archive_orders
+from routers.jobs.crud import db_enqueue_job, db_get_last_finished_job
+from routers.orders.orders_query import (
+    orders_find,
+    orders_find_by_ids,
+    orders_find_by_wheels,
+    orders_page_queries,
+    orders_find_page,
 )
 from routers.orders.models.models import (
     CreateMoveOrderRequest,
@@ -40,6 +43,10 @@ from routers.orders.models.models import (
     CreateBulkProcessingOrderRequest,
     CreateMoveToStorageRequest,
     CreateMoveFromStorageRequest,
+    BulkOrdersRequest,
+    BulkCancelOrdersRequest,
+    CreateBulkMovesRequest,
+    ValidateMovesRequest,
 )
 from routers.orders.orders_creation import (
     orders_create_merge_wheelstacks,
@@ -56,6 +63,16 @@ from routers.orders.orders_creation import (
     orders_create_move_from_storage_to_lab,
 )
 from constants import (
+    ORDER_STATUS_PENDING,
+    ORDER_STATUS_COMPLETED,
+    ORDER_STATUS_CANCELED,
+    ORDER_STATUS_COLLECTIONS,
+    ORDERS_PAGE_LIMIT_DEFAULT,
+    ORDERS_PAGE_LIMIT_MAX,
+    ADMIN_ACCESS_ROLES,
+    JOBS_QUEUE_ENABLED,
+    CLN_JOBS_QUEUE,
+    JOB_ORDERS_ARCHIVE,
     ORDER_MERGE_WHEELSTACKS,
     ORDER_MOVE_WHOLE_STACK,
     ORDER_MOVE_TO_LABORATORY,
@@ -63,19 +80,29 @@ from constants import (
     ORDER_MOVE_TO_REJECTED,
     DB_PMK_NAME,
     CLN_ACTIVE_ORDERS,
-    BASIC_EXTRA_MOVES,
-    CLN_COMPLETED_ORDERS,
-    CLN_CANCELED_ORDERS,
     ORDER_MOVE_TO_STORAGE,
     PS_STORAGE,
     BASIC_PAGE_VIEW_ROLES,
     BASIC_PAGE_ACTION_ROLES,
+    ORDER_ACTION_COMPLETE,
+    ORDER_ACTION_CANCEL,
+    ORDERS_BULK_CREATED,
+    ORDERS_ACTOR_ENABLED,
 )
 
 
 router = APIRouter()
 
 
+def order_statuses_filter(active_orders: bool, completed_orders: bool, canceled_orders: bool) -> list[str]:
+    order_filter: dict[str, bool] = {
+        ORDER_STATUS_PENDING: active_orders,
+        ORDER_STATUS_COMPLETED: completed_orders,
+        ORDER_STATUS_CANCELED: canceled_orders,
+    }
+    return [order_status for order_status, include in order_filter.items() if include]
+
+
 @router.get(
     path='/order/{order_object_id}',
     description='Get a single order data by its `objectId`.'
@@ -96,19 +123,11 @@ async def route_get_order(
         token_data: dict = get_role_verification_dependency(BASIC_PAGE_VIEW_ROLES),
 ):
     order_id = await get_object_id(order_object_id)
-    order_filter = {
-        CLN_ACTIVE_ORDERS: active_orders,
-        CLN_COMPLETED_ORDERS: completed_orders,
-        CLN_CANCELED_ORDERS: canceled_orders,
-    }
-    for collection, include in order_filter.items():
-        if not include:
-            continue
-        order_data = await db_get_order_by_object_id(
-            order_id, db, DB_PMK_NAME, collection
-        )
-        if order_data is not None:
-            order_data = await order_make_json_friendly(order_data)
+    statuses: list[str] = order_statuses_filter(active_orders, completed_orders, canceled_orders)
+    if statuses:
+        orders_data: list[dict] = await orders_find_by_ids([order_id], db, statuses)
+        if orders_data:
+            order_data = await order_make_json_friendly(orders_data[0])
             return JSONResponse(
                 content=order_data,
                 status_code=status.HTTP_200_OK,
@@ -119,13 +138,160 @@ async def route_get_order(
     )
 
 
+@router.get(
+    path='/wheel/{wheel_object_id}',
+    description='Get all orders affecting the wheel with `objectId`, from all chosen order collections at once.'
+                ' Searching for all `orderType`s by default.',
+    name='Get Wheel Orders',
+)
+async def route_get_wheel_orders(
+        wheel_object_id: str = Path(...,
+                                    description='`objectId` of the wheel to search'),
+        active_orders: bool = Query(True,
+                                    description='False to exclude `activeOrders`'),
+        completed_orders: bool = Query(True,
+                                       description='False to exclude `completedOrders`'),
+        canceled_orders: bool = Query(True,
+                                      description='False to exclude `canceledOrders`'),
+        db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
+        token_data: dict = get_role_verification_dependency(BASIC_PAGE_VIEW_ROLES),
+):
+    wheel_id = await get_object_id(wheel_object_id)
+    statuses: list[str] = order_statuses_filter(active_orders, completed_orders, canceled_orders)
+    orders_data: list[dict] = []
+    if statuses:
+        orders_data = await orders_find_by_wheels([wheel_id], db, statuses)
+    return JSONResponse(
+        content=convert_object_id_and_datetime_to_str(orders_data),
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@router.get(
+    path='',
+    description='Page of orders from all chosen order collections, newest first, ordered by (`createdAt`, `_id`).'
+                ' Can be filtered by `orderType`, `status`, placement, `wheelstack` and `createdAt` period.'
+                ' `fields` limits returned fields of the orders, `_id` and `createdAt` are always returned.'
+                ' `next` token of the response is used to get the next page, `null` == last page.',
+    name='Get Orders Page',
+)
+async def route_get_orders_page(
+        order_type: list[str] = Query(
+            default=None,
+            description='`orderType`s to filter on',
+        ),
+        order_status: list[str] = Query(
+            default=None,
+            alias='status',
+            description=f'`status`es to filter on: {', '.join(ORDER_STATUS_COLLECTIONS)}',
+        ),
+        placement_id: str = Query(
+            default=None,
+            description='`ObjectId` of the source or destination placement',
+        ),
+        placement_type: str = Query(
+            default=None,
+            description='`placementType` of the `placement_id`, required with it',
+        ),
+        wheelstack_id: str = Query(
+            default=None,
+            description='`ObjectId` of the source or destination `wheelstack`',
+        ),
+        created_from: datetime = Query(
+            default=None,
+            description='Start date of the `createdAt` period',
+        ),
+        created_to: datetime = Query(
+            default=None,
+            description='End date of the `createdAt` period',
+        ),
+        fields: list[str] = Query(
+            default=None,
+            description='Top level fields of the orders to return, all fields by default',
+        ),
+        limit: int = Query(
+            default=ORDERS_PAGE_LIMIT_DEFAULT,
+            ge=1,
+            le=ORDERS_PAGE_LIMIT_MAX,
+            description='Max number of orders on the page',
+        ),
+        next_token: str = Query(
+            default=None,
+            alias='next',
+            description='`next` token of the previous page',
+        ),
+        db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
+        token_data: dict = get_role_verification_dependency(BASIC_PAGE_VIEW_ROLES),
+):
+    if order_status:
+        unknown_statuses: list[str] = [
+            requested_status for requested_status in order_status
+            if requested_status not in ORDER_STATUS_COLLECTIONS
+        ]
+        if unknown_statuses:
+            raise HTTPException(
+                detail=f'Unknown order `status`es: {unknown_statuses}',
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+    if placement_id and not placement_type:
+        raise HTTPException(
+            detail='`placement_type` is required with `placement_id`',
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+    if fields:
+        unknown_fields: list[str] = [field for field in fields if not field.isidentifier()]
+        if unknown_fields:
+            raise HTTPException(
+                detail=f'Only top level fields can be chosen: {unknown_fields}',
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+    if placement_id:
+        placement_id: ObjectId = await get_object_id(placement_id)
+    if wheelstack_id:
+        wheelstack_id: ObjectId = await get_object_id(wheelstack_id)
+    after: tuple[datetime, ObjectId] | None = None
+    if next_token:
+        cursor_data: dict = await decode_cursor_token(next_token)
+        try:
+            after = (
+                datetime.fromisoformat(cursor_data['createdAt']),
+                ObjectId(cursor_data['_id']),
+            )
+        except (KeyError, TypeError, ValueError, InvalidId):
+            raise HTTPException(
+                detail='Invalid cursor token',
+                status_code=status.HTTP_400_BAD_REQUEST,
+            )
+    collections_queries: dict[str, dict] = orders_page_queries(
+        order_type, order_status, placement_id, placement_type or '',
+        wheelstack_id, created_from, created_to, after
+    )
+    # Extra order tells us if there's a next page.
+    orders_data: list[dict] = await orders_find_page(collections_queries, limit + 1, db, fields)
+    next_cursor: str | None = None
+    if len(orders_data) > limit:
+        orders_data = orders_data[:limit]
+        next_cursor = await encode_cursor_token({
+            'createdAt': orders_data[-1]['createdAt'],
+            '_id': orders_data[-1]['_id'],
+        })
+    return JSONResponse(
+        content={
+            'orders': convert_object_id_and_datetime_to_str(orders_data),
+            'next': next_cursor,
+        },
+        status_code=status.HTTP_200_OK,
+    )
+
+
 # TODO: We need to think about changing platform and grid,
 #  because should we even differ them? Why not just use their id + name to differ.
 #  Also we need extra endpoint to differ sourceId and destinationId for different platforms and grids.
 @router.get(
     path='/all',
     description='Get all of the order types, or filter them with query.'
-                'Returns all types by default.',
+                'Returns all types by default.'
+                ' Every order is returned, use `GET /orders` to get them by pages.',
     name='Get Orders',
 )
 async def route_get_all_orders(
@@ -138,41 +304,73 @@ async def route_get_all_orders(
         db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
         token_data: dict = get_role_verification_dependency(BASIC_PAGE_VIEW_ROLES),
 ):
-    all_data = {}
-    if active_orders:
-        active = await db_get_all_orders(db, DB_PMK_NAME, CLN_ACTIVE_ORDERS)
-        active_json = {}
-        for order_data in active:
-            order_json = await order_make_json_friendly(order_data)
-            active_json[order_json['_id']] = order_json
-        all_data['activeOrders'] = active_json
-    if completed_orders:
-        completed = await db_get_all_orders(db, DB_PMK_NAME, CLN_COMPLETED_ORDERS)
-        completed_json = {}
-        for order_data in completed:
-            order_json = await order_make_json_friendly(order_data)
-            completed_json[order_json['_id']] = order_json
-        all_data['completedOrders'] = completed_json
-    if canceled_orders:
-        canceled = await db_get_all_orders(db, DB_PMK_NAME, CLN_CANCELED_ORDERS)
-        canceled_json = {}
-        for order_data in canceled:
-            order_json = await order_make_json_friendly(order_data)
-            canceled_json[order_json['_id']] = order_json
-        all_data['canceledOrders'] = canceled_json
+    statuses: list[str] = order_statuses_filter(active_orders, completed_orders, canceled_orders)
+    all_data = {
+        ORDER_STATUS_COLLECTIONS[order_status]: {} for order_status in statuses
+    }
+    if statuses:
+        orders_data: list[dict] = await orders_find({}, db, statuses)
+        for order_json in convert_object_id_and_datetime_to_str(orders_data):
+            all_data[ORDER_STATUS_COLLECTIONS[order_json['status']]][order_json['_id']] = order_json
     return JSONResponse(
         content=all_data,
         status_code=status.HTTP_200_OK,
     )
 
 
+@router.get(
+    path='/stream',
+    description='Server-Sent Events stream of orders lifecycle events: `created`, `completed`, `canceled`.'
+                ' Every event carries compact order summary.'
+                ' Can be filtered by placement, `orderType` and event type.'
+                ' Resumes from `Last-Event-ID` header (or `lastEventId` query), if it is still available.',
+    name='Orders Events Stream',
+)
+async def route_get_orders_stream(
+        request: Request,
+        placement_id: str = Query('',
+                                  alias='placementId',
+                                  description='`objectId` of the placement, source or destination of the order'),
+        placement_type: str = Query('',
+                                    alias='placementType',
+                                    description='Type of the placement, used with `placementId`'),
+        order_types: list[str] = Query([],
+                                       alias='orderType',
+                                       description='`orderType`s to include, all of them by default'),
+        event_types: list[str] = Query([],
+                                       alias='eventType',
+                                       description='Events to include: `created`, `completed`, `canceled`.'
+                                                   ' All of them by default'),
+        last_event_id_query: str = Query('',
+                                         alias='lastEventId',
+                                         description='Used if `Last-Event-ID` header is not set'),
+        last_event_id: str = Header('',
+                                    alias='Last-Event-ID'),
+        db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
+        token_data: dict = get_role_verification_dependency(BASIC_PAGE_VIEW_ROLES),
+):
+    stream_placement_id: ObjectId | None = None
+    if placement_id:
+        stream_placement_id = await get_object_id(placement_id)
+    pipeline: list[dict] = await build_orders_events_pipeline(
+        stream_placement_id, placement_type, order_types, event_types
+    )
+    return StreamingResponse(
+        orders_events_stream(request, pipeline, last_event_id or last_event_id_query, db),
+        media_type='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+        },
+    )
+
+
 @router.post(
     path='/create/move',
     description='Creates a new order with a chosen type, validates if it can be executed',
     name='New Order',
 )
 async def route_post_create_order_move(
-        background_tasks: BackgroundTasks,
         order_data: CreateMoveOrderRequest = Body(...,
                                                   description='all required data for a new `order`'),
         db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
@@ -180,7 +378,16 @@ async def route_post_create_order_move(
 ):
     created_order_id: ObjectId | None = None
     data = order_data.model_dump()
-    if ORDER_MOVE_WHOLE_STACK == data['orderType']:
+    if ORDERS_ACTOR_ENABLED and data['orderType'] in (ORDER_MOVE_WHOLE_STACK, ORDER_MERGE_WHEELSTACKS):
+        logger.info(f'Queueing order of type = `{data['orderType']}` to the placement actor')
+        outcome: dict = await placement_actors.submit(order_data.model_dump(mode='json'), db)
+        if ORDERS_BULK_CREATED != outcome['status']:
+            raise HTTPException(
+                detail=outcome['detail'],
+                status_code=outcome['statusCode'],
+            )
+        created_order_id = outcome['_id']
+    elif ORDER_MOVE_WHOLE_STACK == data['orderType']:
         logger.info(f'Creating order of type = `{ORDER_MOVE_WHOLE_STACK}`')
         created_order_id = await orders_create_move_whole_wheelstack(db, data)
     elif ORDER_MERGE_WHEELSTACKS == data['orderType']:
@@ -192,10 +399,10 @@ async def route_post_create_order_move(
     destination_id = await get_object_id(data['destination']['placementId'])
     destination_type = data['destination']['placementType']
     if source_id == destination_id:
-        background_tasks.add_task(background_history_record, source_id, source_type, db)
+        await background_history_record(source_id, source_type, db)
     else:
-        background_tasks.add_task(background_history_record, source_id, source_type, db)
-        background_tasks.add_task(background_history_record, destination_id, destination_type, db)
+        await background_history_record(source_id, source_type, db)
+        await background_history_record(destination_id, destination_type, db)
     # - BG record -
     return JSONResponse(
         content={
@@ -211,7 +418,6 @@ async def route_post_create_order_move(
     name='New Order',
 )
 async def route_post_create_order_move_to_lab(
-        background_tasks: BackgroundTasks,
         order_data: CreateLabOrderRequest = Body(...,
                                                  description='all required data for a new lab `order`'),
         db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
@@ -226,10 +432,10 @@ async def route_post_create_order_move_to_lab(
     destination_id = await get_object_id(data['destination']['placementId'])
     destination_type = data['destination']['placementType']
     if source_id == destination_id:
-        background_tasks.add_task(background_history_record, source_id, source_type, db)
+        await background_history_record(source_id, source_type, db)
     else:
-        background_tasks.add_task(background_history_record, source_id, source_type, db)
-        background_tasks.add_task(background_history_record, destination_id, destination_type, db)
+        await background_history_record(source_id, source_type, db)
+        await background_history_record(destination_id, destination_type, db)
     # - BG record -
     return JSONResponse(
         content={
@@ -245,7 +451,6 @@ async def route_post_create_order_move_to_lab(
     name='New Order',
 )
 async def route_post_create_order_move_to_processing(
-        background_tasks: BackgroundTasks,
         order_data: CreateProcessingOrderRequest = Body(...,
                                                         description='all required data for a new processing `order`'),
         db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
@@ -260,10 +465,10 @@ async def route_post_create_order_move_to_processing(
     destination_id = await get_object_id(data['destination']['placementId'])
     destination_type = data['destination']['placementType']
     if source_id == destination_id:
-        background_tasks.add_task(background_history_record, source_id, source_type, db)
+        await background_history_record(source_id, source_type, db)
     else:
-        background_tasks.add_task(background_history_record, source_id, source_type, db)
-        background_tasks.add_task(background_history_record, destination_id, destination_type, db)
+        await background_history_record(source_id, source_type, db)
+        await background_history_record(destination_id, destination_type, db)
     # - BG record -
     return JSONResponse(
         content={
@@ -279,7 +484,6 @@ async def route_post_create_order_move_to_processing(
     name='New Bulk Orders',
 )
 async def route_post_create_bulk_orders_move_to_pro_rej(
-        background_tasks: BackgroundTasks,
         order_data: CreateBulkProcessingOrderRequest = Body(...,
                                                             description='basic data'),
         from_everywhere: bool = Query(False,
@@ -297,10 +501,10 @@ async def route_post_create_bulk_orders_move_to_pro_rej(
     destination_id = await get_object_id(order_req_data['destination']['placementId'])
     destination_type = order_req_data['destination']['placementType']
     if source_id == destination_id:
-        background_tasks.add_task(background_history_record, source_id, source_type, db)
+        await background_history_record(source_id, source_type, db)
     else:
-        background_tasks.add_task(background_history_record, source_id, source_type, db)
-        background_tasks.add_task(background_history_record, destination_id, destination_type, db)
+        await background_history_record(source_id, source_type, db)
+        await background_history_record(destination_id, destination_type, db)
     # - BG record -
     return JSONResponse(
         content={
@@ -316,7 +520,6 @@ async def route_post_create_bulk_orders_move_to_pro_rej(
     name='New Order',
 )
 async def route_post_create_order_move_to_rejected(
-        background_tasks: BackgroundTasks,
         order_data: CreateProcessingOrderRequest = Body(...,
                                                         description='all required data for a new processing `order`'),
         db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
@@ -331,10 +534,10 @@ async def route_post_create_order_move_to_rejected(
     destination_id = await get_object_id(data['destination']['placementId'])
     destination_type = data['destination']['placementType']
     if source_id == destination_id:
-        background_tasks.add_task(background_history_record, source_id, source_type, db)
+        await background_history_record(source_id, source_type, db)
     else:
-        background_tasks.add_task(background_history_record, source_id, source_type, db)
-        background_tasks.add_task(background_history_record, destination_id, destination_type, db)
+        await background_history_record(source_id, source_type, db)
+        await background_history_record(destination_id, destination_type, db)
     # - BG record -
     return JSONResponse(
         content={
@@ -350,7 +553,6 @@ async def route_post_create_order_move_to_rejected(
     name='New Order',
 )
 async def route_post_create_order_move_to_storage(
-        background_tasks: BackgroundTasks,
         order_data: CreateMoveToStorageRequest,
         db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
         token_data: dict = get_role_verification_dependency(BASIC_PAGE_ACTION_ROLES),
@@ -364,10 +566,10 @@ async def route_post_create_order_move_to_storage(
     destination_id = await get_object_id(data['storage'])
     destination_type = PS_STORAGE
     if source_id == destination_id:
-        background_tasks.add_task(background_history_record, source_id, source_type, db)
+        await background_history_record(source_id, source_type, db)
     else:
-        background_tasks.add_task(background_history_record, source_id, source_type, db)
-        background_tasks.add_task(background_history_record, destination_id, destination_type, db)
+        await background_history_record(source_id, source_type, db)
+        await background_history_record(destination_id, destination_type, db)
     # - BG record -
     return JSONResponse(
         content={
@@ -383,7 +585,6 @@ async def route_post_create_order_move_to_storage(
     name='New Order',
 )
 async def route_post_create_order_move_from_storage(
-        background_tasks: BackgroundTasks,
         order_data: CreateMoveFromStorageRequest = Body(...),
         db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
         token_data: dict = get_role_verification_dependency(BASIC_PAGE_ACTION_ROLES),
@@ -408,10 +609,10 @@ async def route_post_create_order_move_from_storage(
     destination_id = await get_object_id(data['destination']['placementId'])
     destination_type = data['destination']['placementType']
     if source_id == destination_id:
-        background_tasks.add_task(background_history_record, source_id, source_type, db)
+        await background_history_record(source_id, source_type, db)
     else:
-        background_tasks.add_task(background_history_record, source_id, source_type, db)
-        background_tasks.add_task(background_history_record, destination_id, destination_type, db)
+        await background_history_record(source_id, source_type, db)
+        await background_history_record(destination_id, destination_type, db)
     # - BG record -
     return JSONResponse(
         content={
@@ -421,13 +622,116 @@ async def route_post_create_order_move_from_storage(
     )
 
 
+@router.post(
+    path='/create/bulk/moves',
+    description=f'Creates every `{ORDER_MOVE_WHOLE_STACK}` | `{ORDER_MERGE_WHEELSTACKS}` | `{ORDER_MOVE_TO_STORAGE}`'
+                ' order of the list. Every order is validated against placements gathered once for the whole list,'
+                ' including conflicts with previous orders of the same list.'
+                ' Returns outcome of every order: `created` | `failed`,'
+                ' failed orders have `statusCode` the single order creation responds with',
+    name='New Bulk Move Orders',
+)
+async def route_post_create_bulk_move_orders(
+        orders_data: CreateBulkMovesRequest = Body(...,
+                                                   description='all required data for every new `order`'),
+        db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
+        token_data: dict = get_role_verification_dependency(BASIC_PAGE_ACTION_ROLES),
+):
+    data = orders_data.model_dump(mode='json')
+    outcomes, changed_placements = await orders_bulk_create_moves(data['orders'], db)
+    await background_history_records(changed_placements, db)
+    return JSONResponse(
+        content={
+            'orders': convert_object_id_and_datetime_to_str(outcomes),
+        },
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@router.post(
+    path='/validate',
+    description=f'Checks if every `{ORDER_MOVE_WHOLE_STACK}` | `{ORDER_MERGE_WHEELSTACKS}` | `{ORDER_MOVE_TO_STORAGE}`'
+                ' order of the list can be created right now, with the same checks as their creation.'
+                ' Nothing is created or blocked, every order is checked alone.'
+                ' Returns outcome of every order: `valid` + `detail` with the reason it cant be created',
+    name='Validate Move Orders',
+)
+async def route_post_validate_move_orders(
+        orders_data: ValidateMovesRequest = Body(...,
+                                                 description='all required data for every checked `order`'),
+        db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
+        token_data: dict = get_role_verification_dependency(BASIC_PAGE_ACTION_ROLES),
+):
+    data = orders_data.model_dump(mode='json')
+    outcomes: list[dict] = await orders_validate_moves(data['orders'], db)
+    return JSONResponse(
+        content={
+            'orders': outcomes,
+        },
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@router.post(
+    path='/complete/bulk',
+    description='Completes every order of the list. Orders are grouped by shared placements,'
+                ' orders of the same group are completed with a single transaction if it\'s possible.'
+                ' Returns outcome of every order: `completed` | `failed` | `notFound`',
+    name='Complete Orders',
+)
+async def route_post_complete_orders_bulk(
+        orders_data: BulkOrdersRequest = Body(...,
+                                              description='`objectId`s of the orders to complete'),
+        db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
+        token_data: dict = get_role_verification_dependency(BASIC_PAGE_VIEW_ROLES),
+):
+    orders: list[ObjectId] = [await get_object_id(order_id) for order_id in orders_data.orders]
+    outcomes, changed_placements = await orders_bulk_process(ORDER_ACTION_COMPLETE, orders, db)
+    # + BG record +
+    await background_history_records(changed_placements, db)
+    # - BG record -
+    return JSONResponse(
+        content={
+            'orders': convert_object_id_and_datetime_to_str(outcomes),
+        },
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@router.post(
+    path='/cancel/bulk',
+    description='Cancels every order of the list. Orders are grouped by shared placements,'
+                ' orders of the same group are canceled with a single transaction if it\'s possible.'
+                ' Returns outcome of every order: `canceled` | `failed` | `notFound`',
+    name='Cancel Orders',
+)
+async def route_post_cancel_orders_bulk(
+        orders_data: BulkCancelOrdersRequest = Body(...,
+                                                    description='`objectId`s of the orders to cancel'),
+        db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
+        token_data: dict = get_role_verification_dependency(BASIC_PAGE_VIEW_ROLES),
+):
+    orders: list[ObjectId] = [await get_object_id(order_id) for order_id in orders_data.orders]
+    outcomes, changed_placements = await orders_bulk_process(
+        ORDER_ACTION_CANCEL, orders, db, orders_data.cancellationReason
+    )
+    # + BG record +
+    await background_history_records(changed_placements, db)
+    # - BG record -
+    return JSONResponse(
+        content={
+            'orders': convert_object_id_and_datetime_to_str(outcomes),
+        },
+        status_code=status.HTTP_200_OK,
+    )
+
+
 @router.post(
     path='/cancel/{order_object_id}',
     description=f'Cancels existing order',
     name='Cancel Order',
 )
 async def route_post_cancel_order(
-        background_tasks: BackgroundTasks,
         order_object_id: str = Path(...,
                                     description='`objectId` of the order to cancel'),
         cancellation_reason: str = Query('',
@@ -442,30 +746,7 @@ async def route_post_cancel_order(
             detail=f'Order with `objectId` = {order_id}. Not Found.',
             status_code=status.HTTP_404_NOT_FOUND,
         )
-    result = None
-    if order_data['orderType'] == ORDER_MOVE_WHOLE_STACK:
-        if order_data['source']['placementType'] == PS_STORAGE:
-            result = await orders_cancel_move_from_storage_to_grid(
-                order_data, cancellation_reason, db
-            )
-        else:
-            result = await orders_cancel_move_wholestack(order_data, cancellation_reason, db)
-    elif order_data['orderType'] in BASIC_EXTRA_MOVES:
-        if order_data['source']['placementType'] == PS_STORAGE:
-            result = await orders_cancel_move_from_storage_to_extras(order_data, cancellation_reason, db)
-        else:
-            result = await orders_cancel_basic_extra_element_moves(order_data, cancellation_reason, db)
-    elif order_data['orderType'] == ORDER_MOVE_TO_STORAGE:
-        if (order_data['source']['placementType'] == PS_STORAGE
-                and order_data['destination']['placementType'] == PS_STORAGE):
-            result = await orders_cancel_move_from_storage_to_storage(order_data, cancellation_reason, db)
-        else:
-            result = await orders_cancel_move_to_storage(
-                order_data, cancellation_reason, db
-            )
-    elif order_data['orderType'] == ORDER_MERGE_WHEELSTACKS:
-        # TODO: What about storages?
-        result = await orders_cancel_merge_wheelstacks(order_data, cancellation_reason, db)
+    result = await orders_cancel_dispatch(order_data, cancellation_reason, db)
     logger.info(f'Order canceled and moved to `canceledOrders` with `_id` = {result}')
     # + BG record +
     source_id = order_data['source']['placementId']
@@ -473,10 +754,10 @@ async def route_post_cancel_order(
     destination_id = order_data['destination']['placementId']
     destination_type = order_data['destination']['placementType']
     if source_id == destination_id:
-        background_tasks.add_task(background_history_record, source_id, source_type, db)
+        await background_history_record(source_id, source_type, db)
     else:
-        background_tasks.add_task(background_history_record, source_id, source_type, db)
-        background_tasks.add_task(background_history_record, destination_id, destination_type, db)
+        await background_history_record(source_id, source_type, db)
+        await background_history_record(destination_id, destination_type, db)
     # - BG record -
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
@@ -487,7 +768,6 @@ async def route_post_cancel_order(
     name='Complete Order',
 )
 async def route_post_complete_order(
-        background_tasks: BackgroundTasks,
         order_object_id: str = Path(...,
                                     description='`objectId` of the order to complete'),
         db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
@@ -501,36 +781,7 @@ async def route_post_complete_order(
             status_code=status.HTTP_404_NOT_FOUND,
         )
     log_record: str = f'Order completed and moved to `completedOrders` with `_id` => '
-    result: str | ObjectId = ''
-    if order_data['orderType'] == ORDER_MOVE_WHOLE_STACK:
-        if PS_STORAGE == order_data['source']['placementType']:
-            result = await orders_complete_move_wholestack_from_storage(order_data, db)
-        else:
-            result = await orders_complete_move_wholestack(order_data, db)
-    elif order_data['orderType'] == ORDER_MOVE_TO_PROCESSING:
-        if PS_STORAGE == order_data['source']['placementType']:
-            result = await orders_complete_move_to_pro_rej_from_storage(db, order_data, True)
-        else:
-            result = await orders_complete_move_to_processing(order_data, db)
-    elif order_data['orderType'] == ORDER_MOVE_TO_REJECTED:
-        if PS_STORAGE == order_data['source']['placementType']:
-            result = await orders_complete_move_to_pro_rej_from_storage(db, order_data, False)
-        else:
-            result = await orders_complete_move_to_rejected(order_data, db)
-    elif order_data['orderType'] == ORDER_MOVE_TO_LABORATORY:
-        if PS_STORAGE == order_data['source']['placementType']:
-            result = await orders_complete_move_from_storage_to_lab(order_data, db)
-        else:
-            result = await orders_complete_move_to_laboratory(order_data, db)
-    elif order_data['orderType'] == ORDER_MOVE_TO_STORAGE:
-        if (order_data['source']['placementType'] == PS_STORAGE
-                and order_data['destination']['placementType'] == PS_STORAGE):
-            result = await orders_complete_move_from_storage_to_storage(order_data, db)
-        else:
-            result = await orders_complete_move_to_storage(order_data, db)
-    elif order_data['orderType'] == ORDER_MERGE_WHEELSTACKS:
-        # TODO: What about storages?
-        result = await orders_complete_merge_wheelstacks(order_data, db)
+    result = await orders_complete_dispatch(order_data, db)
     logger.info(log_record + str(result))
     # + BG record +
     source_id = order_data['source']['placementId']
@@ -538,9 +789,66 @@ async def route_post_complete_order(
     destination_id = order_data['destination']['placementId']
     destination_type = order_data['destination']['placementType']
     if source_id == destination_id:
-        background_tasks.add_task(background_history_record, source_id, source_type, db)
+        await background_history_record(source_id, source_type, db)
     else:
-        background_tasks.add_task(background_history_record, source_id, source_type, db)
-        background_tasks.add_task(background_history_record, destination_id, destination_type, db)
+        await background_history_record(source_id, source_type, db)
+        await background_history_record(destination_id, destination_type, db)
     # - BG record -
     return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post(
+    path='/archive',
+    description='Start archivation of the completed|canceled orders older than `ORDERS_ARCHIVE_AFTER_DAYS`.'
+                ' Archivation is enqueued as a job, and its report is available with `GET /orders/archive`.'
+                ' If jobs queue is disabled, archivation is done right away and its report is returned',
+    name='Start Orders Archivation',
+)
+async def route_post_orders_archive(
+        db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
+        token_data: dict = get_role_verification_dependency(ADMIN_ACCESS_ROLES),
+):
+    if not JOBS_QUEUE_ENABLED:
+        report = await archive_orders(db)
+        return JSONResponse(
+            content=convert_object_id_and_datetime_to_str(report),
+            status_code=status.HTTP_200_OK,
+        )
+    created: bool = await db_enqueue_job(
+        JOB_ORDERS_ARCHIVE, {}, db, DB_PMK_NAME, CLN_JOBS_QUEUE, JOB_ORDERS_ARCHIVE
+    )
+    return JSONResponse(
+        content={
+            'enqueued': created,
+        },
+        status_code=status.HTTP_202_ACCEPTED,
+    )
+
+
+@router.get(
+    path='/archive',
+    description='Get report of the last finished orders archivation: number of archived orders by collections',
+    name='Get Orders Archivation',
+)
+async def route_get_orders_archive(
+        db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
+        token_data: dict = get_role_verification_dependency(ADMIN_ACCESS_ROLES),
+):
+    last_job = await db_get_last_finished_job(
+        JOB_ORDERS_ARCHIVE, db, DB_PMK_NAME, CLN_JOBS_QUEUE
+    )
+    if last_job is None:
+        raise HTTPException(
+            detail='Orders archivation was never finished',
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+    return JSONResponse(
+        content=convert_object_id_and_datetime_to_str({
+            'jobId': last_job['_id'],
+            'status': last_job['status'],
+            'finishedAt': last_job['finishedAt'],
+            'lastError': last_job.get('lastError'),
+            'result': last_job.get('result'),
+        }),
+        status_code=status.HTTP_200_OK,
+    )
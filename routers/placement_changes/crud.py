@@ -0,0 +1,195 @@
+from bson import ObjectId
+from loguru import logger
+from pymongo import ReturnDocument
+from pymongo.results import UpdateResult
+from pymongo.errors import PyMongoError
+from fastapi import HTTPException, status
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorClientSession
+from utility.utilities import get_db_collection, time_w_timezone, log_db_record, log_db_error_record
+from constants import (
+    PLACEMENT_TYPES,
+    CLN_PLACEMENT_CHANGES,
+    PLACEMENT_CHANGES_LIMIT,
+    PLACEMENT_CHANGES_MAX_BATCH,
+    PLACEMENT_CHANGES_PRUNE_STEP,
+)
+
+
+# Update operators we can replay on the client side.
+JOURNAL_OPERATORS: dict[str, str] = {
+    '$set': 'set',
+    '$unset': 'unset',
+    '$addToSet': 'addToSet',
+    '$pull': 'pull',
+    '$push': 'push',
+}
+
+
+def placement_update_to_changes(update: dict) -> list[dict]:
+    changes: list[dict] = []
+    for operator, fields in update.items():
+        if operator not in JOURNAL_OPERATORS:
+            continue
+        op: str = JOURNAL_OPERATORS[operator]
+        for path, value in fields.items():
+            change = {
+                'op': op,
+                'path': path,
+            }
+            if 'unset' != op:
+                change['value'] = value
+            changes.append(change)
+    return changes
+
+
+async def db_insert_placement_change(
+        placement_id: ObjectId,
+        version: int,
+        update: dict,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+        session: AsyncIOMotorClientSession = None,
+) -> None:
+    """
+    Appends `update` into the `placementChanges` journal, as a change of the placement `version`.
+    `version` should already be set by the caller, with the same `session` as the `update`.
+    """
+    journal_collection = await get_db_collection(db, db_name, CLN_PLACEMENT_CHANGES)
+    journal_record = {
+        'placementId': placement_id,
+        'placementType': PLACEMENT_TYPES[db_collection],
+        'version': version,
+        'createdAt': await time_w_timezone(),
+        'changes': placement_update_to_changes(update),
+    }
+    await journal_collection.insert_one(journal_record, session=session)
+    if 0 == version % PLACEMENT_CHANGES_PRUNE_STEP and version > PLACEMENT_CHANGES_LIMIT:
+        await journal_collection.delete_many(
+            {
+                'placementId': placement_id,
+                'version': {
+                    '$lte': version - PLACEMENT_CHANGES_LIMIT,
+                }
+            },
+            session=session,
+        )
+
+
+async def db_update_placement_with_change(
+        placement_query: dict,
+        update: dict,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+        session: AsyncIOMotorClientSession = None,
+) -> UpdateResult:
+    """
+    Applies `update` to the placement found with `placement_query` and increments its `version` with the same write,
+     so concurrent changes are journaled in the same order as they're applied.
+    `update` is appended into the `placementChanges` journal with the returned `version`.
+    Journal record is a separate write: if it's lost, readers see a gap of versions and use full placement data.
+    Returns `UpdateResult` of the placement write, as `update_one` does.
+    `PyMongoError`s are not handled, callers handle them the same way as their `update_one`.
+    """
+    placement_collection = await get_db_collection(db, db_name, db_collection)
+    placement = await placement_collection.find_one_and_update(
+        placement_query,
+        {
+            **update,
+            '$inc': {'version': 1},
+        },
+        projection={'_id': 1, 'version': 1},
+        return_document=ReturnDocument.AFTER,
+        session=session,
+    )
+    if placement is None:
+        return UpdateResult({'n': 0, 'nModified': 0, 'ok': 1.0}, acknowledged=True)
+    await db_insert_placement_change(
+        placement['_id'], placement['version'], update, db, db_name, db_collection, session
+    )
+    return UpdateResult({'n': 1, 'nModified': 1, 'ok': 1.0}, acknowledged=True)
+
+
+async def db_get_placement_changes(
+        placement_id: ObjectId,
+        since_version: int,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+) -> dict | None:
+    """
+    Gathers all journaled changes of the placement made after `since_version`.
+    If changes can't be replayed from `since_version` (compacted, too far behind or unknown version),
+     `snapshotRequired` is set and client should use full placement data instead.
+    Returns `None` if placement not found.
+    """
+    placement_collection = await get_db_collection(db, db_name, db_collection)
+    journal_collection = await get_db_collection(db, db_name, CLN_PLACEMENT_CHANGES)
+    db_info = await log_db_record(db_name, CLN_PLACEMENT_CHANGES)
+    logger.info(
+        f'Attempt to gather changes of placement => {placement_id} since version {since_version}' + db_info
+    )
+    try:
+        placement = await placement_collection.find_one(
+            {'_id': placement_id}, {'_id': 1, 'version': 1}
+        )
+        if placement is None:
+            return None
+        current_version: int = placement.get('version', 0)
+        result = {
+            'placementId': placement_id,
+            'placementType': PLACEMENT_TYPES[db_collection],
+            'since': since_version,
+            'version': current_version,
+            'snapshotRequired': False,
+            'changes': [],
+        }
+        if since_version == current_version:
+            return result
+        if (since_version < 0 or since_version > current_version
+                or current_version - since_version > PLACEMENT_CHANGES_MAX_BATCH):
+            result['snapshotRequired'] = True
+            return result
+        query = {
+            'placementId': placement_id,
+            'version': {
+                '$gt': since_version,
+                '$lte': current_version,
+            }
+        }
+        projection = {
+            '_id': 0,
+            'version': 1,
+            'createdAt': 1,
+            'changes': 1,
+        }
+        journal_records = await journal_collection.find(
+            query, projection
+        ).sort('version', 1).to_list(length=current_version - since_version)
+        # Only contiguous records can be replayed.
+        # Missing first one == compacted or lost, missing later ones == not yet written or lost.
+        last_version: int = since_version
+        for record in journal_records:
+            if record['version'] != last_version + 1:
+                break
+            result['changes'].append(record)
+            last_version = record['version']
+        if last_version == since_version:
+            result['snapshotRequired'] = True
+            result['changes'] = []
+            return result
+        result['version'] = last_version
+        logger.info(
+            f'Successfully gathered {len(result['changes'])} changes of placement => {placement_id}' + db_info
+        )
+        return result
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while gathering changes of placement => {placement_id}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while gathering placement changes',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
@@ -5,6 +5,7 @@ from fastapi import HTTPException, status
 from pymongo.errors import PyMongoError
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorClientSession
 from utility.utilities import get_db_collection, time_w_timezone, log_db_record, log_db_error_record
+from routers.placement_changes.crud import db_update_placement_with_change
 
 
 async def db_storage_make_json_friendly(storage_data: dict) -> dict:
@@ -139,12 +140,15 @@ async def db_storage_place_wheelstack(
         f'Attempt to add a new `wheelstack` = {wheelstack_id} into'
         f' `storage` with `objectId` = {storage_object_id} ' + db_info
     )
-    collection = await get_db_collection(db, db_name, db_collection)
     query = {
         '$or': [
             {'_id': storage_object_id},
             {'name': storage_name},
-        ]
+        ],
+        # Already placed `wheelstack` isn't journaled as a change.
+        'elements': {
+            '$ne': wheelstack_id,
+        },
     }
     update = {
         '$addToSet': {
@@ -156,7 +160,9 @@ async def db_storage_place_wheelstack(
             'lastChange': await time_w_timezone()
         }
     try:
-        result = await collection.update_one(query, update, session=session)
+        result = await db_update_placement_with_change(
+            query, update, db, db_name, db_collection, session
+        )
         log_mes = f'add operation for `storage` document with id = {storage_object_id} | name = {storage_name}' + db_info
         if 0 == result.modified_count:
             logger.info(f'Unsuccessful {log_mes}')
@@ -216,7 +222,6 @@ async def db_storage_delete_placed_wheelstack(
         session: AsyncIOMotorClientSession,
         record_change: bool = True,
 ):
-    collection = await get_db_collection(db, db_name, db_collection)
     query = {
         '$or': [
             {'_id': storage_object_id},
@@ -234,7 +239,9 @@ async def db_storage_delete_placed_wheelstack(
             'lastChange': await time_w_timezone()
         }
     try:
-        result = await collection.update_one(query, update, session=session)
+        result = await db_update_placement_with_change(
+            query, update, db, db_name, db_collection, session
+        )
         return result
     except PyMongoError as error:
         raise HTTPException(
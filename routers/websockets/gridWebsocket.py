@@ -1,13 +1,11 @@
 import json
 import asyncio
-import itertools
 from loguru import logger
 from bson import ObjectId
 from datetime import datetime
 from fastapi.websockets import WebSocketState
 from database.mongo_connection import mongo_client
 from motor.motor_asyncio import AsyncIOMotorClient
-from routers.base_platform.crud import get_platform_by_object_id
 from routers.batch_numbers.crud import db_find_batch_numbers_many, db_find_batch_numbers_w_unplaced
 from auth.jwt_validation import websocket_verify_multi_roles_token
 from fastapi import (
@@ -23,29 +21,37 @@ from constants import (
     BASIC_PAGE_ACTION_ROLES,
     BASIC_PAGE_VIEW_ROLES,
     CLN_ACTIVE_ORDERS,
-    CLN_BASE_PLATFORM,
     CLN_BATCH_NUMBERS,
     CLN_CANCELED_ORDERS,
     CLN_COMPLETED_ORDERS,
-    CLN_GRID,
     CLN_STORAGES,
     CLN_WHEELS,
-    CLN_WHEELSTACKS,
     DB_PMK_NAME,
-    PT_BASE_PLATFORM,
-    PT_GRID,
+    ORDER_STATUS_PENDING,
+    ORDER_STATUS_COMPLETED,
+    ORDER_STATUS_CANCELED,
+    PT_STORAGE,
+    PLACEMENT_COLLECTIONS,
+    WS_CHUNK_SIZE_DEFAULT,
+    WS_CHUNK_SIZE_MIN,
+    WS_CHUNK_SIZE_MAX,
 )
-from routers.grid.crud import get_grid_by_object_id
-from routers.orders.crud import db_get_orders_by_id_many
-from routers.grid.data_gather import convert_and_store_threadpool
+from routers.orders.crud import db_get_orders_by_id_chunk
+from routers.orders.orders_query import orders_find_by_ids
 from routers.wheelstacks.router import create_new_wheelstack_action
 from routers.storages.crud import db_get_storages_with_elements_data
 from routers.history.history_actions import background_history_record
-from routers.wheelstacks.crud import db_history_get_placement_wheelstacks
-from routers.wheels.crud import db_find_many_wheels_by_id, db_find_wheels_free_fields
+from routers.placement_changes.crud import db_get_placement_changes
+from routers.wheelstacks.crud import db_get_placement_snapshot
+from routers.wheels.crud import (
+    db_find_wheels_free_fields,
+    db_find_wheels_free_fields_chunk,
+)
 from utility.utilities import (
     async_convert_object_id_and_datetime_to_str,
     get_object_id,
+    encode_cursor_token,
+    decode_cursor_token,
     handle_http_exceptions_for_websocket
 )
 
@@ -71,63 +77,164 @@ async def create_json_req_resp(type, task, data, handler = ''):
 async def placement_update_action(
         db: AsyncIOMotorClient, settings: dict,
 ) -> dict:
-    init_tasks = []
     ignored_dates: list[datetime] = []
     if settings['lastChange']:
         ignored_dates.append(settings['lastChange'])
-    if PT_GRID == settings['placementType']:
-        init_tasks.append(
-            get_grid_by_object_id(
-                settings['placementId'], db, DB_PMK_NAME, CLN_GRID, ignored_dates
-            )
-        )
-    elif PT_BASE_PLATFORM == settings['placementType']:
-        init_tasks.append(
-            get_platform_by_object_id(
-                settings['placementId'], db, DB_PMK_NAME, CLN_BASE_PLATFORM, ignored_dates
-            )
-        )
-    if settings['includeWheelstacks']:
-        init_tasks.append(
-            db_history_get_placement_wheelstacks(
-                settings['placementId'], settings['placementType'],
-                db, DB_PMK_NAME, CLN_WHEELSTACKS,  [settings['placementType']], True
-            )
-        )
-    init_results = await asyncio.gather(*init_tasks)
-    placement_data = init_results[0]
+    # Placement, `wheelstack`s and `wheel`s in a single round trip.
+    placement_data = await db_get_placement_snapshot(
+        settings['placementId'], settings['placementType'],
+        db, DB_PMK_NAME, PLACEMENT_COLLECTIONS[settings['placementType']], ignored_dates,
+        settings['includeWheelstacks'], settings['includeWheelstacks'] and settings['includeWheels'],
+        settings.get('wheelstackFields'), settings.get('wheelFields'),
+    )
     if not placement_data:
         return {}
-    placement_data['wheelstacksData'] = {}
     placement_data['wheels'] = {}
-    # Not gathering `wheel`s without `wheelstacks`...
-    if not settings['includeWheelstacks']:
-        return placement_data
-    placement_wheelstacks = init_results[1]
-    if placement_wheelstacks is None: 
-        return placement_data
-    placement_wheels = []
-    conversion_tasks = []
-    conversion_tasks.append(
-        convert_and_store_threadpool(placement_wheelstacks)
-    )
-    if settings['includeWheels']:
-        for wheelstack in placement_wheelstacks:
-            placement_wheels.extend(wheelstack['wheels'])
-        if placement_wheels:
-            wheels_data: list[dict] = await db_find_many_wheels_by_id(
-                placement_wheels, db, DB_PMK_NAME, CLN_WHEELS
-            )
-            conversion_tasks.append(
-                convert_and_store_threadpool(wheels_data)
-            )
-    conversion_results = await asyncio.gather(*conversion_tasks)
-    placement_data['wheelstacksData'] = conversion_results[0]
-    placement_data['wheelsData'] = conversion_results[-1]
+    placement_data.setdefault('wheelstacksData', {})
+    placement_data.setdefault('wheelsData', {})
     placement_data['placementType'] = settings['placementType']
     return placement_data
 
 
+# region chunkedData
+# Tasks which can be sent in chunks, if `chunkSize` or `cursor` provided in `dataFilter`.
+CHUNKED_TASKS: dict[str, str] = {
+    'wheelsUnplaced': 'wheelsUnplaced',
+    'ordersData': 'ordersUpdate',
+}
+
+
+async def is_chunked_req(req_data: dict) -> bool:
+    req_data_filter: dict = req_data['filter'].get('dataFilter', {})
+    return (
+        'gather' == req_data['type']
+        and req_data['filter']['task'] in CHUNKED_TASKS
+        and ('chunkSize' in req_data_filter or 'cursor' in req_data_filter)
+    )
+
+
+async def get_chunk_size(req_data_filter: dict) -> int:
+    chunk_size: int = int(req_data_filter.get('chunkSize') or WS_CHUNK_SIZE_DEFAULT)
+    return max(WS_CHUNK_SIZE_MIN, min(chunk_size, WS_CHUNK_SIZE_MAX))
+
+
+async def wheels_unplaced_chunks(
+        req_data_filter: dict, cursor_data: dict, chunk_size: int, db: AsyncIOMotorClient
+):
+    req_batch_number = req_data_filter.get('batchNumber', '')
+    req_status = req_data_filter.get('status', '')
+    query_fields = {
+        'batchNumber': req_batch_number,
+        'status': req_status,
+    }
+    after_id: ObjectId | None = None
+    if cursor_data.get('after'):
+        after_id = await get_object_id(cursor_data['after'])
+    while True:
+        # +1 == we know about the next chunk without extra request
+        wheels_data: list[dict] = await db_find_wheels_free_fields_chunk(
+            db, DB_PMK_NAME, CLN_WHEELS, query_fields, after_id, chunk_size + 1
+        )
+        has_more: bool = len(wheels_data) > chunk_size
+        wheels_data = wheels_data[:chunk_size]
+        next_cursor: dict | None = None
+        if has_more:
+            after_id = wheels_data[-1]['_id']
+            next_cursor = {'after': after_id}
+        cor_wheels_data = await async_convert_object_id_and_datetime_to_str(wheels_data)
+        chunk_data = {
+            'wheels': cor_wheels_data,
+            'batchNumber': req_batch_number,
+        }
+        yield chunk_data, next_cursor
+        if not has_more:
+            return
+
+
+async def orders_data_chunks(
+        req_data_filter: dict, cursor_data: dict, chunk_size: int, db: AsyncIOMotorClient
+):
+    convert_tasks = [get_object_id(order_id) for order_id in req_data_filter['orders']]
+    orders: list[ObjectId] = await asyncio.gather(*convert_tasks)
+    check_collections: dict[str, bool] = {
+        CLN_ACTIVE_ORDERS: req_data_filter.get('activeOrders', False),
+        CLN_COMPLETED_ORDERS: req_data_filter.get('completedOrders', False),
+        CLN_CANCELED_ORDERS: req_data_filter.get('canceledOrders', False),
+    }
+    collections: list[str] = [collection for collection, include in check_collections.items() if include]
+    collection_index: int = 0
+    after_id: ObjectId | None = None
+    if cursor_data.get('collection') in collections:
+        collection_index = collections.index(cursor_data['collection'])
+    if cursor_data.get('after'):
+        after_id = await get_object_id(cursor_data['after'])
+    if not collections:
+        yield {'orders': []}, None
+        return
+    while collection_index < len(collections):
+        collection: str = collections[collection_index]
+        orders_data: list[dict] = await db_get_orders_by_id_chunk(
+            orders, after_id, chunk_size + 1, db, DB_PMK_NAME, collection
+        )
+        has_more: bool = len(orders_data) > chunk_size
+        orders_data = orders_data[:chunk_size]
+        next_cursor: dict | None = None
+        if has_more:
+            after_id = orders_data[-1]['_id']
+            next_cursor = {'collection': collection, 'after': after_id}
+        else:
+            collection_index += 1
+            after_id = None
+            if collection_index < len(collections):
+                next_cursor = {'collection': collections[collection_index], 'after': None}
+        # Nothing to show in this collection, but there's more to check.
+        if not orders_data and next_cursor is not None:
+            continue
+        cor_orders_data = await async_convert_object_id_and_datetime_to_str(orders_data)
+        yield {'orders': cor_orders_data}, next_cursor
+
+
+async def send_chunked_req_data(websocket: WebSocket, req_data: dict, db: AsyncIOMotorClient):
+    """
+    Sends requested data in chunks, every chunk is sent as soon as it's gathered.
+    Every chunk carries `cursor` token of the next chunk, so client can resume with it.
+    `maxChunks` limits the number of chunks sent for this request, 0 == all of them.
+    """
+    req_task: str = req_data['filter']['task']
+    req_data_filter: dict = req_data['filter']['dataFilter']
+    req_handler: str = req_data.get('handler', '')
+    chunk_size: int = await get_chunk_size(req_data_filter)
+    max_chunks: int = int(req_data_filter.get('maxChunks', 0))
+    cursor_data: dict = {}
+    if req_data_filter.get('cursor'):
+        cursor_data = await decode_cursor_token(req_data_filter['cursor'])
+    if 'wheelsUnplaced' == req_task:
+        chunks = wheels_unplaced_chunks(req_data_filter, cursor_data, chunk_size, db)
+    else:
+        chunks = orders_data_chunks(req_data_filter, cursor_data, chunk_size, db)
+    chunk_index: int = 0
+    async for chunk_data, next_cursor in chunks:
+        next_token: str | None = None
+        if next_cursor is not None:
+            next_token = await encode_cursor_token(next_cursor)
+        chunk_data['chunk'] = {
+            'index': chunk_index,
+            'size': chunk_size,
+            'cursor': next_token,
+            'last': next_token is None,
+        }
+        req_resp = await create_json_req_resp(
+            'dataUpdate', CHUNKED_TASKS[req_task], chunk_data, req_handler
+        )
+        if WebSocketState.CONNECTED != websocket.application_state:
+            return
+        await websocket.send_text(req_resp)
+        chunk_index += 1
+        if max_chunks and chunk_index >= max_chunks:
+            return
+# endregion chunkedData
+
+
 async def filter_req_data(req_data: dict, db: AsyncIOMotorClient):
     req_resp: dict[str, str | dict]
     req_type: str = req_data['type']
@@ -204,6 +311,8 @@ async def filter_req_data(req_data: dict, db: AsyncIOMotorClient):
                 'lastChange': last_change,
                 'includeWheelstacks': include_wheelstacks,
                 'includeWheels': include_wheels,
+                'wheelstackFields': req_data_filter.get('wheelstackFields'),
+                'wheelFields': req_data_filter.get('wheelFields'),
             }
             placement_data: dict = await placement_update_action(
                 db, action_settings
@@ -213,6 +322,42 @@ async def filter_req_data(req_data: dict, db: AsyncIOMotorClient):
                 'dataUpdate', 'placementUpdate', cor_placement_data
             )
         # endregion placementData
+        # region placementChanges
+        elif 'placementChanges' == req_task:
+            placement_id: ObjectId = await get_object_id(req_data_filter['placementId'])
+            placement_type: str = req_data_filter['placementType']
+            since_version: int = int(req_data_filter.get('since', 0))
+            changes_data = await db_get_placement_changes(
+                placement_id, since_version, db, DB_PMK_NAME, PLACEMENT_COLLECTIONS[placement_type]
+            )
+            if changes_data is not None:
+                changes_data['snapshot'] = None
+                # Client is too far behind == full placement data instead of changes.
+                if changes_data['snapshotRequired']:
+                    if PT_STORAGE == placement_type:
+                        storages_data = await db_get_storages_with_elements_data(
+                            [{'_id': placement_id}], db, DB_PMK_NAME, CLN_STORAGES
+                        )
+                        snapshot_data = storages_data[0] if storages_data else {}
+                    else:
+                        action_settings = {
+                            'placementId': placement_id,
+                            'placementName': req_data_filter.get('placementName', ''),
+                            'placementType': placement_type,
+                            'lastChange': None,
+                            'includeWheelstacks': req_data_filter.get('includeWheelstacks', False),
+                            'includeWheels': req_data_filter.get('includeWheels', False),
+                        }
+                        snapshot_data = await placement_update_action(
+                            db, action_settings
+                        )
+                    changes_data['version'] = snapshot_data.get('version', 0)
+                    changes_data['snapshot'] = snapshot_data
+            cor_changes_data: dict = await async_convert_object_id_and_datetime_to_str(changes_data)
+            req_resp = await create_json_req_resp(
+                'dataUpdate', 'placementChanges', cor_changes_data, req_handler
+            )
+        # endregion placementChanges
         # region batchesData
         elif 'batchesData' == req_task:
             batch_numbers: list[str] = req_data_filter['batchNumbers']
@@ -233,25 +378,16 @@ async def filter_req_data(req_data: dict, db: AsyncIOMotorClient):
                     get_object_id(order_id)
                 )
             convert_results = await asyncio.gather(*convert_tasks)
-            # This idea with 3 collection for 3 orderTypes...
-            # We need to rebuild :)
-            # For now, just check all we choose in message.
-            check_collections: list[str] = {
-                CLN_ACTIVE_ORDERS: req_data_filter.get('activeOrders', False),
-                CLN_COMPLETED_ORDERS: req_data_filter.get('completedOrders', False),
-                CLN_CANCELED_ORDERS: req_data_filter.get('canceledOrders', False),
+            check_statuses: dict[str, bool] = {
+                ORDER_STATUS_PENDING: req_data_filter.get('activeOrders', False),
+                ORDER_STATUS_COMPLETED: req_data_filter.get('completedOrders', False),
+                ORDER_STATUS_CANCELED: req_data_filter.get('canceledOrders', False),
             }
-            gather_tasks = []
-            for collection, include in check_collections.items():
-                if include:
-                    gather_tasks.append(
-                        db_get_orders_by_id_many(
-                            convert_results, db, DB_PMK_NAME, collection 
-                        )
-                    )
-            gather_results = await asyncio.gather(*gather_tasks)
-            # flatten + parse into `list` | without creating a new list with all lists nested - generator == chain()
-            orders_data = list(itertools.chain(*gather_results))
+            statuses: list[str] = [order_status for order_status, include in check_statuses.items() if include]
+            orders_data: list[dict] = []
+            # All chosen collections with a single query.
+            if statuses:
+                orders_data = await orders_find_by_ids(convert_results, db, statuses)
             cor_orders_data: list[dict] = await async_convert_object_id_and_datetime_to_str(orders_data)
             req_resp = await create_json_req_resp(
                 'dataUpdate', 'ordersUpdate', cor_orders_data
@@ -260,7 +396,7 @@ async def filter_req_data(req_data: dict, db: AsyncIOMotorClient):
     # endregion GATHER
     # + create +
     elif 'create' == req_type:
-        # + wheelstackCreation + <- with BG(asyncio.task) placement record
+        # + wheelstackCreation + <- with queued placement record
         if 'wheelstackCreation' == req_task:
             wheelstack_data = req_data_filter['wheelstackData']
             data = await create_new_wheelstack_action(
@@ -270,9 +406,7 @@ async def filter_req_data(req_data: dict, db: AsyncIOMotorClient):
             created_wheelstack_data = data['usedData']
             placement_id: ObjectId = created_wheelstack_data['placement']['placementId']
             placement_type: str = created_wheelstack_data['placement']['type']
-            asyncio.create_task(
-                background_history_record(placement_id, placement_type, db)
-            )
+            await background_history_record(placement_id, placement_type, db)
             # - HISTORY RECORD -
             cor_data = await async_convert_object_id_and_datetime_to_str(data)
             req_resp = await create_json_req_resp(
@@ -310,6 +444,11 @@ async def websocket_endpoint(
                 req_data = await websocket.receive_text()
                 
                 cor_req_data = json.loads(req_data)
+                if await is_chunked_req(cor_req_data):
+                    await handle_http_exceptions_for_websocket(
+                        send_chunked_req_data, websocket, cor_req_data, db
+                    )
+                    continue
                 result = await handle_http_exceptions_for_websocket(
                     filter_req_data, cor_req_data, db
                 )
@@ -1,5 +1,7 @@
 from loguru import logger
 from bson import ObjectId
+from datetime import datetime
+from pymongo import UpdateOne
 from constants import OUT_STATUSES
 from pymongo.errors import PyMongoError
 from fastapi import HTTPException, status
@@ -333,6 +335,47 @@ async def db_find_wheels_free_fields(
         )
 
 
+async def db_find_wheels_free_fields_chunk(
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+        filter_fields: dict,
+        after_id: ObjectId | None,
+        limit: int,
+        session: AsyncIOMotorClientSession = None,
+):
+    """
+    Keyset version of `db_find_wheels_free_fields`.
+    Returns up to `limit` `wheel`s with `_id` greater than `after_id`, sorted by `_id`.
+    """
+    db_info = await log_db_record(db_name, db_collection)
+    logger.info(
+        f'Gathering chunk of `wheel`s with free filtering, after => {after_id} | limit => {limit}'
+    )
+    collection = await get_db_collection(db, db_name, db_collection)
+    query = {}
+    for field, value in filter_fields.items():
+        query[field] = value
+    if after_id is not None:
+        query['_id'] = {
+            '$gt': after_id,
+        }
+    try:
+        result = await collection.find(
+            query, session=session
+        ).sort('_id', 1).limit(limit).to_list(length=limit)
+        return result
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while executing free filter `wheel`s chunk DB request' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail=f'Error while gathering `wheel`s documents',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
 async def db_set_wheel_virtual_position(
         wheel_id: ObjectId,
         virtual_position: int,
@@ -366,3 +409,94 @@ async def db_set_wheel_virtual_position(
             detail=f'Error while updating `virtualPosition`',
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
+
+
+async def db_insert_wheel_movements(
+        movements: list[dict],
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+        session: AsyncIOMotorClientSession = None,
+):
+    if not movements:
+        return None
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    try:
+        return await collection.insert_many(movements, ordered=False, session=session)
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while recording {len(movements)} `wheel` movements' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while recording `wheel` movements',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_get_wheel_movements(
+        wheel_object_id: ObjectId,
+        period_start: datetime | None,
+        period_end: datetime | None,
+        limit: int,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+) -> list[dict]:
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    query: dict = {
+        'wheel': wheel_object_id,
+    }
+    if period_start or period_end:
+        query['movedAt'] = {}
+        if period_start:
+            query['movedAt']['$gte'] = period_start
+        if period_end:
+            query['movedAt']['$lte'] = period_end
+    try:
+        return await collection.find(query).sort(
+            [('movedAt', 1), ('_id', 1)]
+        ).limit(limit).to_list(length=None)
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while gathering movements of the `wheel` => {wheel_object_id}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while gathering `wheel` movements',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+async def db_bulk_update_wheels(
+        wheels_updates: dict[ObjectId, dict],
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+        session: AsyncIOMotorClientSession = None,
+):
+    """
+    Applies `$set` of every `wheel` in `wheels_updates` with a single `bulk_write`.
+    { wheel_id: { field: value } }
+    """
+    if not wheels_updates:
+        return None
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    operations: list[UpdateOne] = [
+        UpdateOne({'_id': wheel_id}, {'$set': wheel_update})
+        for wheel_id, wheel_update in wheels_updates.items()
+    ]
+    try:
+        return await collection.bulk_write(operations, ordered=False, session=session)
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while updating {len(operations)} `wheel`s' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while updating `wheel`s',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
@@ -1,6 +1,7 @@
 import asyncio
 from bson import ObjectId
 from loguru import logger
+from datetime import datetime
 from .models.models import CreateWheelRequest
 from motor.motor_asyncio import AsyncIOMotorClient
 from database.mongo_connection import mongo_client
@@ -26,6 +27,9 @@ from constants import (
     BASIC_PAGE_ACTION_ROLES,
     CELERY_ACTION_ROLES,
     OUT_STATUSES,
+    CLN_WHEEL_MOVEMENTS,
+    WHEEL_TRACE_LIMIT_DEFAULT,
+    WHEEL_TRACE_LIMIT_MAX,
 )
 from .models.response_models import (
     update_response_examples,
@@ -40,6 +44,7 @@ from .crud import (
     db_get_all_wheels,
     db_get_wheels_by_transfer_data,
     db_update_wheel_transfer_status,
+    db_get_wheel_movements,
 )
 
 
@@ -124,6 +129,46 @@ async def route_find_wheel_by_object_id(
     return JSONResponse(content=result, status_code=status.HTTP_200_OK)
 
 
+@router.get(
+    path='/{wheel_object_id}/trace',
+    name='Trace Wheel',
+    description='Get every movement of the wheel, made by completed orders, ordered by time.'
+                ' Every movement has source|destination placements, cells and `wheelStack`s',
+    response_class=JSONResponse,
+)
+async def route_get_wheel_trace(
+        wheel_object_id: str = Path(description='`objectId` of the wheel to trace'),
+        period_start: datetime = Query(
+            None,
+            description='Only movements made after this date',
+        ),
+        period_end: datetime = Query(
+            None,
+            description='Only movements made before this date',
+        ),
+        limit: int = Query(
+            WHEEL_TRACE_LIMIT_DEFAULT,
+            ge=1,
+            le=WHEEL_TRACE_LIMIT_MAX,
+            description='Max number of returned movements',
+        ),
+        db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
+        token_data: dict = get_role_verification_dependency(BASIC_PAGE_VIEW_ROLES),
+):
+    wheel_id: ObjectId = await get_object_id(wheel_object_id)
+    movements = await db_get_wheel_movements(
+        wheel_id, period_start, period_end, limit, db, DB_PMK_NAME, CLN_WHEEL_MOVEMENTS
+    )
+    result = {
+        'wheel': wheel_id,
+        'movements': movements,
+    }
+    return JSONResponse(
+        content=convert_object_id_and_datetime_to_str(result),
+        status_code=status.HTTP_200_OK,
+    )
+
+
 @router.put(
     path='/{wheel_object_id}',
     name='Force Update',
@@ -1,8 +1,9 @@
 from loguru import logger
 from bson import ObjectId
+from datetime import datetime
 from pymongo.errors import PyMongoError
 from fastapi import HTTPException, status
-from constants import PS_DECONSTRUCTED, PS_SHIPPED, PS_REJECTED
+from constants import PS_DECONSTRUCTED, PS_SHIPPED, PS_REJECTED, CLN_WHEELSTACKS, CLN_WHEELS
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorClientSession
 from utility.utilities import get_db_collection, time_w_timezone, log_db_record, log_db_error_record
 
@@ -245,3 +246,122 @@ async def db_history_get_placement_wheelstacks(
             detail='Error while gathering data',
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
+
+
+async def build_placement_snapshot_pipeline(
+        placement_id: ObjectId,
+        placement_type: str,
+        ignored_dates: list[datetime] = [],
+        include_wheelstacks: bool = False,
+        include_wheels: bool = False,
+        wheelstack_fields: list[str] | None = None,
+        wheel_fields: list[str] | None = None,
+) -> list[dict]:
+    match_query: dict = {
+        '_id': placement_id,
+    }
+    if ignored_dates:
+        match_query['lastChange'] = {
+            '$nin': ignored_dates,
+        }
+    pipeline: list[dict] = [
+        {'$match': match_query},
+    ]
+    if not include_wheelstacks:
+        return pipeline
+    # Same filter as `db_history_get_placement_wheelstacks` with `status` == `placement_type`,
+    #  covered by `Query by placement data` index.
+    wheelstacks_pipeline: list[dict] = [
+        {'$match': {
+            'placement.type': placement_type,
+            'status': placement_type,
+        }},
+    ]
+    if wheelstack_fields:
+        # `wheels` is always required, we're using them to gather `wheel`s.
+        wheelstacks_pipeline.append(
+            {'$project': {field: 1 for field in {'_id', 'wheels', *wheelstack_fields}}}
+        )
+    pipeline.append(
+        {'$lookup': {
+            'from': CLN_WHEELSTACKS,
+            'localField': '_id',
+            'foreignField': 'placement.placementId',
+            'pipeline': wheelstacks_pipeline,
+            'as': 'wheelstacksData',
+        }}
+    )
+    if not include_wheels:
+        return pipeline
+    wheels_lookup: dict = {
+        'from': CLN_WHEELS,
+        'localField': 'wheelstacksData.wheels',
+        'foreignField': '_id',
+        'as': 'wheelsData',
+    }
+    if wheel_fields:
+        wheels_lookup['pipeline'] = [
+            {'$project': {field: 1 for field in {'_id', *wheel_fields}}},
+        ]
+    pipeline.append({'$lookup': wheels_lookup})
+    return pipeline
+
+
+async def db_get_placement_snapshot(
+        placement_id: ObjectId,
+        placement_type: str,
+        db: AsyncIOMotorClient,
+        db_name: str,
+        db_collection: str,
+        ignored_dates: list[datetime] = [],
+        include_wheelstacks: bool = False,
+        include_wheels: bool = False,
+        wheelstack_fields: list[str] | None = None,
+        wheel_fields: list[str] | None = None,
+) -> dict | None:
+    """
+    Gathers placement, its `wheelstack`s and their `wheel`s with a single aggregation.
+    `wheelstacksData` and `wheelsData` are returned as dicts with string `_id`s as keys,
+     same as `convert_and_store_threadpool` results.
+    Returns `None` if placement not found, or its `lastChange` is in `ignored_dates`.
+    Whole result is a single document, so it's limited to 16MB,
+     use `wheelstack_fields` and `wheel_fields` projections for the biggest placements.
+    """
+    collection = await get_db_collection(db, db_name, db_collection)
+    db_info = await log_db_record(db_name, db_collection)
+    logger.info(
+        f'Attempt to gather snapshot for `placementId` => {placement_id}'
+        f' of type {placement_type}' + db_info
+    )
+    pipeline: list[dict] = await build_placement_snapshot_pipeline(
+        placement_id, placement_type, ignored_dates,
+        include_wheelstacks, include_wheels, wheelstack_fields, wheel_fields
+    )
+    try:
+        result = await collection.aggregate(pipeline).to_list(length=1)
+    except PyMongoError as error:
+        error_extra: str = await log_db_error_record(error)
+        logger.error(
+            f'Error while gathering snapshot for `placementId` => {placement_id}'
+            f' of type {placement_type}' + db_info + error_extra
+        )
+        raise HTTPException(
+            detail='Error while gathering data',
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+    if not result:
+        return None
+    placement_data: dict = result[0]
+    if include_wheelstacks:
+        placement_data['wheelstacksData'] = {
+            str(wheelstack['_id']): wheelstack for wheelstack in placement_data['wheelstacksData']
+        }
+    if include_wheels:
+        placement_data['wheelsData'] = {
+            str(wheel['_id']): wheel for wheel in placement_data['wheelsData']
+        }
+    logger.info(
+        f'Successfully gathered snapshot for `placementId` => {placement_id}'
+        f' of type {placement_type}' + db_info
+    )
+    return placement_data
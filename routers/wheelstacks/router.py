@@ -11,7 +11,7 @@ from routers.history.history_actions import background_history_record
 from routers.wheels.crud import db_find_wheel_by_object_id, db_update_wheel
 from routers.batch_numbers.crud import db_find_batch_number, db_create_batch_number
 from utility.utilities import get_object_id, time_w_timezone, handle_basic_exceptions
-from fastapi import APIRouter, Depends, HTTPException, status, Path, Body, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Path, Body
 from .models.models import CreateWheelStackRequest, ForceUpdateWheelStackRequest, WheelsData
 from routers.base_platform.crud import (
     clear_platform_cell,
@@ -277,7 +277,6 @@ async def create_new_wheelstack_action(
     name='Create Wheelstack',
 )
 async def route_create_wheelstack(
-        background_tasks: BackgroundTasks,
         wheelstack: CreateWheelStackRequest = Body(
             ...,
             description="Every parameter of the `wheelStack` is mandatory,"
@@ -296,8 +295,8 @@ async def route_create_wheelstack(
     # + BG HISTORY RECORD +
     placement_id: ObjectId = cor_wheelstack_data['placement']['placementId']
     placement_type: str = cor_wheelstack_data['placement']['type']
-    background_tasks.add_task(
-        background_history_record, placement_id, placement_type, db
+    await background_history_record(
+        placement_id, placement_type, db
     )
     # - BG HISTORY RECORD -
     return JSONResponse(
@@ -345,7 +344,6 @@ async def route_find_wheelstack(
     name='Force Update',
 )
 async def route_force_update_wheelstack(
-        background_tasks: BackgroundTasks,
         wheelstack_new_data: ForceUpdateWheelStackRequest,
         wheelstack_object_id: str = Path(description='`objectId` of stored wheelstack'),
         db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
@@ -387,15 +385,15 @@ async def route_force_update_wheelstack(
     new_placement_id = force_data['placement']['placementId']
     new_placement_type = force_data['placement']['type']
     if new_placement_id == previous_placement_id:
-        background_tasks.add_task(
-            background_history_record, new_placement_id, new_placement_type, db
+        await background_history_record(
+            new_placement_id, new_placement_type, db
         )
     else:
-        background_tasks.add_task(
-            background_history_record, new_placement_id, new_placement_type, db
+        await background_history_record(
+            new_placement_id, new_placement_type, db
         )
-        background_tasks.add_task(
-            background_history_record, previous_placement_id, previous_placement_type, db
+        await background_history_record(
+            previous_placement_id, previous_placement_type, db
         )
     # - BG record -
     return Response(status_code=status.HTTP_200_OK)
@@ -517,7 +515,6 @@ async def clear_wheelstack_place_filter(
     name='Reconstruct',
 )
 async def route_patch_rebuild_wheelstack(
-    background_tasks: BackgroundTasks,
     new_wheels_data: WheelsData = Body(...,
                                        description='New reconstructed wheels data'),
     target_object_id: str = Path(...,
@@ -616,7 +613,7 @@ async def route_patch_rebuild_wheelstack(
     # + BG record +
     source_id = await get_object_id(exists['placement']['placementId'])
     source_type = exists['placement']['type']
-    background_tasks.add_task(background_history_record, source_id, source_type, db)
+    await background_history_record(source_id, source_type, db)
     # - BG record -
     return Response(status_code=status.HTTP_200_OK)
 
@@ -627,7 +624,6 @@ async def route_patch_rebuild_wheelstack(
     name='Deconstruct',
 )
 async def route_patch_deconstruct_wheelstack(
-    background_tasks: BackgroundTasks,
     target_object_id: str = Path(...,
                                  description='`ObjectId` of the targeted `wheelstack`'),
     db: AsyncIOMotorClient = Depends(mongo_client.depend_client),
@@ -679,6 +675,6 @@ async def route_patch_deconstruct_wheelstack(
     # + BG record +
     source_id = await get_object_id(exists['placement']['placementId'])
     source_type = exists['placement']['type']
-    background_tasks.add_task(background_history_record, source_id, source_type, db)
+    await background_history_record(source_id, source_type, db)
     # - BG record -
     return Response(status_code=status.HTTP_200_OK)
@@ -0,0 +1,218 @@
+"""
+Compares completion of every order type declared in `ORDER_ENGINE_SPECS` by its own function,
+ against the order engine (one batched read phase + one write transaction).
+Every iteration creates a new order, completes it, and restores all touched documents,
+ so the same cells and `wheelstack` are used every time. Only completion is measured.
+Counts DB round trips with `CommandListener` and reports latency percentiles for both paths.
+
+Uses the same `.env` as the API, so it should be run from the project root, on a test DB:
+    python -m test_scripts.order_engine_benchmark --grid-name pmkGrid --source A|1 --destination B|1 \
+        --processing processing --rejected rejected --laboratory laboratory --iterations 50
+"""
+import time
+import asyncio
+import argparse
+import statistics
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from database.mongo_connection import create_connection_string
+from test_scripts.placement_snapshot_benchmark import RoundTripsCounter, percentile
+from routers.orders.orders_engine import ORDER_ENGINE_SPECS, order_engine_run
+from routers.orders.orders_creation import (
+    orders_create_move_whole_wheelstack,
+    orders_create_move_to_processing,
+    orders_create_move_to_rejected,
+    orders_create_move_to_laboratory,
+)
+from routers.orders.orders_completion import (
+    orders_complete_move_wholestack,
+    orders_complete_move_to_processing,
+    orders_complete_move_to_rejected,
+    orders_complete_move_to_laboratory,
+)
+from constants import (
+    DB_PMK_NAME,
+    CLN_GRID,
+    CLN_WHEELS,
+    CLN_WHEELSTACKS,
+    CLN_BATCH_NUMBERS,
+    CLN_ACTIVE_ORDERS,
+    CLN_COMPLETED_ORDERS,
+    CLN_WHEEL_MOVEMENTS,
+    PT_GRID,
+    ORDER_MOVE_WHOLE_STACK,
+    ORDER_MOVE_TO_PROCESSING,
+    ORDER_MOVE_TO_REJECTED,
+    ORDER_MOVE_TO_LABORATORY,
+    ORDER_ACTION_COMPLETE,
+)
+
+
+LEGACY_COMPLETIONS = {
+    ORDER_MOVE_WHOLE_STACK: orders_complete_move_wholestack,
+    ORDER_MOVE_TO_PROCESSING: orders_complete_move_to_processing,
+    ORDER_MOVE_TO_REJECTED: orders_complete_move_to_rejected,
+    ORDER_MOVE_TO_LABORATORY: orders_complete_move_to_laboratory,
+}
+
+
+async def legacy_path(order_data: dict, db: AsyncIOMotorClient):
+    return await LEGACY_COMPLETIONS[order_data['orderType']](order_data, db)
+
+
+async def engine_path(order_data: dict, db: AsyncIOMotorClient):
+    spec = ORDER_ENGINE_SPECS[(ORDER_ACTION_COMPLETE, order_data['orderType'])]
+    return await order_engine_run(spec, order_data, db)
+
+
+def split_cell(cell: str) -> tuple[str, str]:
+    row, col = cell.split('|')
+    return row, col
+
+
+async def create_order(order_type: str, grid_id: ObjectId, wheelstack_data: dict, db, args) -> ObjectId:
+    source_row, source_col = split_cell(args.source)
+    source = {
+        'placementType': PT_GRID,
+        'placementId': str(grid_id),
+        'rowPlacement': source_row,
+        'columnPlacement': source_col,
+    }
+    if ORDER_MOVE_WHOLE_STACK == order_type:
+        dest_row, dest_col = split_cell(args.destination)
+        return await orders_create_move_whole_wheelstack(db, {
+            'orderName': 'benchmark',
+            'orderDescription': '',
+            'orderType': ORDER_MOVE_WHOLE_STACK,
+            'source': source,
+            'destination': {
+                'placementType': PT_GRID,
+                'placementId': str(grid_id),
+                'rowPlacement': dest_row,
+                'columnPlacement': dest_col,
+            },
+        })
+    element_names = {
+        ORDER_MOVE_TO_PROCESSING: args.processing,
+        ORDER_MOVE_TO_REJECTED: args.rejected,
+        ORDER_MOVE_TO_LABORATORY: args.laboratory,
+    }
+    order_data = {
+        'orderName': 'benchmark',
+        'orderDescription': '',
+        'source': source,
+        'destination': {
+            'placementType': PT_GRID,
+            'placementId': str(grid_id),
+            'elementName': element_names[order_type],
+        },
+        'virtualPosition': 0,
+    }
+    if ORDER_MOVE_TO_PROCESSING == order_type:
+        return await orders_create_move_to_processing(db, order_data)
+    if ORDER_MOVE_TO_REJECTED == order_type:
+        return await orders_create_move_to_rejected(db, order_data)
+    order_data['chosenWheel'] = str(wheelstack_data['wheels'][-1])
+    return await orders_create_move_to_laboratory(db, order_data)
+
+
+async def take_snapshot(grid_id: ObjectId, wheelstack_id: ObjectId, db) -> dict:
+    pmk_db = db[DB_PMK_NAME]
+    grid_data = await pmk_db[CLN_GRID].find_one({'_id': grid_id}, {'rows': 1, 'extra': 1, 'lastChange': 1})
+    wheelstack_data = await pmk_db[CLN_WHEELSTACKS].find_one({'_id': wheelstack_id})
+    wheels_data = await pmk_db[CLN_WHEELS].find({'_id': {'$in': wheelstack_data['wheels']}}).to_list(length=None)
+    batches = list({wheel['batchNumber'] for wheel in wheels_data})
+    batches_data = await pmk_db[CLN_BATCH_NUMBERS].find({'batchNumber': {'$in': batches}}).to_list(length=None)
+    return {
+        'grid': grid_data,
+        'wheelstack': wheelstack_data,
+        'wheels': wheels_data,
+        'batches': batches_data,
+    }
+
+
+async def restore_snapshot(snapshot: dict, order_id: ObjectId, db) -> None:
+    pmk_db = db[DB_PMK_NAME]
+    grid_data = snapshot['grid']
+    # `version` is not restored, journal records of it already exist.
+    await pmk_db[CLN_GRID].update_one(
+        {'_id': grid_data['_id']},
+        {'$set': {field: grid_data[field] for field in ('rows', 'extra', 'lastChange') if field in grid_data}}
+    )
+    await pmk_db[CLN_WHEELSTACKS].replace_one({'_id': snapshot['wheelstack']['_id']}, snapshot['wheelstack'])
+    for wheel_data in snapshot['wheels']:
+        await pmk_db[CLN_WHEELS].replace_one({'_id': wheel_data['_id']}, wheel_data)
+    for batch_data in snapshot['batches']:
+        await pmk_db[CLN_BATCH_NUMBERS].replace_one({'_id': batch_data['_id']}, batch_data)
+    await pmk_db[CLN_ACTIVE_ORDERS].delete_one({'_id': order_id})
+    await pmk_db[CLN_COMPLETED_ORDERS].delete_one({'_id': order_id})
+    await pmk_db[CLN_WHEEL_MOVEMENTS].delete_many({'orderId': order_id})
+
+
+async def measure(name: str, path, order_type: str, grid_id: ObjectId, db, counter: RoundTripsCounter, args) -> None:
+    source_row, source_col = split_cell(args.source)
+    round_trips: list[int] = []
+    latencies: list[float] = []
+    # First iteration is a warm up, we don't want to measure connection pool creation.
+    for iteration in range(args.iterations + 1):
+        grid_data = await db[DB_PMK_NAME][CLN_GRID].find_one(
+            {'_id': grid_id}, {f'rows.{source_row}.columns.{source_col}': 1}
+        )
+        wheelstack_id: ObjectId = grid_data['rows'][source_row]['columns'][source_col]['wheelStack']
+        snapshot = await take_snapshot(grid_id, wheelstack_id, db)
+        order_id = await create_order(order_type, grid_id, snapshot['wheelstack'], db, args)
+        order_data = await db[DB_PMK_NAME][CLN_ACTIVE_ORDERS].find_one({'_id': order_id})
+        counter.commands = 0
+        started = time.perf_counter()
+        try:
+            await path(order_data, db)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            commands = counter.commands
+            await restore_snapshot(snapshot, order_id, db)
+        if iteration:
+            latencies.append(elapsed)
+            round_trips.append(commands)
+    print(
+        f'{order_type} | {name}: round trips/order {statistics.fmean(round_trips):.2f}'
+        f' | mean {statistics.fmean(latencies):.2f} | p50 {percentile(latencies, 50):.2f}'
+        f' | p95 {percentile(latencies, 95):.2f} | p99 {percentile(latencies, 99):.2f} ms'
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description='Order completion benchmark, own functions vs order engine')
+    parser.add_argument('--grid-name', default='pmkGrid')
+    parser.add_argument('--source', required=True,
+                        help='`row|column` of the cell with a `wheelstack`')
+    parser.add_argument('--destination', default=None,
+                        help=f'`row|column` of the empty cell, used by `{ORDER_MOVE_WHOLE_STACK}`')
+    parser.add_argument('--processing', default=None,
+                        help='Name of the `extra` element used by `moveToProcessing`')
+    parser.add_argument('--rejected', default=None,
+                        help='Name of the `extra` element used by `moveToRejected`')
+    parser.add_argument('--laboratory', default=None,
+                        help='Name of the `extra` element used by `moveToLaboratory`')
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+    counter = RoundTripsCounter()
+    db = AsyncIOMotorClient(create_connection_string(), event_listeners=[counter])
+    grid_data = await db[DB_PMK_NAME][CLN_GRID].find_one({'name': args.grid_name}, {'_id': 1})
+    if grid_data is None:
+        print(f'`grid` with `name` = {args.grid_name} not Found')
+        return
+    order_types = {
+        ORDER_MOVE_WHOLE_STACK: args.destination,
+        ORDER_MOVE_TO_PROCESSING: args.processing,
+        ORDER_MOVE_TO_REJECTED: args.rejected,
+        ORDER_MOVE_TO_LABORATORY: args.laboratory,
+    }
+    for order_type, target in order_types.items():
+        if target is None:
+            continue
+        await measure('own function', legacy_path, order_type, grid_data['_id'], db, counter, args)
+        await measure('order engine', engine_path, order_type, grid_data['_id'], db, counter, args)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+"""
+Checks query plans of every query shape used by `GET /orders`.
+Every shape is explained for every order collection with the same query, sort and limit the page uses,
+ and the winning plan is searched for:
+ - `COLLSCAN` <- whole collection is scanned, shape fails,
+ - `SORT` <- page is sorted in memory instead of taken from an index, reported as a warning.
+Exits with code 1 if any shape falls back to a collection scan.
+
+Uses the same `.env` as the API, so it should be run from the project root:
+    python -m test_scripts.orders_page_explain --limit 100
+"""
+import sys
+import asyncio
+import argparse
+from bson import ObjectId
+from datetime import datetime, timedelta
+from motor.motor_asyncio import AsyncIOMotorClient
+from database.mongo_connection import create_connection_string
+from routers.orders.orders_query import ORDERS_PAGE_SORT, orders_page_queries
+from constants import (
+    DB_PMK_NAME,
+    PT_GRID,
+    ORDER_MOVE_WHOLE_STACK,
+    ORDER_MOVE_TO_PROCESSING,
+    ORDER_STATUS_PENDING,
+    ORDER_STATUS_COMPLETED,
+)
+
+
+def plan_nodes(plan: dict) -> list[dict]:
+    nodes: list[dict] = [plan]
+    for child_field in ('inputStage', 'inputStages', 'queryPlan'):
+        children = plan.get(child_field)
+        if isinstance(children, dict):
+            children = [children]
+        for child in children or []:
+            nodes.extend(plan_nodes(child))
+    return nodes
+
+
+def query_shapes() -> dict[str, dict]:
+    now: datetime = datetime.now()
+    after: tuple[datetime, ObjectId] = (now - timedelta(days=1), ObjectId())
+    object_id: ObjectId = ObjectId()
+    return {
+        'all': {},
+        'type': {'order_types': [ORDER_MOVE_WHOLE_STACK]},
+        'types': {'order_types': [ORDER_MOVE_WHOLE_STACK, ORDER_MOVE_TO_PROCESSING]},
+        'status': {'statuses': [ORDER_STATUS_PENDING, ORDER_STATUS_COMPLETED]},
+        'type + status': {'order_types': [ORDER_MOVE_WHOLE_STACK], 'statuses': [ORDER_STATUS_COMPLETED]},
+        'placement': {'placement_id': object_id, 'placement_type': PT_GRID},
+        'wheelstack': {'wheelstack_id': object_id},
+        'period': {'created_from': now - timedelta(days=7), 'created_to': now},
+        'type + period': {'order_types': [ORDER_MOVE_WHOLE_STACK], 'created_from': now - timedelta(days=7)},
+        'next page': {'after': after},
+        'type + next page': {'order_types': [ORDER_MOVE_WHOLE_STACK], 'after': after},
+        'placement + next page': {'placement_id': object_id, 'placement_type': PT_GRID, 'after': after},
+    }
+
+
+async def explain_shape(name: str, shape: dict, db: AsyncIOMotorClient, limit: int) -> bool:
+    passed: bool = True
+    for collection_name, query in orders_page_queries(**shape).items():
+        explain: dict = await db[DB_PMK_NAME][collection_name].find(query).sort(
+            list(ORDERS_PAGE_SORT.items())
+        ).limit(limit).explain()
+        nodes: list[dict] = plan_nodes(explain['queryPlanner']['winningPlan'])
+        stages: list[str] = [node.get('stage', '') for node in nodes]
+        indexes: set[str] = {node['indexName'] for node in nodes if 'indexName' in node}
+        result: str = 'ok'
+        if 'COLLSCAN' in stages:
+            result = 'FAIL collection scan'
+            passed = False
+        elif 'SORT' in stages:
+            result = 'warning in memory sort'
+        print(f'{name} | {collection_name}: {result} | indexes: {', '.join(sorted(indexes)) or '-'}')
+    return passed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description='Query plans of every `GET /orders` query shape')
+    parser.add_argument('--limit', type=int, default=100, help='Page size used for explained queries')
+    args = parser.parse_args()
+    db = AsyncIOMotorClient(create_connection_string())
+    failed: list[str] = []
+    for name, shape in query_shapes().items():
+        if not await explain_shape(name, shape, db, args.limit + 1):
+            failed.append(name)
+    if failed:
+        print(f'Collection scans: {', '.join(failed)}')
+        sys.exit(1)
+    print('No query shape falls back to a collection scan')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,183 @@
+"""
+Throughput of `moveWholeStack` orders created at the same time on the same `grid`, with one of the paths:
+ - `transaction` <- `orders_create_move_whole_wheelstack`, read checks and writes in a transaction per order,
+ - `actor` <- orders are queued to the placement actor, and created in batches with one write per tick.
+Every worker is an operator, creating orders for its own cells one after another.
+Every mode uses the same pairs of cells: `wheelstack` from the occupied cell is moved into the free one.
+Reports created orders per second, failed orders by reasons, latency percentiles
+ and average number of orders written with a single write of the actor.
+`rows` + `lastChange` of the `grid`, used `wheelstack`s are restored, and created orders deleted after every mode.
+
+Actor uses `ORDERS_ACTOR_TICK` | `ORDERS_ACTOR_LEASE` from the same `.env` as the API,
+ so it should be run from the project root, on a test DB:
+    python -m test_scripts.placement_actor_benchmark --grid-name pmkGrid --workers 16 --pairs 64
+"""
+import time
+import asyncio
+import argparse
+import statistics
+from bson import ObjectId
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorClient
+from database.mongo_connection import create_connection_string
+from test_scripts.placement_snapshot_benchmark import percentile
+from routers.orders.orders_actor import placement_actors
+from routers.orders.orders_creation import orders_create_move_whole_wheelstack
+from constants import (
+    DB_PMK_NAME,
+    CLN_GRID,
+    CLN_WHEELSTACKS,
+    CLN_ACTIVE_ORDERS,
+    PT_GRID,
+    ORDER_MOVE_WHOLE_STACK,
+    ORDERS_BULK_CREATED,
+)
+
+
+MODES: tuple[str, ...] = ('transaction', 'actor')
+
+
+async def transaction_path(order_data: dict, db: AsyncIOMotorClient) -> ObjectId:
+    return await orders_create_move_whole_wheelstack(db, order_data)
+
+
+async def actor_path(order_data: dict, db: AsyncIOMotorClient) -> ObjectId:
+    outcome: dict = await placement_actors.submit(order_data, db)
+    if ORDERS_BULK_CREATED != outcome['status']:
+        raise HTTPException(detail=outcome['detail'], status_code=outcome['statusCode'])
+    return outcome['_id']
+
+
+PATHS = {
+    'transaction': transaction_path,
+    'actor': actor_path,
+}
+
+
+def move_order(grid_id: ObjectId, source: tuple[str, str], destination: tuple[str, str]) -> dict:
+    return {
+        'orderName': 'benchmark',
+        'orderDescription': '',
+        'orderType': ORDER_MOVE_WHOLE_STACK,
+        'source': {
+            'placementType': PT_GRID,
+            'placementId': str(grid_id),
+            'rowPlacement': source[0],
+            'columnPlacement': source[1],
+        },
+        'destination': {
+            'placementType': PT_GRID,
+            'placementId': str(grid_id),
+            'rowPlacement': destination[0],
+            'columnPlacement': destination[1],
+        },
+    }
+
+
+async def worker(path, orders_data: list[dict], db: AsyncIOMotorClient, stats: dict) -> None:
+    for order_data in orders_data:
+        started: float = time.perf_counter()
+        try:
+            order_id: ObjectId = await path(order_data, db)
+        except HTTPException as error:
+            reason: str = f'{error.status_code}: {error.detail}'
+            stats['failed'][reason] = stats['failed'].get(reason, 0) + 1
+            continue
+        finally:
+            stats['latencies'].append((time.perf_counter() - started) * 1000)
+        stats['created'].append(order_id)
+
+
+async def restore(grid_data: dict, wheelstacks_data: list[dict], created: list[ObjectId], db) -> None:
+    pmk_db = db[DB_PMK_NAME]
+    # `version` is not restored, journal records of it already exist.
+    await pmk_db[CLN_GRID].update_one(
+        {'_id': grid_data['_id']},
+        {'$set': {field: grid_data[field] for field in ('rows', 'lastChange') if field in grid_data}}
+    )
+    for wheelstack_data in wheelstacks_data:
+        await pmk_db[CLN_WHEELSTACKS].replace_one({'_id': wheelstack_data['_id']}, wheelstack_data)
+    await pmk_db[CLN_ACTIVE_ORDERS].delete_many({'_id': {'$in': created}})
+
+
+async def measure(mode: str, workers_orders: list[list[dict]], grid_data: dict, wheelstacks_data: list[dict], db) -> None:
+    stats: dict = {
+        'created': [],
+        'failed': {},
+        'latencies': [],
+    }
+    actors_before: dict = {actor['placement']: actor for actor in placement_actors.metrics()}
+    started: float = time.perf_counter()
+    try:
+        await asyncio.gather(*[
+            worker(PATHS[mode], worker_orders, db, stats) for worker_orders in workers_orders
+        ])
+    finally:
+        elapsed: float = time.perf_counter() - started
+        await restore(grid_data, wheelstacks_data, stats['created'], db)
+    latencies: list[float] = stats['latencies'] or [0]
+    report: str = (
+        f'{mode}: created {len(stats['created'])} ({len(stats['created']) / elapsed:.1f}/s)'
+        f' | failed {sum(stats['failed'].values())}'
+        f' | mean {statistics.fmean(latencies):.2f} | p50 {percentile(latencies, 50):.2f}'
+        f' | p95 {percentile(latencies, 95):.2f} | p99 {percentile(latencies, 99):.2f} ms'
+    )
+    if 'actor' == mode:
+        ticks: int = 0
+        orders: int = 0
+        lease_waits: int = 0
+        for actor in placement_actors.metrics():
+            before: dict = actors_before.get(actor['placement'], {})
+            ticks += actor['ticks'] - before.get('ticks', 0)
+            orders += actor['orders'] - before.get('orders', 0)
+            lease_waits += actor['leaseWaits'] - before.get('leaseWaits', 0)
+        report += f' | writes {ticks} ({orders / max(ticks, 1):.1f} orders/write) | lease waits {lease_waits}'
+    print(report)
+    for reason, count in sorted(stats['failed'].items(), key=lambda failed: -failed[1]):
+        print(f'    {count} x {reason}')
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description='Orders throughput on the same `grid`, transactions vs placement actor')
+    parser.add_argument('--grid-name', default='pmkGrid')
+    parser.add_argument('--workers', type=int, default=16, help='Number of operators creating orders at the same time')
+    parser.add_argument('--pairs', type=int, default=64,
+                        help='Max number of orders in every mode, limited by occupied and free cells of the `grid`')
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=MODES)
+    args = parser.parse_args()
+    db = AsyncIOMotorClient(create_connection_string())
+    grid_data = await db[DB_PMK_NAME][CLN_GRID].find_one(
+        {'name': args.grid_name}, {'rows': 1, 'lastChange': 1}
+    )
+    if grid_data is None:
+        print(f'`grid` with `name` = {args.grid_name} not Found')
+        return
+    occupied: list[tuple[tuple[str, str], ObjectId]] = []
+    free: list[tuple[str, str]] = []
+    for row, row_data in grid_data['rows'].items():
+        for col, cell_data in row_data['columns'].items():
+            if cell_data.get('blocked') or cell_data.get('blockedBy') is not None:
+                continue
+            if cell_data.get('wheelStack') is None:
+                free.append((row, col))
+            else:
+                occupied.append(((row, col), cell_data['wheelStack']))
+    wheelstacks_data: list[dict] = await db[DB_PMK_NAME][CLN_WHEELSTACKS].find(
+        {'_id': {'$in': [wheelstack_id for _, wheelstack_id in occupied]}, 'blocked': False}
+    ).to_list(length=None)
+    available: set[ObjectId] = {wheelstack_data['_id'] for wheelstack_data in wheelstacks_data}
+    sources: list[tuple[str, str]] = [cell for cell, wheelstack_id in occupied if wheelstack_id in available]
+    pairs: list[tuple[tuple[str, str], tuple[str, str]]] = list(zip(sources, free))[:args.pairs]
+    if not pairs:
+        print(f'`grid` with `name` = {args.grid_name} doesnt have occupied and free cells to move between')
+        return
+    workers_orders: list[list[dict]] = [[] for _ in range(min(args.workers, len(pairs)))]
+    for index, (source, destination) in enumerate(pairs):
+        workers_orders[index % len(workers_orders)].append(move_order(grid_data['_id'], source, destination))
+    print(f'Orders: {len(pairs)} | Workers: {len(workers_orders)}')
+    for mode in args.modes:
+        await measure(mode, workers_orders, grid_data, wheelstacks_data, db)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
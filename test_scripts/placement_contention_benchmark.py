@@ -0,0 +1,182 @@
+"""
+Contention of concurrent writers on the same `grid`.
+Every worker claims random free cell (`blocked` + `blockedBy`), holds it and releases it, with one of the modes:
+ - `transaction` <- read-then-write check, and blind update in a transaction (what we did before),
+ - `version` <- conditional update on the placement `version`, any change of the placement is a conflict,
+ - `cell` <- conditional update on the expected cell state, only changes of the same cell conflict.
+Reports aborted transactions, conflicts detected by conditional updates, lost updates
+ (cell claimed while another worker holds it) and claims throughput for every mode.
+Only free cells are used, and `rows` + `lastChange` of the `grid` are restored at the end.
+
+Uses the same `.env` as the API, so it should be run from the project root, on a test DB:
+    python -m test_scripts.placement_contention_benchmark --grid-name pmkGrid --cells 4 --workers 16 --duration 10
+"""
+import time
+import random
+import asyncio
+import argparse
+from bson import ObjectId
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorClient
+from database.mongo_connection import create_connection_string
+from routers.orders.crud import db_get_placements_fields, db_update_placement_cells
+from constants import DB_PMK_NAME, CLN_GRID
+
+
+MODES: tuple[str, ...] = ('transaction', 'version', 'cell')
+
+
+def cell_field(cell: tuple[str, str]) -> str:
+    return f'rows.{cell[0]}.columns.{cell[1]}'
+
+
+async def read_cell(grid_id: ObjectId, cell: tuple[str, str], db: AsyncIOMotorClient) -> tuple[dict, int]:
+    placements = await db_get_placements_fields(
+        [grid_id], [cell_field(cell), 'version'], db, DB_PMK_NAME, CLN_GRID
+    )
+    grid_data: dict = placements[grid_id]
+    return grid_data['rows'][cell[0]]['columns'][cell[1]], grid_data.get('version', 0)
+
+
+async def write_cell(
+        mode: str,
+        grid_id: ObjectId,
+        cell: tuple[str, str],
+        expected_blocked_by: ObjectId | None,
+        new_blocked_by: ObjectId | None,
+        db: AsyncIOMotorClient,
+        stats: dict,
+) -> bool:
+    """
+    Sets `blockedBy` of the `cell`, if it's still `expected_blocked_by`.
+    Returns `True` if cell is changed.
+    """
+    field: str = cell_field(cell)
+    cells_fields: dict = {
+        f'{field}.blocked': new_blocked_by is not None,
+        f'{field}.blockedBy': new_blocked_by,
+    }
+    stats['attempts'] += 1
+    try:
+        if 'cell' == mode:
+            changed: bool = await db_update_placement_cells(
+                grid_id, cells_fields, db, DB_PMK_NAME, CLN_GRID,
+                expected_cells={f'{field}.blockedBy': expected_blocked_by}
+            )
+        else:
+            cell_data, version = await read_cell(grid_id, cell, db)
+            if cell_data['blockedBy'] != expected_blocked_by:
+                stats['conflicts'] += 1
+                return False
+            if 'version' == mode:
+                changed = await db_update_placement_cells(
+                    grid_id, cells_fields, db, DB_PMK_NAME, CLN_GRID, expected_version=version
+                )
+            else:
+                async with (await db.start_session()) as session:
+                    async with session.start_transaction():
+                        changed = await db_update_placement_cells(
+                            grid_id, cells_fields, db, DB_PMK_NAME, CLN_GRID, session
+                        )
+    except HTTPException:
+        stats['aborts'] += 1
+        return False
+    if not changed:
+        stats['conflicts'] += 1
+    return changed
+
+
+async def worker(
+        mode: str,
+        grid_id: ObjectId,
+        cells: list[tuple[str, str]],
+        owners: dict,
+        deadline: float,
+        hold: float,
+        db: AsyncIOMotorClient,
+        stats: dict,
+) -> None:
+    token: ObjectId = ObjectId()
+    while time.perf_counter() < deadline:
+        cell: tuple[str, str] = random.choice(cells)
+        if not await write_cell(mode, grid_id, cell, None, token, db, stats):
+            continue
+        stats['claims'] += 1
+        # Blind writes can claim a cell, which is already claimed by other worker.
+        if owners.get(cell) is not None:
+            stats['lostUpdates'] += 1
+        owners[cell] = token
+        await asyncio.sleep(hold)
+        if owners.get(cell) == token:
+            owners[cell] = None
+        # Release is retried until it's done, cell should never stay blocked.
+        while not await write_cell(mode, grid_id, cell, token, None, db, stats):
+            cell_data, _ = await read_cell(grid_id, cell, db)
+            if cell_data['blockedBy'] != token:
+                break
+
+
+async def measure(mode: str, grid_id: ObjectId, cells: list[tuple[str, str]], db, args) -> None:
+    stats: dict = {
+        'attempts': 0,
+        'claims': 0,
+        'conflicts': 0,
+        'aborts': 0,
+        'lostUpdates': 0,
+    }
+    owners: dict = {}
+    started: float = time.perf_counter()
+    deadline: float = started + args.duration
+    await asyncio.gather(*[
+        worker(mode, grid_id, cells, owners, deadline, args.hold / 1000, db, stats)
+        for _ in range(args.workers)
+    ])
+    elapsed: float = time.perf_counter() - started
+    attempts: int = max(stats['attempts'], 1)
+    print(
+        f'{mode}: writes {stats['attempts']} | claims {stats['claims']} ({stats['claims'] / elapsed:.1f}/s)'
+        f' | aborts {stats['aborts']} ({stats['aborts'] / attempts:.1%})'
+        f' | conflicts {stats['conflicts']} ({stats['conflicts'] / attempts:.1%})'
+        f' | lost updates {stats['lostUpdates']}'
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description='Contention of concurrent writers on the same `grid`')
+    parser.add_argument('--grid-name', default='pmkGrid')
+    parser.add_argument('--cells', type=int, default=4,
+                        help='Number of free cells used by all workers, less cells == more contention')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10, help='Seconds of every mode')
+    parser.add_argument('--hold', type=float, default=5, help='Milliseconds cell stays claimed')
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=MODES)
+    args = parser.parse_args()
+    db = AsyncIOMotorClient(create_connection_string())
+    grid_data = await db[DB_PMK_NAME][CLN_GRID].find_one(
+        {'name': args.grid_name}, {'rows': 1, 'lastChange': 1}
+    )
+    if grid_data is None:
+        print(f'`grid` with `name` = {args.grid_name} not Found')
+        return
+    cells: list[tuple[str, str]] = [
+        (row, col)
+        for row, row_data in grid_data['rows'].items()
+        for col, cell_data in row_data['columns'].items()
+        if cell_data.get('wheelStack') is None and not cell_data.get('blocked') and cell_data.get('blockedBy') is None
+    ][:args.cells]
+    if not cells:
+        print(f'`grid` with `name` = {args.grid_name} doesnt have free cells')
+        return
+    try:
+        for mode in args.modes:
+            await measure(mode, grid_data['_id'], cells, db, args)
+    finally:
+        # `version` is not restored, journal records of it already exist.
+        await db[DB_PMK_NAME][CLN_GRID].update_one(
+            {'_id': grid_data['_id']},
+            {'$set': {field: grid_data[field] for field in ('rows', 'lastChange') if field in grid_data}}
+        )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""
+Compares gathering of the full placement view with the previous sequential reads
+ (placement -> `wheelstack`s -> `wheel`s) against the single `db_get_placement_snapshot` aggregation.
+Counts DB round trips with `CommandListener` and reports latency percentiles for both paths.
+
+Uses the same `.env` as the API, so it should be run from the project root:
+    python -m test_scripts.placement_snapshot_benchmark --grid-name pmkGrid --iterations 200
+"""
+import time
+import asyncio
+import argparse
+import statistics
+from pymongo import monitoring
+from motor.motor_asyncio import AsyncIOMotorClient
+from database.mongo_connection import create_connection_string
+from routers.grid.crud import get_grid_by_object_id
+from routers.grid.data_gather import convert_and_store_threadpool
+from routers.wheels.crud import db_find_many_wheels_by_id
+from routers.wheelstacks.crud import db_history_get_placement_wheelstacks, db_get_placement_snapshot
+from constants import DB_PMK_NAME, CLN_GRID, CLN_WHEELSTACKS, CLN_WHEELS, PT_GRID
+
+
+class RoundTripsCounter(monitoring.CommandListener):
+
+    def __init__(self):
+        self.commands: int = 0
+
+    def started(self, event):
+        if event.command_name not in ('hello', 'isMaster', 'endSessions'):
+            self.commands += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def sequential_path(grid_id, db: AsyncIOMotorClient, wheelstack_fields, wheel_fields) -> dict:
+    grid_data, wheelstacks_data = await asyncio.gather(
+        get_grid_by_object_id(grid_id, db, DB_PMK_NAME, CLN_GRID),
+        db_history_get_placement_wheelstacks(
+            grid_id, PT_GRID, db, DB_PMK_NAME, CLN_WHEELSTACKS, [PT_GRID], True
+        ),
+    )
+    grid_wheels = []
+    for wheelstack in wheelstacks_data:
+        grid_wheels.extend(wheelstack['wheels'])
+    wheels_data = await db_find_many_wheels_by_id(grid_wheels, db, DB_PMK_NAME, CLN_WHEELS)
+    grid_data['wheelstacksData'], grid_data['wheelsData'] = await asyncio.gather(
+        convert_and_store_threadpool(wheelstacks_data),
+        convert_and_store_threadpool(wheels_data),
+    )
+    return grid_data
+
+
+async def aggregation_path(grid_id, db: AsyncIOMotorClient, wheelstack_fields, wheel_fields) -> dict:
+    return await db_get_placement_snapshot(
+        grid_id, PT_GRID, db, DB_PMK_NAME, CLN_GRID, [], True, True, wheelstack_fields, wheel_fields
+    )
+
+
+def percentile(values: list[float], point: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(point / 100 * (len(ordered) - 1))))]
+
+
+async def measure(name: str, path, grid_id, db, counter: RoundTripsCounter, args) -> None:
+    # Warm up, we don't want to measure connection pool creation.
+    result = await path(grid_id, db, args.wheelstack_fields, args.wheel_fields)
+    counter.commands = 0
+    latencies: list[float] = []
+    for _ in range(args.iterations):
+        started = time.perf_counter()
+        await path(grid_id, db, args.wheelstack_fields, args.wheel_fields)
+        latencies.append((time.perf_counter() - started) * 1000)
+    print(
+        f'{name}: wheelstacks {len(result['wheelstacksData'])} | wheels {len(result['wheelsData'])}'
+        f' | round trips/request {counter.commands / args.iterations:.2f}'
+        f' | mean {statistics.fmean(latencies):.2f} | p50 {percentile(latencies, 50):.2f}'
+        f' | p95 {percentile(latencies, 95):.2f} | p99 {percentile(latencies, 99):.2f} ms'
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description='Placement snapshot gathering benchmark')
+    parser.add_argument('--grid-name', default='pmkGrid')
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--wheelstack-field', dest='wheelstack_fields', action='append', default=None,
+                        help='Projection used by aggregation, can be repeated')
+    parser.add_argument('--wheel-field', dest='wheel_fields', action='append', default=None,
+                        help='Projection used by aggregation, can be repeated')
+    args = parser.parse_args()
+    counter = RoundTripsCounter()
+    db = AsyncIOMotorClient(create_connection_string(), event_listeners=[counter])
+    grid_data = await db[DB_PMK_NAME][CLN_GRID].find_one({'name': args.grid_name}, {'_id': 1})
+    if grid_data is None:
+        print(f'`grid` with `name` = {args.grid_name} not Found')
+        return
+    await measure('sequential', sequential_path, grid_data['_id'], db, counter, args)
+    await measure('aggregation', aggregation_path, grid_data['_id'], db, counter, args)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
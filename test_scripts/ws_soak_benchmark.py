@@ -0,0 +1,463 @@
+"""
+Soak and fan-out benchmark for the `/ws/grid_page` websocket.
+
+Opens a growing number of concurrent connections (`--steps`) against a running instance,
+ every connection sends a weighted mix of tasks (`--mix`), with only one request in flight per connection,
+ so latency == time between request and its response frame.
+While connections are active, background order traffic creates and completes `moveWholeStack` orders
+ on the same `grid`, so every `placementUpdate` competes with real mutations.
+
+Reported for every step:
+ - latency percentiles per task,
+ - messages/s and error frames,
+ - server RSS growth per connection and server CPU (only with `--server-pid`, Linux `/proc` is used).
+Step is marked as saturated when p99 latency exceeds `--saturation-p99-ms` or CPU is over `--saturation-cpu`.
+To find saturation point of one worker, run the server with `--workers 1` and pass its pid.
+
+`wheelstackCreation` creates real `wheelstack`s on free cells of `--platform-id`, and orders traffic moves
+ `wheelstack`s of the `--grid-id`, use it only with a test DB.
+Thousands of connections require raised open files limit: `ulimit -n 65535`.
+
+Example:
+    python -m test_scripts.ws_soak_benchmark --token <JWT> --grid-id <id> --platform-id <id>
+        --storage-name <name> --batch-number <batch> --steps 100,500,1000,2000
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+import aiohttp
+import websockets
+
+
+TASKS: tuple[str, ...] = ('placementUpdate', 'expandedStorage', 'batchesData', 'wheelstackCreation')
+DEFAULT_MIX: str = 'placementUpdate=60,expandedStorage=15,batchesData=20,wheelstackCreation=5'
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='`/ws/grid_page` soak and fan-out benchmark')
+    parser.add_argument('--api-url', default='http://localhost:8000', help='Base url of the API')
+    parser.add_argument('--auth-url', default='', help='Auth service url, used with `--login` and `--password`')
+    parser.add_argument('--login', default='')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--token', default='', help='JWT to use, instead of login')
+    parser.add_argument('--grid-id', required=True, help='`grid` used for `placementUpdate` and orders traffic')
+    parser.add_argument('--grid-name', default='', help='Name of the `grid`')
+    parser.add_argument('--platform-id', default='', help='`basePlatform` used for `wheelstackCreation`')
+    parser.add_argument('--storage-name', default='', help='`storage` used for `expandedStorage`')
+    parser.add_argument('--batch-number', action='append', default=[],
+                        help='Batch number used for `batchesData` and `wheelstackCreation`, can be repeated')
+    parser.add_argument('--steps', default='100,500,1000,2000',
+                        help='Comma separated number of concurrent connections for every step')
+    parser.add_argument('--step-duration', type=float, default=60.0, help='Seconds to run every step')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Weighted tasks mix: `task=weight,...`')
+    parser.add_argument('--think-time', type=float, default=1.0,
+                        help='Seconds between response and next request on the same connection')
+    parser.add_argument('--include-wheelstacks', action='store_true', help='`placementUpdate` with `wheelstack`s')
+    parser.add_argument('--include-wheels', action='store_true', help='`placementUpdate` with `wheel`s')
+    parser.add_argument('--orders-rate', type=float, default=2.0,
+                        help='Background orders per second (create + complete), 0 to disable')
+    parser.add_argument('--connect-concurrency', type=int, default=100,
+                        help='Max number of connections opened at the same time')
+    parser.add_argument('--server-pid', type=int, default=0, help='Server process pid for RSS and CPU sampling')
+    parser.add_argument('--saturation-p99-ms', type=float, default=1000.0)
+    parser.add_argument('--saturation-cpu', type=float, default=95.0, help='CPU % of one core')
+    parser.add_argument('--continue-after-saturation', action='store_true')
+    parser.add_argument('--output', default='', help='Path to store JSON report')
+    return parser.parse_args()
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    weights: dict[str, int] = {}
+    for record in mix.split(','):
+        task, weight = record.split('=')
+        task = task.strip()
+        if task not in TASKS:
+            raise ValueError(f'Unknown task in mix: {task}')
+        weights[task] = int(weight)
+    return weights
+
+
+def percentile(values: list[float], point: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(point / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+# region server stats
+def read_rss_bytes(pid: int) -> int:
+    status_path = Path(f'/proc/{pid}/status')
+    for line in status_path.read_text().splitlines():
+        if line.startswith('VmRSS:'):
+            return int(line.split()[1]) * 1024
+    return 0
+
+
+def read_cpu_seconds(pid: int) -> float:
+    import os
+    stat_fields = Path(f'/proc/{pid}/stat').read_text().rsplit(')', 1)[1].split()
+    # utime + stime, fields 14 and 15 of `stat` (after pid and comm)
+    ticks = int(stat_fields[11]) + int(stat_fields[12])
+    return ticks / os.sysconf('SC_CLK_TCK')
+
+
+class ServerSampler:
+
+    def __init__(self, pid: int):
+        self.pid: int = pid
+        self.cpu_start: float = 0.0
+        self.time_start: float = 0.0
+
+    def available(self) -> bool:
+        return bool(self.pid) and Path(f'/proc/{self.pid}').exists()
+
+    def rss(self) -> int:
+        return read_rss_bytes(self.pid) if self.available() else 0
+
+    def start(self) -> None:
+        if self.available():
+            self.cpu_start = read_cpu_seconds(self.pid)
+            self.time_start = time.monotonic()
+
+    def cpu_percent(self) -> float:
+        if not self.available() or not self.time_start:
+            return 0.0
+        elapsed = time.monotonic() - self.time_start
+        return (read_cpu_seconds(self.pid) - self.cpu_start) / elapsed * 100 if elapsed else 0.0
+# endregion server stats
+
+
+class BenchState:
+
+    def __init__(self, args: argparse.Namespace, token: str):
+        self.args = args
+        self.token: str = token
+        self.weights: dict[str, int] = parse_mix(args.mix)
+        self.latencies: dict[str, list[float]] = {task: [] for task in TASKS}
+        self.errors: dict[str, int] = {task: 0 for task in TASKS}
+        self.grid_last_change: str | None = None
+        self.free_platform_cells: list[tuple[str, str]] = []
+        self.orders_done: int = 0
+        self.orders_failed: int = 0
+        self.running: bool = True
+
+    def reset_stats(self) -> None:
+        self.latencies = {task: [] for task in TASKS}
+        self.errors = {task: 0 for task in TASKS}
+        self.orders_done = 0
+        self.orders_failed = 0
+
+    def pick_task(self) -> str:
+        tasks = list(self.weights.keys())
+        task = random.choices(tasks, weights=[self.weights[task] for task in tasks])[0]
+        if 'wheelstackCreation' == task and not self.free_platform_cells:
+            return 'placementUpdate'
+        return task
+
+    def build_request(self, task: str) -> dict:
+        args = self.args
+        if 'placementUpdate' == task:
+            return {
+                'type': 'gather',
+                'filter': {
+                    'task': task,
+                    'dataFilter': {
+                        'placementId': args.grid_id,
+                        'placementName': args.grid_name,
+                        'placementType': 'grid',
+                        # Half of the clients are up to date, other ones require full data.
+                        'lastChange': self.grid_last_change if random.random() < 0.5 else None,
+                        'includeWheelstacks': args.include_wheelstacks,
+                        'includeWheels': args.include_wheels,
+                    }
+                }
+            }
+        if 'expandedStorage' == task:
+            return {
+                'type': 'gather',
+                'filter': {
+                    'task': task,
+                    'dataFilter': {
+                        'name': args.storage_name,
+                    }
+                }
+            }
+        if 'batchesData' == task:
+            return {
+                'type': 'gather',
+                'filter': {
+                    'task': task,
+                    'dataFilter': {
+                        'batchNumbers': args.batch_number,
+                    }
+                }
+            }
+        row, col = self.free_platform_cells.pop()
+        return {
+            'type': 'create',
+            'filter': {
+                'task': task,
+                'dataFilter': {
+                    'wheelstackData': {
+                        'batchNumber': random.choice(args.batch_number) if args.batch_number else '',
+                        'placementType': 'basePlatform',
+                        'placementId': args.platform_id,
+                        'placementName': '',
+                        'rowPlacement': row,
+                        'colPlacement': col,
+                        'lastOrder': None,
+                        'maxSize': 6,
+                        'blocked': False,
+                        'wheels': [],
+                        'status': 'basePlatform',
+                    }
+                }
+            }
+        }
+
+
+async def get_token(args: argparse.Namespace) -> str:
+    if args.token or not args.auth_url:
+        return args.token
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+                f'{args.auth_url}/users/login',
+                data={'username': args.login, 'password': args.password},
+        ) as resp:
+            if not resp.ok:
+                raise RuntimeError('Incorrect credentials')
+            resp_data = await resp.json()
+            return resp_data['access_token']
+
+
+async def load_free_platform_cells(http: aiohttp.ClientSession, state: BenchState) -> None:
+    if not state.args.platform_id:
+        return
+    async with http.get(f'{state.args.api_url}/platform/{state.args.platform_id}') as resp:
+        if not resp.ok:
+            print(f'Failed to load `basePlatform` => {resp.status}, `wheelstackCreation` disabled')
+            return
+        platform_data = await resp.json()
+    for row, row_data in platform_data['rows'].items():
+        for col, cell in row_data['columns'].items():
+            if cell['wheelStack'] is None and not cell['blocked']:
+                state.free_platform_cells.append((row, col))
+    random.shuffle(state.free_platform_cells)
+
+
+# region orders traffic
+async def orders_traffic(http: aiohttp.ClientSession, state: BenchState) -> None:
+    args = state.args
+    if args.orders_rate <= 0:
+        return
+    interval: float = 1 / args.orders_rate
+    while state.running:
+        started = time.monotonic()
+        try:
+            async with http.get(f'{args.api_url}/grid/{args.grid_id}') as resp:
+                grid_data = await resp.json()
+            state.grid_last_change = grid_data['lastChange']
+            occupied: list[tuple[str, str]] = []
+            free: list[tuple[str, str]] = []
+            for row, row_data in grid_data['rows'].items():
+                for col, cell in row_data['columns'].items():
+                    if cell['blocked']:
+                        continue
+                    if cell['wheelStack'] is None:
+                        free.append((row, col))
+                    else:
+                        occupied.append((row, col))
+            if occupied and free:
+                source_row, source_col = random.choice(occupied)
+                dest_row, dest_col = random.choice(free)
+                order_data = {
+                    'orderName': 'wsSoakBenchmark',
+                    'orderDescription': '',
+                    'orderType': 'moveWholeStack',
+                    'source': {
+                        'placementType': 'grid',
+                        'placementId': args.grid_id,
+                        'rowPlacement': source_row,
+                        'columnPlacement': source_col,
+                    },
+                    'destination': {
+                        'placementType': 'grid',
+                        'placementId': args.grid_id,
+                        'rowPlacement': dest_row,
+                        'columnPlacement': dest_col,
+                    },
+                }
+                async with http.post(f'{args.api_url}/orders/create/move', json=order_data) as resp:
+                    created = await resp.json()
+                if resp.ok:
+                    async with http.post(f'{args.api_url}/orders/complete/{created['_id']}') as resp:
+                        state.orders_done += 1 if resp.ok else 0
+                        state.orders_failed += 0 if resp.ok else 1
+                else:
+                    state.orders_failed += 1
+        except (aiohttp.ClientError, KeyError, ValueError):
+            state.orders_failed += 1
+        await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+# endregion orders traffic
+
+
+async def connection_worker(state: BenchState, connect_semaphore: asyncio.Semaphore,
+                            stop_event: asyncio.Event, opened: list[int]) -> None:
+    args = state.args
+    ws_url: str = args.api_url.replace('http', 'ws', 1) + f'/ws/grid_page?auth_token={state.token}'
+    async with connect_semaphore:
+        try:
+            websocket = await websockets.connect(ws_url, max_size=None, open_timeout=30)
+        except (OSError, websockets.WebSocketException, asyncio.TimeoutError):
+            opened[1] += 1
+            return
+    opened[0] += 1
+    try:
+        # Spreading first requests, so we don't start with thundering herd.
+        await asyncio.sleep(random.random() * args.think_time)
+        while not stop_event.is_set():
+            task: str = state.pick_task()
+            request = state.build_request(task)
+            started = time.perf_counter()
+            await websocket.send(json.dumps(request))
+            response = json.loads(await websocket.recv())
+            latency_ms = (time.perf_counter() - started) * 1000
+            if 'error' == response.get('type'):
+                state.errors[task] += 1
+            else:
+                state.latencies[task].append(latency_ms)
+            await asyncio.sleep(args.think_time)
+    except websockets.WebSocketException:
+        opened[2] += 1
+    finally:
+        await websocket.close()
+
+
+async def run_step(connections: int, state: BenchState, sampler: ServerSampler) -> dict:
+    args = state.args
+    state.reset_stats()
+    stop_event = asyncio.Event()
+    connect_semaphore = asyncio.Semaphore(args.connect_concurrency)
+    # opened | failed to open | dropped
+    opened: list[int] = [0, 0, 0]
+    rss_before: int = sampler.rss()
+    workers = [
+        asyncio.create_task(connection_worker(state, connect_semaphore, stop_event, opened))
+        for _ in range(connections)
+    ]
+    # Waiting for connections, before measuring.
+    while opened[0] + opened[1] < connections:
+        await asyncio.sleep(0.5)
+    rss_connected: int = sampler.rss()
+    state.reset_stats()
+    sampler.start()
+    step_started = time.monotonic()
+    await asyncio.sleep(args.step_duration)
+    elapsed = time.monotonic() - step_started
+    cpu_percent: float = sampler.cpu_percent()
+    stop_event.set()
+    await asyncio.gather(*workers, return_exceptions=True)
+    tasks_report: dict = {}
+    all_latencies: list[float] = []
+    for task in TASKS:
+        latencies = state.latencies[task]
+        all_latencies.extend(latencies)
+        if not latencies and not state.errors[task]:
+            continue
+        tasks_report[task] = {
+            'count': len(latencies),
+            'errors': state.errors[task],
+            'p50Ms': round(percentile(latencies, 50), 2),
+            'p95Ms': round(percentile(latencies, 95), 2),
+            'p99Ms': round(percentile(latencies, 99), 2),
+            'meanMs': round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        }
+    p99_all: float = percentile(all_latencies, 99)
+    report = {
+        'connections': connections,
+        'opened': opened[0],
+        'failedToOpen': opened[1],
+        'dropped': opened[2],
+        'durationSec': round(elapsed, 2),
+        'messagesPerSec': round(len(all_latencies) / elapsed, 2) if elapsed else 0.0,
+        'p99Ms': round(p99_all, 2),
+        'tasks': tasks_report,
+        'ordersCompleted': state.orders_done,
+        'ordersFailed': state.orders_failed,
+        'serverCpuPercent': round(cpu_percent, 2) if sampler.available() else None,
+        'serverRssMb': round(rss_connected / 2 ** 20, 2) if sampler.available() else None,
+        'rssPerConnectionKb': (
+            round((rss_connected - rss_before) / max(1, opened[0]) / 1024, 2) if sampler.available() else None
+        ),
+    }
+    report['saturated'] = (
+        p99_all > args.saturation_p99_ms
+        or (sampler.available() and cpu_percent >= args.saturation_cpu)
+        or opened[1] > 0
+    )
+    return report
+
+
+def print_step(report: dict) -> None:
+    print(f'{'-' * 30}')
+    print(
+        f'connections: {report['connections']} | opened: {report['opened']}'
+        f' | failed: {report['failedToOpen']} | dropped: {report['dropped']}'
+    )
+    print(
+        f'messages/s: {report['messagesPerSec']} | p99: {report['p99Ms']} ms'
+        f' | orders completed: {report['ordersCompleted']} | orders failed: {report['ordersFailed']}'
+    )
+    if report['serverCpuPercent'] is not None:
+        print(
+            f'server CPU: {report['serverCpuPercent']}% | RSS: {report['serverRssMb']} MB'
+            f' | per connection: {report['rssPerConnectionKb']} KB'
+        )
+    for task, task_report in report['tasks'].items():
+        print(
+            f'  {task}: count {task_report['count']} | errors {task_report['errors']}'
+            f' | p50 {task_report['p50Ms']} | p95 {task_report['p95Ms']} | p99 {task_report['p99Ms']} ms'
+        )
+    if report['saturated']:
+        print('SATURATED')
+
+
+async def main() -> None:
+    args = parse_args()
+    token: str = await get_token(args)
+    state = BenchState(args, token)
+    sampler = ServerSampler(args.server_pid)
+    headers: dict = {'Authorization': f'Bearer {token}'} if token else {}
+    steps: list[int] = [int(step) for step in args.steps.split(',') if step]
+    reports: list[dict] = []
+    async with aiohttp.ClientSession(headers=headers) as http:
+        await load_free_platform_cells(http, state)
+        orders_task = asyncio.create_task(orders_traffic(http, state))
+        try:
+            for connections in steps:
+                report = await run_step(connections, state, sampler)
+                reports.append(report)
+                print_step(report)
+                if report['saturated'] and not args.continue_after_saturation:
+                    break
+        finally:
+            state.running = False
+            await orders_task
+    saturated = [report['connections'] for report in reports if report['saturated']]
+    print(f'{'=' * 30}')
+    if saturated:
+        print(f'Saturation reached at {saturated[0]} connections')
+    else:
+        print(f'No saturation up to {steps[-1]} connections')
+    if args.output:
+        Path(args.output).write_text(json.dumps(reports, indent=2))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
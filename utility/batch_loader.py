@@ -0,0 +1,113 @@
+import asyncio
+from loguru import logger
+from pymongo.errors import PyMongoError
+from fastapi import HTTPException, status
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorClientSession
+from utility.utilities import get_db_collection, log_db_record, log_db_error_record
+from constants import DB_PMK_NAME, CLN_WHEELS, CLN_WHEELSTACKS, CLN_BATCH_NUMBERS
+
+
+class BatchLoader:
+    """
+    Request-scoped loader of documents by a single key field.
+    Every `load` made in the same loop iteration is collected and dispatched as one `$in` query.
+    Loaded documents are memoized, so every key is only queried once in the loader lifetime.
+    Missing documents are returned as `None`.
+    Should never be shared between requests, it's not invalidated by writes.
+    """
+
+    def __init__(
+            self,
+            db: AsyncIOMotorClient,
+            db_name: str,
+            db_collection: str,
+            key_field: str = '_id',
+            session: AsyncIOMotorClientSession = None,
+    ):
+        self.db: AsyncIOMotorClient = db
+        self.db_name: str = db_name
+        self.db_collection: str = db_collection
+        self.key_field: str = key_field
+        self.session: AsyncIOMotorClientSession = session
+        self.queries: int = 0
+        self._cache: dict = {}
+        self._queue: list = []
+
+    async def load(self, key) -> dict | None:
+        if key not in self._cache:
+            loop = asyncio.get_running_loop()
+            self._cache[key] = loop.create_future()
+            self._queue.append(key)
+            # First key of the batch, dispatch after every other task of this iteration had a chance to add keys.
+            if 1 == len(self._queue):
+                loop.call_soon(self._schedule_dispatch)
+        return await asyncio.shield(self._cache[key])
+
+    async def load_many(self, keys: list) -> list[dict | None]:
+        return await asyncio.gather(*[self.load(key) for key in keys])
+
+    def prime(self, key, document: dict | None) -> None:
+        if key in self._cache and not self._cache[key].done():
+            return
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(document)
+        self._cache[key] = future
+
+    def clear(self, key) -> None:
+        self._cache.pop(key, None)
+
+    def _schedule_dispatch(self) -> None:
+        keys: list = self._queue
+        self._queue = []
+        asyncio.ensure_future(self._dispatch(keys))
+
+    async def _dispatch(self, keys: list) -> None:
+        db_info = await log_db_record(self.db_name, self.db_collection)
+        logger.info(
+            f'Attempt to batch load {len(keys)} documents by `{self.key_field}`' + db_info
+        )
+        collection = await get_db_collection(self.db, self.db_name, self.db_collection)
+        query = {
+            self.key_field: {
+                '$in': keys,
+            }
+        }
+        try:
+            self.queries += 1
+            result = await collection.find(query, session=self.session).to_list(length=None)
+        except PyMongoError as error:
+            error_extra: str = await log_db_error_record(error)
+            logger.error(
+                f'Error while batch loading documents by `{self.key_field}`' + db_info + error_extra
+            )
+            for key in keys:
+                future = self._cache.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(
+                        HTTPException(
+                            detail='Error while gathering data',
+                            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        )
+                    )
+            return
+        documents: dict = {
+            document[self.key_field]: document for document in result
+        }
+        for key in keys:
+            future = self._cache.get(key)
+            if future is not None and not future.done():
+                future.set_result(documents.get(key))
+        logger.info(
+            f'Successfully batch loaded {len(documents)} of {len(keys)} documents by `{self.key_field}`' + db_info
+        )
+
+
+class DataLoaders:
+    """
+    Set of `BatchLoader`s for the basic collections, created once per request|action.
+    """
+
+    def __init__(self, db: AsyncIOMotorClient, session: AsyncIOMotorClientSession = None):
+        self.wheels = BatchLoader(db, DB_PMK_NAME, CLN_WHEELS, '_id', session)
+        self.wheelstacks = BatchLoader(db, DB_PMK_NAME, CLN_WHEELSTACKS, '_id', session)
+        self.batches = BatchLoader(db, DB_PMK_NAME, CLN_BATCH_NUMBERS, 'batchNumber', session)
@@ -1,3 +1,5 @@
+import json
+import base64
 import asyncio
 from functools import wraps
 from loguru import logger
@@ -227,3 +229,32 @@ async def handle_http_exceptions_for_websocket(func, *args, **kwargs):
             code=WS_CODES.get(status_code, status.WS_1008_POLICY_VIOLATION),
             reason=http_exc.detail
         )
+
+
+async def encode_cursor_token(cursor_data: dict) -> str:
+    """
+    Creates opaque `cursor` token from provided `cursor_data`.
+    `ObjectId`s and `datetime`s are stored as strings, decoding side should convert them back.
+    """
+    cor_cursor_data = convert_object_id_and_datetime_to_str(cursor_data)
+    raw_token: bytes = json.dumps(cor_cursor_data, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw_token).decode('ascii')
+
+
+async def decode_cursor_token(cursor_token: str) -> dict:
+    try:
+        raw_token: bytes = base64.urlsafe_b64decode(cursor_token.encode('ascii'))
+        cursor_data = json.loads(raw_token)
+    except (ValueError, UnicodeError) as error:
+        logger.error(f'Invalid cursor token: {cursor_token} - {error}')
+        raise HTTPException(
+            detail='Invalid cursor token',
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+    if not isinstance(cursor_data, dict):
+        logger.error(f'Invalid cursor token: {cursor_token}')
+        raise HTTPException(
+            detail='Invalid cursor token',
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+    return cursor_data